@@ -0,0 +1,427 @@
+"""
+Pruebas de rendimiento del Notador con libros y plantillas sintéticos.
+
+Genera un Excel con el formato real ("123456789 - APELLIDOS NOMBRES", GRUPO,
+PERIODO y columnas de áreas) y una plantilla Word con la tabla de ÁREAS y las
+etiquetas de word_fields_mapping. Mide el arranque, la carga del libro, la
+búsqueda de estudiantes, las estadísticas académicas, el renderizado y lotes
+completos, y escribe los resultados en JSON para comparar entre versiones.
+
+Uso:
+    python benchmark.py --sizes 100 1000 10000
+    python benchmark.py --sizes 1000 --baseline benchmarks/benchmark.json --tolerance 0.25 \
+        --output benchmarks/actual.json
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+from docx import Document
+
+from notador import (BELOW_LABELS, CompactSheet, Notador, SheetDiskCache, SheetStats, StringTable,
+                     WorkbookSnapshot, peak_memory_bytes)
+
+APELLIDOS = ('GOMEZ', 'PEREZ', 'RODRIGUEZ', 'MARTINEZ', 'GARCIA', 'LOPEZ', 'HERNANDEZ', 'DIAZ',
+             'MORALES', 'RAMIREZ', 'TORRES', 'VARGAS', 'CASTRO', 'ORTIZ', 'RIOS', 'MUÑOZ')
+NOMBRES = ('JUAN', 'MARÍA', 'ANDRÉS', 'LAURA', 'CAMILO', 'VALENTINA', 'SANTIAGO', 'SOFÍA',
+           'DANIEL', 'ISABELLA', 'MATEO', 'ANA', 'JOSÉ', 'LUCÍA', 'FELIPE', 'SARA')
+
+
+def area_names(count, areas_mapping):
+    """Las áreas reales del mapeo primero; si se piden más se agregan áreas sin mapear"""
+    names = list(areas_mapping)[:count]
+    names += [f"Área {i}" for i in range(len(names) + 1, count + 1)]
+    return names
+
+
+def generate_workbook(path, sheets, students_per_sheet, areas, seed=0, numeric=False):
+    """
+    Escribe un libro de Excel sintético con una hoja por grado y una hoja Consolidado.
+
+    Las notas usan coma decimal y algunas celdas quedan vacías, como en los
+    libros que exportan los colegios. Con numeric=True las notas son celdas
+    numéricas, como en los libros donde se digitan directamente.
+
+    Returns:
+        list: Tuplas (student_id, grado, grupo, periodo) de todos los estudiantes
+    """
+    rng = random.Random(seed)
+    jobs = []
+    with pd.ExcelWriter(path) as writer:
+        for sheet in range(sheets):
+            grado = str(6 + sheet)
+            rows = []
+            for i in range(students_per_sheet):
+                student_id = f"{100000000 + (sheet + 1) * 100000 + i}"
+                grupo = f"{grado}0{i % 3 + 1}"
+                nombre = (f"{rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)} "
+                          f"{rng.choice(NOMBRES)} {rng.choice(NOMBRES)}")
+                row = {'estudiante': f"{student_id} - {nombre}", 'GRUPO': grupo, 'PERIODO': '1'}
+                for area in areas:
+                    if rng.random() < 0.05:
+                        row[area] = None if numeric else ''
+                    elif numeric:
+                        row[area] = round(rng.uniform(1.0, 5.0), 1)
+                    else:
+                        row[area] = f"{rng.uniform(1.0, 5.0):.1f}".replace('.', ',')
+                row['Promedio'] = ''
+                rows.append(row)
+                jobs.append((student_id, grado, grupo, '1'))
+            pd.DataFrame(rows).to_excel(writer, sheet_name=grado, index=False)
+        pd.DataFrame({'Resumen': ['Consolidado sintético']}).to_excel(writer, sheet_name='Consolidado', index=False)
+    return jobs
+
+
+def generate_template(path, word_fields_mapping, areas_mapping, areas):
+    """
+    Escribe una plantilla Word con las etiquetas de word_fields_mapping y la tabla de ÁREAS.
+
+    Las etiquetas de BELOW_LABELS llevan su celda de valor debajo; las demás a la derecha.
+    """
+    labels = [variants[0] for variants in word_fields_mapping.values()]
+    below = [label for label in labels if label in BELOW_LABELS]
+    right = [label for label in labels if label not in BELOW_LABELS]
+
+    doc = Document()
+    doc.add_heading('Informe académico', level=1)
+
+    header = doc.add_table(rows=2, cols=max(len(below), 1))
+    for col, label in enumerate(below):
+        header.cell(0, col).text = label
+
+    fields = doc.add_table(rows=len(right), cols=2)
+    for row, label in enumerate(right):
+        fields.cell(row, 0).text = label
+
+    doc.add_paragraph('')
+    word_areas = [areas_mapping[area] for area in areas if area in areas_mapping]
+    table = doc.add_table(rows=len(word_areas) + 1, cols=2)
+    table.cell(0, 0).text = 'ÁREAS'
+    table.cell(0, 1).text = 'NOTA'
+    for row, area in enumerate(word_areas, start=1):
+        table.cell(row, 0).text = area
+    doc.save(path)
+
+
+def measure(func, repeat=1):
+    """Ejecuta func repeat veces y devuelve (resultado, tiempos en segundos)"""
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return result, times
+
+
+def entry(name, size, times, items=1, **extra):
+    """Un resultado del benchmark; per_item_ms usa el mejor tiempo"""
+    best = min(times)
+    return dict({
+        'benchmark': name,
+        'size': size,
+        'items': items,
+        'seconds': round(best, 6),
+        'median_seconds': round(statistics.median(times), 6),
+        'per_item_ms': round(best * 1000 / items, 4) if items else None,
+    }, **extra)
+
+
+def traced_bytes(build):
+    """Devuelve (resultado de build, bytes que siguen reservados según tracemalloc)"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = build()
+        gc.collect()
+        return result, tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def memory_entry(excel_path, parser, size, name='memory'):
+    """Memoria de las hojas leídas como DataFrames de texto frente a la forma compacta"""
+    snapshot = WorkbookSnapshot(str(excel_path), None, parser)
+    grados = snapshot.grade_names()
+
+    def read_frames():
+        with snapshot._excel_file() as open_xlsx:
+            return [snapshot._read(grado, open_xlsx) for grado in grados]
+    frames, text_bytes = traced_bytes(read_frames)
+
+    def compact():
+        # Como en WorkbookSnapshot, cada hoja de textos se suelta en cuanto queda compacta
+        strings = StringTable()
+        sheets = []
+        while frames:
+            df, schema = frames.pop(0)
+            sheets.append(CompactSheet(df, schema, strings))
+        return strings, sheets
+    start = time.perf_counter()
+    (strings, sheets), compact_bytes = traced_bytes(compact)
+    seconds = time.perf_counter() - start
+    return entry(name, size, [seconds], items=size, text_bytes=text_bytes, compact_bytes=compact_bytes,
+                 ratio=round(text_bytes / compact_bytes, 2),
+                 nbytes=strings.nbytes + sum(sheet.nbytes for sheet in sheets))
+
+
+def make_notador(excel_path, template_path, output_folder, backend, output_formats):
+    notador = Notador()
+    notador.set_excel_file(str(excel_path))
+    notador.set_word_template(str(template_path))
+    notador.set_output_folder(str(output_folder))
+    notador.set_render_backend(backend)
+    notador.output_formats = set(output_formats)
+    notador.workbook_cache.disk_cache = None  # Sin caché en disco salvo en las mediciones de carga
+    return notador
+
+
+def run_size(size, args, workdir):
+    """Corre todos los benchmarks para un libro de size estudiantes"""
+    results = []
+    defaults = Notador()
+    areas = area_names(args.areas, defaults.areas_mapping)
+    students_per_sheet = max(1, size // args.sheets)
+
+    excel_path = workdir / f"libro_{size}.xlsx"
+    template_path = workdir / 'plantilla.docx'
+    start = time.perf_counter()
+    jobs = generate_workbook(excel_path, args.sheets, students_per_sheet, areas, seed=args.seed)
+    generate_template(template_path, defaults.word_fields_mapping, defaults.areas_mapping, areas)
+    print(f"[{size}] libro generado en {time.perf_counter() - start:.1f} s", file=sys.stderr)
+    size = len(jobs)
+    output_formats = ('docx', 'pdf') if args.pdf else ('docx',)
+
+    # Carga del libro como en load_data: cada repetición parte de cachés vacías (en memoria y en disco)
+    disk_cache = SheetDiskCache(workdir / 'cache')
+    
+    def load(cold=True):
+        if cold:
+            disk_cache.clear()
+        notador = make_notador(excel_path, template_path, workdir, args.backends[0], output_formats)
+        notador.workbook_cache.disk_cache = disk_cache
+        notador.get_workbook().load_all()
+        return notador
+    notador, times = measure(load, args.repeat)
+    results.append(entry('excel_load', size, times, items=size, sheets=args.sheets))
+    
+    # Reapertura de un libro sin cambios, desde la caché en disco
+    notador, times = measure(lambda: load(cold=False), args.repeat)
+    results.append(entry('excel_load_cached', size, times, items=size, sheets=args.sheets))
+    
+    # Memoria residente de las hojas cargadas (sin cachés): como texto y en forma compacta, con
+    # las notas escritas como texto (el libro anterior) y como celdas numéricas
+    numeric_path = workdir / f"libro_{size}_numerico.xlsx"
+    generate_workbook(numeric_path, args.sheets, students_per_sheet, areas, seed=args.seed, numeric=True)
+    for name, path, label in (('memory', excel_path, 'notas como texto'),
+                              ('memory_numeric', numeric_path, 'notas numéricas')):
+        memory = memory_entry(path, notador.parse_student_info, size, name)
+        results.append(memory)
+        print(f"[{size}] memoria de las hojas ({label}): {memory['text_bytes'] / 2 ** 20:.1f} MB como texto, "
+              f"{memory['compact_bytes'] / 2 ** 20:.1f} MB compactas ({memory['ratio']}x)", file=sys.stderr)
+    workbook = notador.get_workbook()
+    grados = workbook.grade_names()
+
+    # Índice de estudiantes y búsquedas por ID
+    def build_indexes():
+        for grado in grados:
+            workbook._indexes.pop(grado, None)
+        return [notador.get_student_index(grado) for grado in grados]
+    indexes, times = measure(build_indexes, args.repeat)
+    results.append(entry('index_build', size, times, items=size))
+
+    rng = random.Random(args.seed)
+    sample = [rng.choice(jobs) for _ in range(args.lookups)]
+    by_grade = dict(zip(grados, indexes))
+    _, times = measure(lambda: [by_grade[grado].get(student_id) for student_id, grado, _, _ in sample],
+                       args.repeat)
+    results.append(entry('lookup', size, times, items=len(sample)))
+
+    # Estadísticas académicas: fila por fila y vectorizadas por hoja
+    stats_rows = [(grado, position) for grado in grados for position in range(len(by_grade[grado]))]
+    stats_rows = stats_rows[:args.stats_rows]
+    sheets = {grado: workbook.get_sheet(grado) for grado in grados}
+    schemas = {grado: workbook.get_schema(grado) for grado in grados}
+    _, times = measure(lambda: [notador.calculate_academic_stats(sheets[grado].row(position), schemas[grado])
+                                for grado, position in stats_rows], args.repeat)
+    results.append(entry('academic_stats_row', size, times, items=len(stats_rows)))
+    _, times = measure(lambda: [SheetStats(sheets[grado], by_grade[grado], schemas[grado])
+                                for grado in grados], args.repeat)
+    results.append(entry('academic_stats_sheet', size, times, items=size))
+
+    # Validación previa de todas las hojas (sin la caché de reportes ni la plantilla)
+    _, times = measure(lambda: notador._validate(workbook, grados, None), args.repeat)
+    results.append(entry('validate', size, times, items=size))
+
+    # Renderizado de una muestra de boletines con cada motor (sin PDF salvo --pdf)
+    render_sample = jobs[:args.render_sample]
+    for backend in args.backends:
+        output = workdir / f"render_{backend}_{size}"
+        backend_notador = make_notador(excel_path, template_path, output, backend, output_formats)
+        backend_notador.workbook_cache = notador.workbook_cache
+        for grado in grados:
+            backend_notador.get_fill_plan(backend_notador.get_areas_mapping(grado))
+        _, times = measure(lambda: [backend_notador.process_student(*job) for job in render_sample], args.repeat)
+        results.append(entry('render', size, times, items=len(render_sample), backend=backend))
+        backend_notador.close()
+
+    # Lote completo: carga, índice, estadísticas y renderizado de todos los estudiantes
+    output = workdir / f"lote_{size}"
+    batch = make_notador(excel_path, template_path, output, args.backends[0], output_formats)
+    batch.run_report_name = None
+    start = time.perf_counter()
+    batch_results = batch.process_students(jobs, workers=args.workers)
+    seconds = time.perf_counter() - start
+    failures = sum(1 for result in batch_results if not result['ok'])
+    results.append(entry('end_to_end', size, [seconds], items=size, backend=args.backends[0],
+                         workers=args.workers, failures=failures, stages=batch.last_report['stages']))
+    batch.close()
+    notador.close()
+
+    for result in results:
+        print(f"[{size}] {result['benchmark']:<22} {result['seconds']:>10.4f} s "
+              f"{result['per_item_ms']:>10.4f} ms/elem", file=sys.stderr)
+    return results
+
+
+STARTUP_IMPORT = """
+import json, sys, time
+start = time.perf_counter()
+import notador
+seconds = time.perf_counter() - start
+print(json.dumps({'seconds': seconds, 'modules': [name for name in HEAVY_MODULES if name in sys.modules]}))
+"""
+
+STARTUP_WINDOW = """
+import json, sys, time
+start = time.perf_counter()
+import notador
+gui = notador.NotadorGUI()
+gui.root.update()
+seconds = time.perf_counter() - start
+modules = [name for name in HEAVY_MODULES if name in sys.modules]
+gui.root.destroy()
+print(json.dumps({'seconds': seconds, 'modules': modules}))
+"""
+
+HEAVY_MODULES = ('pandas', 'numpy', 'docx', 'tkinter', 'ttkthemes', 'win32com')
+
+
+def run_startup(args):
+    """Tiempo de arranque en procesos nuevos: importar notador y mostrar la ventana"""
+    results = []
+    for name, script in (('startup_import', STARTUP_IMPORT), ('startup_window', STARTUP_WINDOW)):
+        code = f"HEAVY_MODULES = {HEAVY_MODULES!r}\n{script}"
+        times, modules = [], []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            completed = subprocess.run([sys.executable, '-c', code], cwd=str(Path(__file__).resolve().parent),
+                                       capture_output=True, text=True)
+            process_seconds = time.perf_counter() - start
+            if completed.returncode != 0:
+                break  # p. ej. sin pantalla para abrir la ventana
+            data = json.loads(completed.stdout.strip().splitlines()[-1])
+            times.append(data['seconds'])
+            modules = data['modules']
+        if not times:
+            print(f"[inicio] {name}: omitido ({completed.stderr.strip().splitlines()[-1:]})", file=sys.stderr)
+            continue
+        results.append(entry(name, None, times, process_seconds=round(process_seconds, 6), modules=modules))
+        print(f"[inicio] {name:<22} {min(times):>10.4f} s  módulos: {', '.join(modules) or '-'}", file=sys.stderr)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Devuelve los benchmarks que empeoraron más de tolerance respecto a baseline"""
+    def key(result):
+        return result['benchmark'], result['size'], result.get('backend'), result.get('workers')
+    previous = {key(result): result for result in baseline['results']}
+    regressions = []
+    for result in results:
+        old = previous.get(key(result))
+        if old and old['per_item_ms'] and result['per_item_ms'] > old['per_item_ms'] * (1 + tolerance):
+            regressions.append({
+                'benchmark': result['benchmark'],
+                'size': result['size'],
+                'backend': result.get('backend'),
+                'baseline_ms': old['per_item_ms'],
+                'current_ms': result['per_item_ms'],
+            })
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pruebas de rendimiento del Notador")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000],
+                        help="Número total de estudiantes de cada libro sintético")
+    parser.add_argument('--sheets', type=int, default=5, help="Hojas (grados) por libro")
+    parser.add_argument('--areas', type=int, default=11, help="Columnas de áreas por hoja")
+    parser.add_argument('--backends', nargs='+', default=['stamp', 'docx'], choices=['stamp', 'docx', 'word'],
+                        help="Motores a medir; el primero se usa en el lote completo")
+    parser.add_argument('--workers', type=int, default=1, help="Procesos del lote completo")
+    parser.add_argument('--pdf', action='store_true', help="Generar también el PDF (requiere LibreOffice)")
+    parser.add_argument('--repeat', type=int, default=3, help="Repeticiones de cada medición")
+    parser.add_argument('--lookups', type=int, default=1000, help="Búsquedas de estudiantes por medición")
+    parser.add_argument('--stats-rows', type=int, default=1000, help="Filas para las estadísticas fila por fila")
+    parser.add_argument('--render-sample', type=int, default=20, help="Boletines por motor en 'render'")
+    parser.add_argument('--no-startup', action='store_true', help="No medir el tiempo de arranque")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workdir', help="Carpeta para los archivos generados (por defecto una temporal)")
+    parser.add_argument('--output', default=str(Path('benchmarks') / 'benchmark.json'),
+                        help="Archivo JSON de resultados (por defecto benchmarks/benchmark.json)")
+    parser.add_argument('--baseline', help="Resultados anteriores para detectar regresiones")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Empeoramiento relativo permitido frente a --baseline")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory(prefix='notador_bench_') as tmp:
+        workdir = Path(args.workdir or tmp)
+        workdir.mkdir(parents=True, exist_ok=True)
+        results = [] if args.no_startup else run_startup(args)
+        for size in args.sizes:
+            results.extend(run_size(size, args, workdir))
+
+    data = {
+        'environment': {
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'pandas': pd.__version__,
+        },
+        'parameters': {key: value for key, value in vars(args).items() if key not in ('output', 'baseline')},
+        'peak_memory': peak_memory_bytes(),
+        'results': results,
+    }
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            data['regressions'] = compare(results, json.load(f), args.tolerance)
+        for regression in data['regressions']:
+            print(f"⚠ Regresión en {regression['benchmark']} ({regression['size']}): "
+                  f"{regression['baseline_ms']} → {regression['current_ms']} ms/elem", file=sys.stderr)
+        exit_code = 1 if data['regressions'] else 0
+
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    print(f"Resultados en {args.output}", file=sys.stderr)
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,36 +1,113 @@
-import pandas as pd
-from docx import Document
-import win32com.client
+import atexit
+import difflib
+import functools
+import hashlib
+import importlib
+import io
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import queue
 import re
+import shutil
+import signal
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+import threading
+import unicodedata
+import zipfile
+from collections import deque, namedtuple
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
 from pathlib import Path
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
-from ttkthemes import ThemedTk
+from xml.sax.saxutils import escape as xml_escape
 
-class PlaceholderEntry(ttk.Entry):
-    def __init__(self, container, placeholder, *args, **kwargs):
-        super().__init__(container, *args, **kwargs)
-        self.placeholder = placeholder
-        self.placeholder_color = 'grey'
-        self.default_fg_color = self['foreground']
-        
-        self.bind("<FocusIn>", self._clear_placeholder)
-        self.bind("<FocusOut>", self._add_placeholder)
-        
-        self._add_placeholder()
-    
-    def _clear_placeholder(self, e):
-        if self.get() == self.placeholder:
-            self.delete(0, tk.END)
-            self['foreground'] = self.default_fg_color
+
+class LazyModule:
+    """Módulo que se importa la primera vez que se usa uno de sus atributos"""
+    def __init__(self, name):
+        self._name = name
+        self._module = None
     
-    def _add_placeholder(self, e=None):
-        if not self.get():
-            self.insert(0, self.placeholder)
-            self['foreground'] = self.placeholder_color
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+# Las dependencias pesadas (y tkinter) se importan al primer uso: la ventana aparece antes
+# de cargar pandas y el modo por lotes no carga la interfaz gráfica ni COM
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
+tk = LazyModule('tkinter')
+ttk = LazyModule('tkinter.ttk')
+filedialog = LazyModule('tkinter.filedialog')
+messagebox = LazyModule('tkinter.messagebox')
+
+
+def Document(docx=None):
+    """Abre un documento con python-docx, que se importa con el primer documento"""
+    from docx import Document as open_document
+    return open_document(docx)
+
+
+def preload_modules():
+    """Importa las dependencias del procesamiento (la interfaz lo hace en segundo plano)"""
+    import numpy  # noqa: F401
+    import pandas  # noqa: F401
+    import docx  # noqa: F401
+
+
+_placeholder_entry_class = None
+
+
+def PlaceholderEntry(container, placeholder, *args, **kwargs):
+    """Crea un ttk.Entry con texto de ayuda; la clase se define al abrir la interfaz"""
+    global _placeholder_entry_class
+    if _placeholder_entry_class is None:
+        class _PlaceholderEntry(ttk.Entry):
+            def __init__(self, container, placeholder, *args, **kwargs):
+                super().__init__(container, *args, **kwargs)
+                self.placeholder = placeholder
+                self.placeholder_color = 'grey'
+                self.default_fg_color = self['foreground']
+                
+                self.bind("<FocusIn>", self._clear_placeholder)
+                self.bind("<FocusOut>", self._add_placeholder)
+                
+                self._add_placeholder()
+            
+            def _clear_placeholder(self, e):
+                if self.get() == self.placeholder:
+                    self.delete(0, tk.END)
+                    self['foreground'] = self.default_fg_color
+            
+            def _add_placeholder(self, e=None):
+                if not self.get():
+                    self.insert(0, self.placeholder)
+                    self['foreground'] = self.placeholder_color
+        
+        _placeholder_entry_class = _PlaceholderEntry
+    return _placeholder_entry_class(container, placeholder, *args, **kwargs)
 
 class NotadorGUI:
+    FRAME_MS = 50  # Intervalo de refresco del progreso (20 cuadros por segundo)
+    LOG_LINES = 500  # Líneas que conserva el registro de progreso
+    FILTER_DELAY_MS = 150  # Espera tras la última tecla antes de filtrar
+    STUDENT_ROWS_PER_FRAME = 300  # Filas que se agregan al árbol de estudiantes por cuadro
+    
     def __init__(self):
+        # tkinter y el tema se importan al abrir la interfaz, no al importar el módulo
+        import tkinter.filedialog  # noqa: F401
+        import tkinter.messagebox  # noqa: F401
+        from ttkthemes import ThemedTk
+        
         self.root = ThemedTk(theme="arc")
         self.root.title("Notador - Generador de Reportes")
         self.root.geometry("1000x700")
@@ -63,8 +140,18 @@ class NotadorGUI:
                  foreground=[('active', 'white')])
                  
         self.notador = Notador()
-        self.current_data = {}  # Almacena los datos del Excel actual
+        
+        # Procesamiento en segundo plano: el hilo encola eventos y la interfaz los aplica con after()
+        self.events = queue.Queue()
+        self.worker_thread = None
+        self.cancel_event = threading.Event()
+        self.pause_event = threading.Event()
+        
         self.setup_gui()
+        self.root.after(self.FRAME_MS, self._pump_events)
+        
+        # pandas y python-docx se cargan en segundo plano cuando la ventana ya está visible
+        self.root.after_idle(lambda: threading.Thread(target=preload_modules, daemon=True).start())
         
     def setup_gui(self):
         # Frame principal
@@ -125,7 +212,7 @@ class NotadorGUI:
         
         # Barra de búsqueda
         self.search_var = tk.StringVar()
-        self.search_var.trace('w', self.filter_students)
+        self.search_var.trace_add('write', self.filter_students)
         self.search_entry = PlaceholderEntry(students_frame, 
                                            placeholder="Buscar estudiante...",
                                            textvariable=self.search_var)
@@ -174,8 +261,18 @@ class NotadorGUI:
         self.students_tree.column('name', width=250)
         self.students_tree.column('group', width=80, anchor='center')
         
-        # Variable para controlar el estado de los checkboxes
+        # IDs de los estudiantes marcados (el ID es también el identificador de su fila en el
+        # árbol, así que las marcas se conservan al filtrar)
         self.checked_items = set()
+        self.student_entries = {}
+        self.search_index = None
+        self._created = set()  # Filas creadas en el árbol, visibles o separadas por el filtro
+        self._visible_ids = []  # Filas visibles, en orden (reflejo del árbol para evitar consultas)
+        self._attached = set()
+        self._pending_ids = []  # Filas que debe mostrar el árbol; se agregan por partes
+        self._render_position = 0
+        self._render_job = None
+        self._filter_job = None
         
         # Evento de click en el árbol
         def on_tree_click(event):
@@ -184,6 +281,8 @@ class NotadorGUI:
                 column = self.students_tree.identify_column(event.x)
                 if column == '#1':  # Columna del checkbox
                     item = self.students_tree.identify_row(event.y)
+                    if not item:
+                        return
                     if item in self.checked_items:
                         self.checked_items.remove(item)
                         self.students_tree.set(item, 'check', '☐')
@@ -205,6 +304,40 @@ class NotadorGUI:
         ttk.Button(button_frame, text="Procesar Todos", 
                   command=self.process_all).grid(row=0, column=1, padx=(2,0), sticky=(tk.W, tk.E))
         
+        # Procesos en paralelo y cancelación
+        workers_frame = ttk.Frame(button_frame)
+        workers_frame.grid(row=1, column=0, sticky=tk.W, pady=(5,0))
+        ttk.Label(workers_frame, text="Procesos:").pack(side=tk.LEFT)
+        self.workers_var = tk.IntVar(value=self.notador.workers)
+        self.workers_spinbox = ttk.Spinbox(workers_frame, from_=1, to=os.cpu_count() or 1, width=4,
+                                           textvariable=self.workers_var)
+        self.workers_spinbox.pack(side=tk.LEFT, padx=5)
+        self.force_var = tk.BooleanVar(value=False)
+        self.force_check = ttk.Checkbutton(workers_frame, text="Regenerar todos", variable=self.force_var)
+        self.force_check.pack(side=tk.LEFT, padx=5)
+        
+        # Un documento por grupo (una sola conversión a PDF) y separación opcional del PDF
+        group_frame = ttk.Frame(button_frame)
+        group_frame.grid(row=2, column=0, columnspan=2, sticky=tk.W, pady=(5,0))
+        self.group_var = tk.BooleanVar(value=False)
+        self.group_var.trace_add('write', self.toggle_group_mode)
+        ttk.Checkbutton(group_frame, text="Un archivo por grupo",
+                        variable=self.group_var).pack(side=tk.LEFT)
+        self.split_var = tk.BooleanVar(value=self.notador.split_group_pdf)
+        ttk.Checkbutton(group_frame, text="Separar PDF por estudiante",
+                        variable=self.split_var).pack(side=tk.LEFT, padx=5)
+        ttk.Button(group_frame, text="Reanudar lote",
+                   command=self.resume_batch).pack(side=tk.LEFT, padx=5)
+        
+        control_frame = ttk.Frame(button_frame)
+        control_frame.grid(row=1, column=1, padx=(2,0), pady=(5,0), sticky=(tk.W, tk.E))
+        control_frame.columnconfigure(0, weight=1)
+        control_frame.columnconfigure(1, weight=1)
+        self.pause_button = ttk.Button(control_frame, text="Pausar", command=self.toggle_pause)
+        self.pause_button.grid(row=0, column=0, padx=(0,2), sticky=(tk.W, tk.E))
+        ttk.Button(control_frame, text="Cancelar", 
+                  command=self.cancel_processing).grid(row=0, column=1, padx=(2,0), sticky=(tk.W, tk.E))
+        
         # Panel inferior - Progreso
         progress_frame = ttk.LabelFrame(main_frame, text="Progreso", padding="5", style='Progress.TLabelframe')
         progress_frame.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S), pady=5)
@@ -239,6 +372,8 @@ class NotadorGUI:
         
         self.progress_text = tk.Text(text_frame, height=5, width=70)
         self.progress_text.pack(fill=tk.BOTH, expand=True)
+        self.progress_text.tag_configure('warning', foreground='#B36B00')
+        self.progress_text.tag_configure('error', foreground='#C62828')
         
         # Configurar el scrollbar
         scrollbar.config(command=self.progress_text.yview)
@@ -268,28 +403,6 @@ class NotadorGUI:
             self.output_folder_var.set(folder)
             self.notador.set_output_folder(folder)
     
-    def normalize_column_names(self, df):
-        """Normaliza los nombres de las columnas para manejar variaciones"""
-        # Primero limpiar los nombres de las columnas
-        df.columns = [str(col).strip() for col in df.columns]
-        
-        column_mapping = {
-            'GRUPO': ['GRUPO', 'grupo', 'Group', 'group', 'GRUPO.1', 'Grupo.1'],
-            'PERIODO': ['PERIODO', 'periodo', 'PERÍODO', 'período', 'PERIODO.1'],
-            'estudiante': ['estudiante', 'ESTUDIANTE', 'Estudiante', 'NOMBRE', 'NOMBRES Y APELLIDOS']
-        }
-        
-        renamed_columns = {}
-        for standard_name, variations in column_mapping.items():
-            for variant in variations:
-                if variant in df.columns:
-                    renamed_columns[variant] = standard_name
-                    break
-        
-        if renamed_columns:
-            df = df.rename(columns=renamed_columns)
-        return df
-
     def load_data(self):
         try:
             excel_path = self.excel_path_var.get()
@@ -298,46 +411,20 @@ class NotadorGUI:
                 return
                 
             self.notador.set_excel_file(excel_path)
-            xlsx = pd.ExcelFile(excel_path)
+            workbook = self.notador.get_workbook()
             
             # Limpiar listas actuales
             self.grades_listbox.delete(0, tk.END)
-            self.students_tree.delete(*self.students_tree.get_children())
-            self.current_data = {}
+            self.clear_students()
             
-            # Cargar grados, excluyendo la pestaña consolidado
-            for grado in xlsx.sheet_names:
-                # Ignorar la pestaña consolidado
-                if grado.lower().strip() == 'consolidado':
-                    continue
-                    
-                # Leer el Excel manejando celdas combinadas
-                df = pd.read_excel(
-                    excel_path,
-                    sheet_name=grado,
-                    header=0,  # Primera fila como encabezados
-                    na_filter=False  # No convertir valores vacíos a NaN
-                )
-                # Normalizar nombres de columnas
-                df = self.normalize_column_names(df)
-                
-                # Verificar columnas requeridas
-                required_columns = ['estudiante']
-                missing_columns = [col for col in required_columns if col not in df.columns]
-                
-                if missing_columns:
-                    messagebox.showerror("Error", 
-                        f"Faltan columnas requeridas en la hoja {grado}: {', '.join(missing_columns)}\n"
-                        "El archivo debe tener al menos una columna para el estudiante.")
-                    return
-                
-                # Solo agregar grados válidos a la lista y al diccionario de datos
+            # Los grados se muestran de inmediato (la pestaña consolidado se excluye); cada hoja
+            # se lee al seleccionarla y las demás se precargan en segundo plano
+            grados = workbook.grade_names()
+            for grado in grados:
                 self.grades_listbox.insert(tk.END, grado)
-                self.current_data[grado] = df
-                
-            self.add_progress("Datos cargados exitosamente")
-                
-            self.add_progress("Datos cargados exitosamente")
+            
+            self.add_progress(f"Se encontraron {len(grados)} grados; cargando hojas en segundo plano")
+            self.notador.prefetch_sheets(callback=self.add_progress)
             
         except Exception as e:
             messagebox.showerror("Error", str(e))
@@ -348,53 +435,134 @@ class NotadorGUI:
             return
             
         grado = self.grades_listbox.get(selection[0])
+        if self.notador.get_workbook().is_loaded(grado):
+            self.show_grade(grado)
+            return
+        
+        # La hoja se lee en un hilo para no congelar la ventana
+        self.clear_students()
+        self.add_progress(f"⏳ Cargando la hoja {grado}...")
+        
+        def load():
+            try:
+                self.notador.get_student_index(grado, callback=self.add_progress)
+                self.events.put(('grade', grado, None))
+            except Exception as e:
+                self.events.put(('grade', grado, str(e)))
+        
+        threading.Thread(target=load, daemon=True).start()
+    
+    def selected_grade(self):
+        selection = self.grades_listbox.curselection()
+        return self.grades_listbox.get(selection[0]) if selection else None
+    
+    def show_grade(self, grado, error=None):
+        """Muestra los estudiantes de una hoja ya leída, si sigue siendo el grado seleccionado"""
+        if grado != self.selected_grade():
+            return
+        if error is not None:
+            messagebox.showerror("Error", error)
+            return
+        
+        # Verificar columnas requeridas
+        df = self.notador.get_sheet(grado)
+        if 'estudiante' not in df.columns:
+            messagebox.showerror("Error", 
+                f"Faltan columnas requeridas en la hoja {grado}: estudiante\n"
+                "El archivo debe tener al menos una columna para el estudiante.")
+            return
         self.load_students_for_grade(grado)
     
+    def clear_students(self):
+        """Vacía la lista de estudiantes, incluidas las filas ocultas por el filtro y las marcas"""
+        if self._render_job is not None:
+            self.root.after_cancel(self._render_job)
+            self._render_job = None
+        if self._created:
+            self.students_tree.delete(*self._created)
+        self._created = set()
+        self._visible_ids = []
+        self._attached = set()
+        self._pending_ids = []
+        self.checked_items.clear()
+        self.student_entries = {}
+        self.search_index = None
+    
     def load_students_for_grade(self, grado):
+        """Prepara el índice de búsqueda del grado y muestra sus estudiantes (filtrados si hay búsqueda)"""
         # Limpiar lista actual
-        self.students_tree.delete(*self.students_tree.get_children())
+        self.clear_students()
         
-        if grado not in self.current_data:
+        if not self.notador.excel_path:
             return
-            
-        df = self.current_data[grado]
-        
-        # Asegurarse de que la columna estudiante sea string
-        df['estudiante'] = df['estudiante'].astype(str)
         
-        for _, row in df.iterrows():
-            student_field = str(row['estudiante']).strip()
-            if student_field.lower() == 'nan' or student_field == '':
-                continue
-                
-            student_id, student_name, _, _ = self.notador.parse_student_info(student_field)
-            if student_id:
-                # Obtener el grupo del estudiante
-                grupo = str(row.get('GRUPO', '')).strip()
-                if pd.isna(grupo) or grupo.lower() == 'nan' or grupo == '':
-                    grupo = 'N/A'
-                    
-                item = self.students_tree.insert('', tk.END, values=(
-                    '☐',  # Checkbox vacío
-                    student_id,
-                    student_name,
-                    grupo
-                ))
+        self.student_entries = {entry.student_id: entry for entry in self.notador.get_student_index(grado)}
+        self.search_index = StudentSearchIndex(self.student_entries.values())
+        self.apply_filter()
+    
+    def search_term(self):
+        term = self.search_var.get()
+        return '' if term == self.search_entry.placeholder else term
     
     def filter_students(self, *args):
-        search_term = self.search_var.get().lower()
-        selection = self.grades_listbox.curselection()
-        if not selection:
+        """Se llama con cada tecla: el filtro se aplica cuando el usuario deja de escribir"""
+        if self._filter_job is not None:
+            self.root.after_cancel(self._filter_job)
+        self._filter_job = self.root.after(self.FILTER_DELAY_MS, self.apply_filter)
+    
+    def apply_filter(self):
+        """Muestra sólo los estudiantes que coinciden, sin reconstruir el árbol"""
+        self._filter_job = None
+        if self.search_index is None:
             return
-            
-        grado = self.grades_listbox.get(selection[0])
-        self.load_students_for_grade(grado)
+        matches = self.search_index.search(self.search_term())
         
-        if search_term:
-            for item in self.students_tree.get_children():
-                values = self.students_tree.item(item)['values']
-                if not any(search_term in str(value).lower() for value in values):
-                    self.students_tree.detach(item)
+        # Las filas que ya no coinciden se separan del árbol (no se borran)
+        wanted = set(matches)
+        stale = [student_id for student_id in self._visible_ids if student_id not in wanted]
+        if stale:
+            self.students_tree.detach(*stale)
+            self._attached.difference_update(stale)
+            self._visible_ids = [student_id for student_id in self._visible_ids if student_id in wanted]
+        
+        self._pending_ids = matches
+        self._render_position = 0
+        self._render_rows()
+    
+    def _render_rows(self):
+        """Ubica en el árbol las filas pendientes por partes, para que la ventana siga respondiendo"""
+        if self._render_job is not None:
+            self.root.after_cancel(self._render_job)
+            self._render_job = None
+        
+        tree = self.students_tree
+        visible = self._visible_ids
+        pending = self._pending_ids
+        end = min(self._render_position + self.STUDENT_ROWS_PER_FRAME, len(pending))
+        for position in range(self._render_position, end):
+            student_id = pending[position]
+            if position < len(visible) and visible[position] == student_id:
+                continue  # Ya está en su lugar
+            if student_id in self._attached:
+                visible.remove(student_id)
+                tree.move(student_id, '', position)
+            elif student_id in self._created:
+                tree.move(student_id, '', position)  # Fila separada por un filtro anterior
+            else:
+                entry = self.student_entries[student_id]
+                tree.insert('', position, iid=student_id, values=(
+                    '☒' if student_id in self.checked_items else '☐',
+                    entry.student_id,
+                    entry.nombre_completo,
+                    entry.grupo
+                ))
+                self._created.add(student_id)
+            visible.insert(position, student_id)
+            self._attached.add(student_id)
+        
+        self._render_position = end
+        if end < len(pending):
+            self._render_job = self.root.after(1, self._render_rows)
     
     def process_selected(self):
         # Usar items checked en lugar de selección
@@ -406,9 +574,9 @@ class NotadorGUI:
             messagebox.showerror("Error", "Por favor seleccione una carpeta de salida para los boletines")
             return
         
-        # Limpiar área de progreso
-        self.progress_text.delete(1.0, tk.END)
-        self.progress_var.set(0)
+        if self.is_processing():
+            messagebox.showinfo("Información", "Ya hay un procesamiento en curso")
+            return
             
         try:
             word_path = self.word_path_var.get()
@@ -417,9 +585,7 @@ class NotadorGUI:
                 return
                 
             self.notador.set_word_template(word_path)
-            
-            total = len(self.checked_items)
-            self.progress_var.set(0)
+            self.notador.set_output_folder(self.output_folder_var.get())
             
             selection = self.grades_listbox.curselection()
             if not selection:
@@ -427,72 +593,262 @@ class NotadorGUI:
                 return
                 
             grado = self.grades_listbox.get(selection[0])
-            df = self.current_data[grado]
+            index = self.notador.get_student_index(grado)
             
-            # Asegurarse de que la columna estudiante sea string
-            df['estudiante'] = df['estudiante'].astype(str)
+            # Los estudiantes marcados (visibles o no), en el orden de la hoja
+            jobs = [
+                (entry.student_id, grado, entry.grupo, entry.periodo)
+                for entry in index if entry.student_id in self.checked_items
+            ]
             
-            for i, item in enumerate(self.checked_items):
-                values = self.students_tree.item(item)['values']
-                student_id = str(values[1]).strip()  # ID está en la segunda columna (índice 1)
-                student_name = str(values[2]).strip()  # Nombre está en la tercera columna (índice 2)
-                grupo = str(values[3]).strip()  # Grupo está en la cuarta columna (índice 3)
-                
-                try:
-                    # Obtener el periodo del estudiante desde el DataFrame
-                    student_rows = df[df['estudiante'].apply(lambda x: student_id in str(x))]
-                    if not student_rows.empty:
-                        student_row = student_rows.iloc[0]
-                        periodo = str(student_row.get('PERIODO', '')).strip()
-                    else:
-                        periodo = ''
-                    
-                    self.add_progress(f"\n📝 Generando boletín para {student_name}")
-                    
-                    # Actualizar barra de progreso antes de procesar
-                    progress = (i / total) * 100
-                    self.progress_var.set(progress)
-                    self.progress_label.config(text=f"{int(progress)}%")
-                    self.root.update()
-                    
-                    # Procesar el boletín
-                    self.notador.process_student(student_id, grado, grupo, periodo, callback=self.add_progress)
-                    
-                    # Actualizar barra de progreso después de procesar
-                    progress = ((i + 1) / total) * 100
-                    self.progress_var.set(progress)
-                    self.progress_label.config(text=f"{int(progress)}%")
-                    self.root.update()
-                    
-                except Exception as e:
-                    self.add_progress(f"❌ Error con {student_name}: {str(e)}")
-                    continue
-                
-            messagebox.showinfo("Éxito", "Procesamiento completado")
+            self.start_batch(jobs, "Procesamiento completado", grados=[grado])
             
         except Exception as e:
             messagebox.showerror("Error", str(e))
             
-    def add_progress(self, message):
-        """Actualiza el área de progreso y la barra de progreso"""
-        # Extraer el porcentaje del mensaje si existe
-        import re
-        percentage_match = re.search(r'\((\d+)%\)', message)
-        if percentage_match:
-            percentage = int(percentage_match.group(1))
+    def confirm_validation(self, validation):
+        """Muestra los errores de la validación previa y pregunta si se continúa de todas formas"""
+        errors = validation.errors
+        if not errors:
+            return True
+        details = '\n'.join(f"• {validation.describe(issue)}" for issue in errors[:8])
+        if len(errors) > 8:
+            details += f"\n... y {len(errors) - 8} más"
+        return messagebox.askyesno(
+            "Problemas en los datos",
+            f"Se encontraron {len(errors)} problemas en los datos:\n\n{details}\n\n"
+            "¿Generar los boletines de todas formas?"
+        )
+    
+    def add_progress(self, event):
+        """Encola un evento de progreso (o un texto); se puede llamar desde cualquier hilo"""
+        if not isinstance(event, ProgressEvent):
+            event = ProgressEvent('gui', str(event), None, None, None, 'info')
+        self.events.put(('progress', event))
+    
+    def _pump_events(self):
+        """Aplica en la interfaz los eventos encolados, agrupados en una sola actualización por cuadro"""
+        lines = deque(maxlen=self.LOG_LINES)  # Si llegan más líneas que las visibles, sólo importan las últimas
+        fraction = None
+        finished = None
+        confirm = None
+        try:
+            while True:
+                event = self.events.get_nowait()
+                if event[0] == 'progress':
+                    progress = event[1]
+                    if progress.stage == 'batch' and progress.fraction is not None:
+                        fraction = progress.fraction
+                    lines.append((progress.message.strip(), progress.level))
+                elif event[0] == 'done':
+                    finished = event
+                elif event[0] == 'confirm':
+                    confirm = event
+                elif event[0] == 'grade':
+                    self.show_grade(event[1], event[2])
+        except queue.Empty:
+            pass
+        
+        if lines:
+            self._append_log(lines)
+        if fraction is not None:
+            percentage = int(fraction * 100)
             self.progress_var.set(percentage)
             self.progress_label.config(text=f"{percentage}%")
+        if confirm is not None:
+            # El hilo de fondo espera la respuesta antes de generar los boletines
+            confirm[2].put(self.confirm_validation(confirm[1]))
+        if finished is not None:
+            self._finish_batch(*finished[1:])
         
-        # Agregar mensaje al área de texto (sin el porcentaje)
-        clean_message = re.sub(r'\(\d+%\)', '', message).strip()
-        self.progress_text.insert(tk.END, clean_message + "\n")
+        self.root.after(self.FRAME_MS, self._pump_events)
+    
+    def _append_log(self, lines):
+        """Agrega líneas al registro conservando sólo las últimas LOG_LINES (búfer circular)"""
+        for message, level in lines:
+            self.progress_text.insert(tk.END, message + "\n", level)
+        line_count = int(self.progress_text.index('end-1c').split('.')[0]) - 1
+        if line_count > self.LOG_LINES:
+            self.progress_text.delete('1.0', f'{line_count - self.LOG_LINES + 1}.0')
         self.progress_text.see(tk.END)
+    
+    def is_processing(self):
+        return self.worker_thread is not None and self.worker_thread.is_alive()
+    
+    def start_batch(self, jobs, success_message, title=None, run=None, grados=None):
+        """
+        Inicia la generación de los boletines en un hilo de fondo. Si se indican grados, el
+        hilo valida antes esas hojas y, si hay errores, pregunta si se continúa.
+        """
+        # Limpiar área de progreso
+        self.progress_text.delete(1.0, tk.END)
+        self.progress_var.set(0)
+        self.progress_label.config(text="0%")
+        if title:
+            self.add_progress(title)
+        
+        self.cancel_event.clear()
+        self.pause_event.clear()
+        self.pause_button.config(text="Pausar")
+        workers = self.get_workers()
+        force = self.force_var.get()
+        self.notador.split_group_pdf = self.split_var.get()
+        if run is None:
+            run = self._run_groups if self.group_var.get() else self._run_batch
+        
+        self.worker_thread = threading.Thread(
+            target=self._run_validated, args=(run, grados, jobs, workers, success_message, force), daemon=True
+        )
+        self.worker_thread.start()
+    
+    def _run_validated(self, run, grados, jobs, workers, success_message, force=False):
+        """
+        Cuerpo del hilo de fondo: valida las hojas (lo que puede leer el libro completo) fuera
+        del hilo de Tk y, si hay errores, espera a que la interfaz pregunte si se continúa.
+        """
+        if grados:
+            try:
+                validation = self.notador.validate(grados)
+            except Exception as e:
+                self.events.put(('done', 'error', str(e)))
+                return
+            if validation.errors:
+                answer = queue.Queue(maxsize=1)
+                self.events.put(('confirm', validation, answer))
+                if not answer.get():
+                    self.events.put(('done', 'cancelled', "No se generó ningún boletín"))
+                    return
+        run(jobs, workers, success_message, force)
+    
+    def _run_batch(self, jobs, workers, success_message, force=False):
+        """Cuerpo del hilo de fondo: no toca la interfaz, sólo encola eventos"""
+        try:
+            results = self.notador.process_students(
+                jobs, workers,
+                callback=self.add_progress,
+                cancel_event=self.cancel_event,
+                pause_event=self.pause_event,
+                force=force
+            )
+            self._report_outcome(results, success_message)
+        except Exception as e:
+            self.events.put(('done', 'error', str(e)))
+    
+    def _run_resume(self, jobs, workers, success_message, force=False):
+        """Como _run_batch, pero continúa el lote del diario de la carpeta de salida"""
+        try:
+            results = self.notador.resume(workers, callback=self.add_progress,
+                                          cancel_event=self.cancel_event, pause_event=self.pause_event)
+            self._report_outcome(results, success_message)
+        except Exception as e:
+            self.events.put(('done', 'error', str(e)))
+    
+    def _report_outcome(self, results, success_message):
+        """Encola el mensaje final de un lote de boletines por estudiante"""
+        failed = [result for result in results if not result['ok']]
+        skipped = sum(1 for result in results if result.get('skipped'))
+        generated = len(results) - len(failed) - skipped
+        if self.cancel_event.is_set():
+            self.events.put(('done', 'cancelled', f"Se generaron {generated} boletines"))
+        elif failed:
+            self.events.put(('done', 'warning', f"{len(failed)} boletines no se pudieron generar"))
+        elif skipped:
+            self.events.put(('done', 'info', f"{success_message} ({generated} generados, "
+                                             f"{skipped} sin cambios)"))
+        else:
+            self.events.put(('done', 'info', success_message))
+    
+    def _run_groups(self, jobs, workers, success_message, force=False):
+        """Como _run_batch, pero con un documento por grupo"""
+        try:
+            results = self.notador.process_groups(jobs, callback=self.add_progress,
+                                                  cancel_event=self.cancel_event)
+            failed = [result for result in results if not result['ok']]
+            if self.cancel_event.is_set():
+                self.events.put(('done', 'cancelled', f"Se generaron {len(results) - len(failed)} documentos"))
+            elif failed:
+                self.events.put(('done', 'warning', f"{len(failed)} documentos de grupo no se pudieron generar"))
+            else:
+                self.events.put(('done', 'info', success_message))
+        except Exception as e:
+            self.events.put(('done', 'error', str(e)))
+    
+    def _finish_batch(self, level, message):
+        if level == 'info':
+            self._append_log([("✨ Procesamiento completado exitosamente", 'info')])
+            messagebox.showinfo("Éxito", message)
+        elif level == 'warning':
+            messagebox.showwarning("Advertencia", message)
+        elif level == 'cancelled':
+            messagebox.showinfo("Información", message)
+        else:
+            messagebox.showerror("Error", message)
+        
+    def cancel_processing(self):
+        """Solicita detener el procesamiento en curso después del boletín actual"""
+        if self.is_processing():
+            self.cancel_event.set()
+            self.pause_event.clear()
+            self.add_progress("⏹ Cancelando...")
+    
+    def toggle_pause(self):
+        """Pausa o reanuda el procesamiento en curso"""
+        if not self.is_processing():
+            return
+        if self.pause_event.is_set():
+            self.pause_event.clear()
+            self.pause_button.config(text="Pausar")
+            self.add_progress("▶ Procesamiento reanudado")
+        else:
+            self.pause_event.set()
+            self.pause_button.config(text="Reanudar")
+            self.add_progress("⏸ Procesamiento en pausa")
+    
+    def resume_batch(self):
+        """Continúa el lote interrumpido cuyo diario está en la carpeta de salida"""
+        if self.is_processing():
+            messagebox.showinfo("Información", "Ya hay un procesamiento en curso")
+            return
+        if not self.output_folder_var.get():
+            messagebox.showerror("Error", "Por favor seleccione la carpeta de salida del lote a reanudar")
+            return
         
-        # Forzar actualización de la interfaz
-        self.root.update()
+        self.notador.set_output_folder(self.output_folder_var.get())
+        config, jobs = BatchJournal(self.notador.output_folder / self.notador.journal_name).unfinished()
+        if config is None:
+            messagebox.showinfo("Información", "No hay un lote para reanudar en la carpeta de salida")
+            return
+        if not jobs:
+            messagebox.showinfo("Información", "El lote de esta carpeta ya está completo")
+            return
+        if not messagebox.askyesno("Reanudar lote", f"Quedan {len(jobs)} boletines sin terminar.\n\n"
+                                                    f"¿Desea continuar el lote?"):
+            return
         
+        self.excel_path_var.set(config['excel_path'] or '')
+        self.word_path_var.set(config['word_template'] or '')
+        self.start_batch(None, "Se completó el lote", title="🔁 Reanudando el lote interrumpido",
+                         run=self._run_resume)
+    
+    def get_workers(self):
+        """Número de procesos elegido en la interfaz"""
+        try:
+            return max(1, int(self.workers_var.get()))
+        except (tk.TclError, ValueError):
+            return 1
+
+    def toggle_group_mode(self, *args):
+        """Los documentos por grupo se generan en un solo proceso y siempre completos"""
+        state = ['disabled'] if self.group_var.get() else ['!disabled']
+        self.workers_spinbox.state(state)
+        self.force_check.state(state)
+
     def process_all(self):
         """Procesa todos los estudiantes del grado seleccionado"""
+        if self.is_processing():
+            messagebox.showinfo("Información", "Ya hay un procesamiento en curso")
+            return
+        
         try:
             # Verificar que tengamos todo lo necesario
             word_path = self.word_path_var.get()
@@ -510,7 +866,7 @@ class NotadorGUI:
                 return
                 
             grado = self.grades_listbox.get(selection[0])
-            if grado not in self.current_data:
+            if not self.notador.excel_path:
                 messagebox.showerror("Error", "Por favor cargue los datos primero")
                 return
             
@@ -518,56 +874,15 @@ class NotadorGUI:
             self.notador.set_word_template(word_path)
             self.notador.set_output_folder(self.output_folder_var.get())
             
-            # Limpiar área de progreso
-            self.progress_text.delete(1.0, tk.END)
-            self.progress_var.set(0)
-            self.progress_label.config(text="0%")
-            # Iniciar procesamiento
-            df = self.current_data[grado]
-            self.add_progress(f"🎯 Iniciando procesamiento del grado {grado}")
-            
-            # Filtrar filas válidas
-            df = df[df['estudiante'].apply(lambda x: str(x).strip().lower() != 'nan' and str(x).strip() != '')]
-            total = len(df)
-            
-            if total == 0:
+            index = self.notador.get_student_index(grado)
+            if len(index) == 0:
                 messagebox.showwarning("Advertencia", "No hay estudiantes para procesar en este grado")
                 return
             
-            for i, row in df.iterrows():
-                student_field = str(row['estudiante']).strip()
-                student_id, student_name, _, _ = self.notador.parse_student_info(student_field)
-                
-                if student_id:
-                    try:
-                        # Obtener periodo del estudiante
-                        periodo = str(row.get('PERIODO', '')).strip()
-                        if pd.isna(periodo) or periodo.lower() == 'nan':
-                            periodo = ''
-                            
-                        # Obtener grupo del estudiante
-                        grupo = str(row.get('GRUPO', '')).strip()
-                        if pd.isna(grupo) or grupo.lower() == 'nan':
-                            grupo = 'N/A'
-                        
-                        # Procesar estudiante y actualizar progreso
-                        self.add_progress(f"\n📝 Procesando boletín para {student_name}")
-                        self.progress_var.set((i / total) * 100)
-                        self.root.update_idletasks()
-                        
-                        self.notador.process_student(student_id, grado, grupo, periodo, callback=self.add_progress)
-                        
-                        # Actualizar progreso final para este estudiante
-                        self.progress_var.set(((i + 1) / total) * 100)
-                        self.root.update_idletasks()
-                        
-                    except Exception as e:
-                        self.add_progress(f"❌ Error con {student_name}: {str(e)}")
-                        continue
-            
-            # Mostrar mensaje de éxito
-            self.add_progress("\n✨ Procesamiento completado exitosamente")
-            messagebox.showinfo("Éxito", "Se han generado todos los boletines correctamente")
+            # Iniciar procesamiento
+            jobs = [(entry.student_id, grado, entry.grupo, entry.periodo) for entry in index]
+            self.start_batch(jobs, "Se han generado todos los boletines correctamente",
+                             title=f"🎯 Iniciando procesamiento del grado {grado}", grados=[grado])
             
         except Exception as e:
             messagebox.showerror("Error", str(e))
@@ -575,125 +890,2008 @@ class NotadorGUI:
     def run(self):
         self.root.mainloop()
 
-class Notador:
+StudentEntry = namedtuple(
+    'StudentEntry',
+    ['position', 'student_id', 'nombre_completo', 'apellidos', 'nombres', 'grupo', 'periodo']
+)
+
+
+# Columnas administrativas a excluir del cálculo de notas (incluyendo variantes comunes)
+ADMIN_COLUMNS = {
+    'estudiante', 'ESTUDIANTE', 
+    'GRUPO', 'grupo',
+    'PERIODO', 'periodo', 'PERÍODO',
+    'Promedio', 'PROMEDIO', 'promedio',
+    'Mención de honor', 'MENCION DE HONOR',
+    'OBSERVACIONES', 'observaciones',
+    'GRADO', 'grado',
+    'Areas deficitadas', 'AREAS DEFICITADAS', 'Áreas deficitadas',
+    'areas deficitadas', 'Areas perdidas', 'AREAS PERDIDAS'
+}
+
+
+def normalize_name(s):
+    """Normaliza un nombre de columna: sin espacios extremos, en minúsculas y sin tildes"""
+    if s is None:
+        return ''
+    s = str(s).strip().lower()
+    s = unicodedata.normalize('NFKD', s)
+    s = ''.join(ch for ch in s if not unicodedata.combining(ch))
+    return s
+
+
+NORMALIZED_ADMIN_COLUMNS = {normalize_name(c) for c in ADMIN_COLUMNS}
+
+# Nombre estándar de las columnas de identificación y sus variantes (sin tildes, en minúsculas),
+# en orden de preferencia
+COLUMN_ALIASES = {
+    'estudiante': ('estudiante', 'nombre', 'nombres y apellidos'),
+    'GRUPO': ('grupo', 'group'),
+    'PERIODO': ('periodo',),
+}
+
+# Notas por debajo de este valor cuentan como materia perdida
+PASSING_GRADE = 3.5
+
+# Escala de notas válida (la validación previa marca las que están fuera de ella)
+GRADE_RANGE = (1.0, 5.0)
+
+# Campo del estudiante: ID de 9 dígitos seguido del nombre
+STUDENT_PATTERN = r"(\d{9})\s*-\s*(.+)"
+
+# Segundos máximos por conversión a PDF y por boletín en los procesos trabajadores
+PDF_TIMEOUT = 120
+DOCUMENT_TIMEOUT = 300
+
+
+def parse_grade(value):
+    """Convierte una celda en nota (acepta coma decimal); devuelve None si no es una nota"""
+    try:
+        nota_str = str(value).strip().replace(',', '.')
+        if nota_str and nota_str.lower() != 'nan':
+            return float(nota_str)
+    except (ValueError, TypeError):
+        pass
+    return None
+
+
+class SheetSchema:
+    """
+    Clasificación de las columnas de una hoja, calculada una sola vez al leerla.
+    
+    Cada columna es identity (estudiante), group, period, admin (grado, promedio,
+    observaciones...), subject (notas de un área) o ignored: columnas sin encabezado, copias
+    de las columnas de identificación (p. ej. 'GRUPO.1') o de texto sin ninguna nota.
+    """
+    IDENTITY, GROUP, PERIOD, ADMIN, SUBJECT, IGNORED = 'identity', 'group', 'period', 'admin', 'subject', 'ignored'
+    STANDARD_ROLES = {'estudiante': IDENTITY, 'GRUPO': GROUP, 'PERIODO': PERIOD}
+    UNNAMED_PATTERN = re.compile(r'unnamed: \d+')
+    DUPLICATE_SUFFIX = re.compile(r'\.\d+$')
+    
+    def __init__(self, roles):
+        self.roles = dict(roles)  # Columna -> categoría, en el orden de la hoja
+        self.subjects = self.columns(self.SUBJECT)
+    
+    def columns(self, role):
+        return [column for column, column_role in self.roles.items() if column_role == role]
+    
+    def to_list(self):
+        return [[column, role] for column, role in self.roles.items()]
+    
+    @classmethod
+    def from_list(cls, items):
+        return cls((column, role) for column, role in items)
+    
+    @classmethod
+    def base_key(cls, column):
+        """Nombre normalizado sin el sufijo que pandas agrega a los encabezados repetidos"""
+        return normalize_name(cls.DUPLICATE_SUFFIX.sub('', str(column).strip()))
+    
+    @classmethod
+    def standard_names(cls, columns):
+        """Columnas que se renombran al nombre estándar de identificación (la primera variante hallada)"""
+        keys = [cls.base_key(column) for column in columns]
+        renamed = {}
+        for standard, aliases in COLUMN_ALIASES.items():
+            for alias in aliases:
+                if alias in keys:
+                    column = columns[keys.index(alias)]
+                    if column not in renamed:
+                        renamed[column] = standard
+                    break
+        return renamed
+    
+    @classmethod
+    def infer(cls, df):
+        """Clasifica las columnas de una hoja ya normalizada (valores como texto sin espacios)"""
+        aliases = {alias for variants in COLUMN_ALIASES.values() for alias in variants}
+        roles = {}
+        for column in df.columns:
+            key = cls.base_key(column)
+            if column in cls.STANDARD_ROLES:
+                role = cls.STANDARD_ROLES[column]
+            elif not key or cls.UNNAMED_PATTERN.fullmatch(key) or key in aliases:
+                role = cls.IGNORED
+            elif key in NORMALIZED_ADMIN_COLUMNS:
+                role = cls.ADMIN
+            else:
+                # Una columna con valores pero sin ninguna nota es de texto, no de un área
+                values = df[column].astype(str)
+                filled = (values != '') & (values.str.lower() != 'nan')
+                numbers = pd.to_numeric(values[filled].str.replace(',', '.', regex=False), errors='coerce')
+                role = cls.IGNORED if filled.any() and numbers.isna().all() else cls.SUBJECT
+            roles[column] = role
+        return cls(roles)
+
+
+def smallest_uint(codes):
+    """Códigos (enteros no negativos) en el entero sin signo más pequeño que los contiene"""
+    codes = np.asarray(codes)
+    return codes.astype(np.min_scalar_type(int(codes.max()) if len(codes) else 0))
+
+
+class StringTable:
+    """
+    Tabla única de textos sin repetir para todas las hojas de un libro: los textos en UTF-8
+    unidos en un solo bloque de bytes y la posición donde empieza cada uno. Las columnas
+    guardan sólo el código de cada texto, en el entero sin signo más pequeño que alcance.
+    """
     def __init__(self):
-        self.excel_path = None
-        self.word_template = None
-        self.output_folder = None
-        self.debug = False  # Deshabilitar mensajes de debug
+        self._data = b''
+        self._offsets = np.zeros(1, dtype=np.int32)  # Pasa a int64 si el bloque supera 2 GB
+        # Hash de 32 bits de cada texto, por código, para no repetir textos entre hojas. Si dos
+        # textos distintos chocan, el segundo se puede guardar dos veces: sólo ocupa más, cada
+        # código sigue dando su texto
+        self._hashes = np.empty(0, dtype=np.uint32)
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    @property
+    def nbytes(self):
+        return len(self._data) + self._offsets.nbytes + self._hashes.nbytes
+
+    def get(self, code):
+        code = int(code)
+        offsets = self._offsets
+        return self._data[int(offsets[code]):int(offsets[code + 1])].decode('utf-8')
+
+    def lookup(self, codes):
+        """Textos de un arreglo de códigos (cada texto distinto se decodifica una sola vez)"""
+        codes = np.asarray(codes)
+        uniques, inverse = np.unique(codes, return_inverse=True)
+        texts = np.empty(len(uniques), dtype=object)
+        texts[:] = [self.get(code) for code in uniques.tolist()]
+        return texts[inverse.reshape(-1)]
+
+    def intern(self, values):
+        """Agrega los textos que aún no estén en la tabla; devuelve el código de cada valor"""
+        local_codes, uniques = pd.factorize(np.asarray(values, dtype=object), use_na_sentinel=False)
+        uniques = np.asarray(uniques, dtype=object)
+        with self._lock:
+            codes = np.full(len(uniques), -1, dtype=np.int64)
+            hashes = pd.util.hash_array(uniques).astype(np.uint32)
+            if len(self._hashes) and len(uniques):
+                # El orden por hash se arma en cada llamada en vez de guardarlo: son pocas
+                # llamadas por hoja y así la tabla ocupa 4 bytes menos por texto
+                order = np.argsort(self._hashes, kind='stable')
+                sorted_hashes = self._hashes[order]
+                positions = np.minimum(np.searchsorted(sorted_hashes, hashes), len(order) - 1)
+                for i in np.flatnonzero(sorted_hashes[positions] == hashes).tolist():
+                    code = int(order[positions[i]])
+                    if self.get(code) == uniques[i]:
+                        codes[i] = code
+
+            new = np.flatnonzero(codes < 0)
+            if len(new):
+                encoded = [str(text).encode('utf-8') for text in uniques[new]]
+                lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+                codes[new] = np.arange(len(self), len(self) + len(new))
+                # Los textos ya emitidos no cambian de posición: quien lea mientras tanto ve el
+                # bloque anterior o el nuevo, y ambos tienen sus textos
+                ends = int(self._offsets[-1]) + np.cumsum(lengths)
+                dtype = np.int32 if ends[-1] < 2 ** 31 else np.int64
+                self._data = self._data + b''.join(encoded)
+                self._offsets = np.concatenate([self._offsets, ends]).astype(dtype)
+                self._hashes = np.concatenate([self._hashes, hashes[new]])
+        return codes.astype(np.int32)[local_codes]
+
+
+class GradeColumn:
+    """
+    Columna de notas: los valores distintos de la columna como float32 y, por celda, sólo el
+    número (uint8 si hay hasta 256 valores distintos) de su valor. El texto original se
+    reconstruye con el formato más común de la columna (coma o punto decimal, con o sin '.0');
+    las celdas que no coinciden con ese formato (p. ej. '4,50', 'A' o '4,5,0') guardan además
+    su texto en la tabla de textos.
+    """
+    STYLES = ((',', '-'), ('.', '-'), (',', '0'), ('.', '0'))  # (separador decimal, recorte de ceros)
+
+    def __init__(self, values, strings):
+        self.strings = strings
+        texts = np.asarray(values, dtype=object)
+        codes, uniques = pd.factorize(texts, use_na_sentinel=False)
+        parsed = [parse_grade(text) for text in uniques]
+        with np.errstate(over='ignore'):
+            unique_values = np.array([np.nan if nota is None else nota for nota in parsed], dtype=np.float32)
+        counts = np.bincount(codes, minlength=len(uniques))
+
+        # Cada valor distinto se formatea una vez por estilo y se elige el que más celdas reproduce
+        plain = {trim: [self.format(value, ('.', trim)) for value in unique_values] for trim in ('-', '0')}
+        matches = {}
+        for decimal, trim in self.STYLES:
+            formatted = plain[trim] if decimal == '.' else [text.replace('.', ',') for text in plain[trim]]
+            matches[decimal, trim] = np.array([a == b for a, b in zip(formatted, uniques)], dtype=bool)
+        self.style = max(self.STYLES, key=lambda style: counts[matches[style]].sum())
+
+        # Valores distintos por sus bits, para no confundir 0 y -0 ni perder los NaN
+        level_codes, levels = pd.factorize(unique_values.view(np.uint32), use_na_sentinel=False)
+        self.levels = np.asarray(levels, dtype=np.uint32).view(np.float32)
+        self.codes = smallest_uint(level_codes[codes])
+        rows = np.flatnonzero(~matches[self.style][codes])
+        self.override_rows = rows.astype(np.int32)
+        self.override_codes = strings.intern(texts[rows])
+        self._texts = {}  # Número del valor -> texto, para leer filas sueltas
+
+    @staticmethod
+    def format(value, style):
+        """Texto de una nota en el estilo dado ('' si está vacía)"""
+        if np.isnan(value):
+            return ''
+        decimal, trim = style
+        text = np.format_float_positional(np.float32(value), trim=trim)
+        return text.replace('.', ',') if decimal == ',' else text
+
+    @property
+    def nbytes(self):
+        return self.levels.nbytes + self.codes.nbytes + self.override_rows.nbytes + self.override_codes.nbytes
+
+    def _by_value(self, convert):
+        """Aplica convert a cada valor distinto de la columna"""
+        converted = np.empty(len(self.levels), dtype=object)
+        converted[:] = [convert(value) for value in self.levels]
+        return converted[self.codes]
+
+    def text(self):
+        texts = self._by_value(lambda value: self.format(value, self.style))
+        texts[self.override_rows] = self.strings.lookup(self.override_codes)
+        return texts
+
+    def at(self, position):
+        if len(self.override_rows):
+            i = self.override_rows.searchsorted(position)
+            if i < len(self.override_rows) and self.override_rows[i] == position:
+                return self.strings.get(self.override_codes[i])
+        code = int(self.codes[position])
+        text = self._texts.get(code)
+        if text is None:
+            text = self._texts[code] = self.format(self.levels[code], self.style)
+        return text
+
+    def grades(self):
+        """Notas como float64 (NaN si no es nota), idénticas a parse_grade del texto de cada celda"""
+        def parse(text):
+            nota = parse_grade(text)
+            return np.nan if nota is None else nota
+        grades = self._by_value(lambda value: parse(self.format(value, self.style))).astype(np.float64)
+        overrides = self.strings.lookup(self.override_codes) if len(self.override_codes) else []
+        grades[self.override_rows] = [parse(text) for text in overrides]
+        return grades
+
+
+class CategoryColumn:
+    """Columna con pocos valores distintos (grupo, periodo, grado...) como pd.Categorical"""
+    def __init__(self, values):
+        self.values = pd.Categorical(np.asarray(values, dtype=object))
+
+    @property
+    def nbytes(self):
+        return int(self.values.memory_usage(deep=True))
+
+    def text(self):
+        return np.asarray(self.values, dtype=object)
+
+    def at(self, position):
+        return self.values.categories[self.values.codes[position]]
+
+
+class InternedColumn:
+    """Columna de textos casi únicos (nombres, observaciones) como códigos de la tabla de textos"""
+    def __init__(self, values, strings):
+        self.strings = strings
+        self.codes = smallest_uint(strings.intern(values))
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes
+
+    def text(self):
+        return self.strings.lookup(self.codes)
+
+    def at(self, position):
+        return self.strings.get(self.codes[position])
+
+
+class CompactSheet:
+    """
+    Hoja ya normalizada guardada en forma compacta: notas por valor distinto, columnas con pocos
+    valores como categorías y los demás textos en la tabla de textos del libro.
+
+    Se usa como la hoja de texto de la que sale: hoja[columna] devuelve la serie de textos,
+    row(posición) la fila y to_frame() el DataFrame completo, con los mismos textos.
+    """
+    def __init__(self, df, schema, strings):
+        self.columns = list(df.columns)
+        self._positions = {}
+        for i, column in enumerate(self.columns):
+            self._positions.setdefault(column, i)
+        self._rows = len(df)
+
+        self._columns = []
+        for i, column in enumerate(self.columns):
+            values = df.iloc[:, i].to_numpy(dtype=object)
+            role = schema.roles.get(column)
+            if role == SheetSchema.SUBJECT:
+                self._columns.append(GradeColumn(values, strings))
+            elif role in (SheetSchema.GROUP, SheetSchema.PERIOD) or (
+                    role != SheetSchema.IDENTITY and len(pd.unique(values)) <= len(values) // 2):
+                self._columns.append(CategoryColumn(values))
+            else:
+                self._columns.append(InternedColumn(values, strings))
+
+    def __len__(self):
+        return self._rows
+
+    @property
+    def nbytes(self):
+        """Bytes de las columnas (sin la tabla de textos, que comparten todas las hojas)"""
+        return sum(column.nbytes for column in self._columns)
+
+    def __getitem__(self, column):
+        if column not in self._positions:
+            raise KeyError(column)
+        return pd.Series(self._columns[self._positions[column]].text(), name=column, dtype=object)
+
+    def row(self, position):
+        """Fila de un estudiante como serie de textos (columna -> valor)"""
+        return pd.Series([column.at(position) for column in self._columns], index=self.columns,
+                         dtype=object, name=position)
+
+    def grade_values(self, column):
+        """Notas de una columna de área como float64 (NaN donde no hay nota)"""
+        stored = self._columns[self._positions[column]]
+        if isinstance(stored, GradeColumn):
+            return stored.grades()
+        return np.array([np.nan if nota is None else nota for nota in map(parse_grade, stored.text())],
+                        dtype=np.float64)
+
+    def to_frame(self):
+        """La hoja como DataFrame de textos, igual a la leída del archivo"""
+        df = pd.DataFrame({i: column.text() for i, column in enumerate(self._columns)},
+                          index=pd.RangeIndex(self._rows))
+        df.columns = self.columns
+        return df
+
+
+class SheetStats:
+    """
+    Promedio y materias perdidas de todos los estudiantes de una hoja, calculados de una vez.
+    
+    Las columnas de materias se convierten en una matriz de notas interpretando cada valor
+    distinto una sola vez; los resultados coinciden exactamente con calculate_academic_stats
+    (las notas se suman columna por columna, en el mismo orden que el cálculo por fila).
+    """
+    def __init__(self, df, index, schema=None):
+        self.index = index
+        self.subject_columns = (schema or SheetSchema.infer(df)).subjects
         
-        # Mapeo de nombres de columnas del Excel
-        self.column_mapping = {
-            'GRUPO': ['GRUPO', 'grupo', 'Group', 'group', 'GRUPO.1', 'Grupo.1'],
-            'PERIODO': ['PERIODO', 'periodo', 'PERÍODO', 'período', 'PERIODO.1'],
-            'estudiante': ['estudiante', 'ESTUDIANTE', 'Estudiante', 'NOMBRE', 'NOMBRES Y APELLIDOS']
-        }
+        rows = len(df)
+        total = np.zeros(rows)
+        count = np.zeros(rows, dtype=np.int64)
+        perdidas = np.zeros(rows, dtype=np.int64)
         
-        # Mapeo de áreas entre Excel y Word
-        # El texto en el diccionario debe coincidir exactamente con el texto en el Word
-        self.areas_mapping = {
-            'Investigación': 'Introducción a la investigación Formativa',  # Nombre del área en el Word
-            'Ciencias Naturales': 'Ciencias Naturales y Educación Ambiental',
-            'Ciencias Sociales': 'Ciencias Sociales, Historia, Geografía, Constitución Política y Democracia',
-            'Educ, Artística': 'Educación Artística y Cultural',
-            'Edu, Ética': 'Educación Ética y en Valores Humanos',
-            'Edu, física': 'Educación Física, Recreación y Deportes',
-            'Edu, Religiosa': 'Educación Religiosa',
-            'Lengua Castellana': 'Humanidades, Lengua Castellana',
-            'Matemáticas': 'Matemáticas',
-            'Tecnología e informatica': 'Tecnología e Informática',
-            'Inglés': 'Humanidades, idioma extranjero (inglés)'
-        }
+        for column in self.subject_columns:
+            if isinstance(df, CompactSheet):
+                grades = df.grade_values(column)
+                valid = ~np.isnan(grades)
+                grades = np.where(valid, grades, 0.0)
+            else:
+                codes, uniques = pd.factorize(df[column], use_na_sentinel=False)
+                parsed = [parse_grade(value) for value in uniques]
+                unique_valid = np.array([nota is not None for nota in parsed], dtype=bool)
+                unique_grades = np.array([nota if nota is not None else 0.0 for nota in parsed], dtype=float)
+                
+                valid = unique_valid[codes]
+                grades = unique_grades[codes]
+            total += np.where(valid, grades, 0.0)
+            count += valid
+            perdidas += valid & (grades < PASSING_GRADE)
         
-        # Mapeo de campos de Word - usando los textos exactos del documento
-        self.word_fields_mapping = {
-            'periodo': ['PERÍODO'],  # Solo la versión exacta que está en el documento
-            'grado': ['GRADO'],
-            'grupo': ['GRUPO'],
-            'nombre_completo': ['NOMBRE Y APELLIDOS COMPLETOS DEL ESTUDIANTE:'],  # Con los dos puntos
-            'id': ['ID INSTITUCIONAL'],
-            'materias_perdidas': ['Número de áreas o asignaturas con nota no aprobatoria'],
-            'promedio': ['Promedio Académico']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            averages = total / count
+        self.promedios = [round(float(average), 2) if n else 0 for average, n in zip(averages, count)]
+        self.materias_perdidas = perdidas.tolist()
+    
+    def at(self, position):
+        """Devuelve (promedio, materias perdidas) de la fila en la posición dada"""
+        return self.promedios[position], self.materias_perdidas[position]
+    
+    def get(self, student_id):
+        """Devuelve (promedio, materias perdidas) del estudiante, o None si no existe"""
+        entry = self.index.get(student_id)
+        if entry is None:
+            return None
+        return self.at(entry.position)
+
+
+# Registro con niveles; los mensajes de depuración no cuestan nada si el nivel DEBUG está apagado
+logger = logging.getLogger('notador')
+
+# Etapas que se miden por boletín
+STAGES = ('excel_load', 'lookup', 'stats', 'template_copy', 'render', 'write', 'pdf')
+
+_stage_local = threading.local()
+
+
+@contextmanager
+def stage_timings():
+    """Activa la medición de etapas en el hilo actual y entrega el diccionario etapa -> segundos"""
+    timings = {}
+    previous = getattr(_stage_local, 'timings', None), getattr(_stage_local, 'stack', None)
+    _stage_local.timings, _stage_local.stack = timings, []
+    try:
+        yield timings
+    finally:
+        _stage_local.timings, _stage_local.stack = previous
+
+
+@contextmanager
+def timed_stage(name):
+    """Mide una etapa si hay una medición activa; el tiempo de etapas anidadas no se cuenta dos veces"""
+    timings = getattr(_stage_local, 'timings', None)
+    if timings is None:
+        yield
+        return
+    stack = _stage_local.stack
+    stack.append(0.0)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        children = stack.pop()
+        timings[name] = timings.get(name, 0.0) + elapsed - children
+        if stack:
+            stack[-1] += elapsed
+
+
+def peak_memory_bytes():
+    """Pico de memoria residente del proceso actual en bytes, o None si no se puede medir"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reporta KiB; macOS reporta bytes
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except ImportError:
+        pass
+    try:
+        import ctypes
+        from ctypes import wintypes
+        
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                        ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                        ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+        
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize
+    except (ImportError, AttributeError, OSError):
+        pass
+    return None
+
+
+ValidationIssue = namedtuple('ValidationIssue', ['level', 'sheet', 'kind', 'column', 'rows', 'message'])
+
+
+class ValidationReport:
+    """Problemas de los datos y de la plantilla encontrados antes de generar los boletines"""
+    MAX_ROWS = 10  # Filas que se muestran en cada mensaje
+    
+    def __init__(self):
+        self.issues = []
+        self.sheets = []
+        self.seconds = 0.0
+    
+    def add(self, level, sheet, kind, message, column=None, rows=()):
+        """Agrega un problema; rows son posiciones de la hoja (se guardan como filas de Excel)"""
+        rows = [int(position) + 2 for position in rows]  # Encabezado en la fila 1
+        if rows:
+            shown = ', '.join(map(str, rows[:self.MAX_ROWS]))
+            more = f" y {len(rows) - self.MAX_ROWS} más" if len(rows) > self.MAX_ROWS else ''
+            message = f"{message} (filas {shown}{more})"
+        self.issues.append(ValidationIssue(level, sheet, kind, column, rows, message))
+    
+    @property
+    def errors(self):
+        return [issue for issue in self.issues if issue.level == 'error']
+    
+    @property
+    def warnings(self):
+        return [issue for issue in self.issues if issue.level == 'warning']
+    
+    def describe(self, issue):
+        where = f"Hoja {issue.sheet}: " if issue.sheet is not None else ''
+        return f"{where}{issue.message}"
+    
+    def summary(self):
+        return {
+            'seconds': self.seconds,
+            'sheets': self.sheets,
+            'errors': len(self.errors),
+            'warnings': len(self.warnings),
+            'issues': [issue._asdict() for issue in self.issues],
         }
+    
+    def write(self, path):
+        """Escribe el reporte como JSON (reemplazo atómico del archivo)"""
+        return str(write_json_atomic(path, self.summary()))
+
+
+def _filled(values):
+    """Celdas con algún valor (las hojas ya están como texto sin espacios)"""
+    return (values != '') & (values.str.lower() != 'nan')
+
+
+def validate_sheet(validation, grado, df, schema, grade_range=GRADE_RANGE):
+    """
+    Revisa una hoja columna por columna: IDs mal escritos o repetidos, notas que no son
+    números, fuera de la escala o con problemas de coma decimal, notas faltantes y
+    estudiantes sin grupo. Devuelve la serie de IDs válidos (índice: posición en la hoja).
+    """
+    if 'estudiante' not in df.columns:
+        validation.add('error', grado, 'id', "No se encontró la columna de estudiantes")
+        return pd.Series([], dtype=object)
+    
+    students = df['estudiante'].astype(str)
+    filled = _filled(students)
+    ids = students.str.extract(f"^{STUDENT_PATTERN}")[0]
+    malformed = filled & ids.isna()
+    if malformed.any():
+        validation.add('error', grado, 'id', "Estudiantes sin ID de 9 dígitos seguido de ' - ' y el nombre; "
+                                             "no se generará su boletín", 'estudiante',
+                       np.flatnonzero(malformed.to_numpy()))
+    ids = ids[ids.notna()]
+    repeated = ids[ids.duplicated(keep=False)]
+    for student_id, positions in repeated.groupby(repeated, sort=False).groups.items():
+        validation.add('error', grado, 'duplicate', f"ID {student_id} repetido; se usará la primera fila",
+                       'estudiante', list(positions))
+    
+    rows = ids.index.to_numpy()  # Filas con estudiante
+    if 'GRUPO' not in df.columns:
+        validation.add('warning', grado, 'group', "La hoja no tiene columna de grupo")
+    else:
+        groups = df['GRUPO'].astype(str).to_numpy()[rows]
+        empty = (groups == '') | (np.char.lower(groups.astype(str)) == 'nan')
+        if empty.any():
+            validation.add('warning', grado, 'group', "Estudiantes sin grupo", 'GRUPO', rows[empty])
+    
+    low, high = grade_range
+    for column in schema.subjects:
+        values = df[column].astype(str).iloc[rows]
+        filled = _filled(values)
+        if not filled.any():
+            validation.add('warning', grado, 'missing', f"La columna '{column}' no tiene notas", column)
+            continue
+        if not filled.all():
+            validation.add('warning', grado, 'missing', f"Estudiantes sin nota en '{column}'", column,
+                           rows[~filled.to_numpy()])
         
-        # Mapeo para las notas de las áreas
-        self.word_area_grade_format = '[NOTA DEL PERIODO]'  # Se usará como sufijo para cada área
+        separators = values.str.count(r'[.,]')
+        numbers = pd.to_numeric(values.str.replace(',', '.', regex=False), errors='coerce')
+        repeated_separator = filled & (separators > 1)
+        if repeated_separator.any():
+            validation.add('error', grado, 'decimal', f"Notas con más de un separador decimal en '{column}'",
+                           column, rows[repeated_separator.to_numpy()])
+        not_numeric = filled & numbers.isna() & ~repeated_separator
+        if not_numeric.any():
+            validation.add('error', grado, 'number', f"Notas que no son números en '{column}'; no cuentan "
+                                                     f"en el promedio", column, rows[not_numeric.to_numpy()])
         
-    def normalize_column_names(self, df):
-        """Normaliza los nombres de las columnas para manejar variaciones"""
-        # Primero limpiar los nombres de las columnas
+        commas = values.str.contains(',', regex=False) & filled
+        dots = values.str.contains('.', regex=False) & filled
+        if commas.any() and dots.any():
+            minority = dots if dots.sum() < commas.sum() else commas
+            validation.add('warning', grado, 'decimal', f"'{column}' mezcla coma y punto decimal", column,
+                           rows[minority.to_numpy()])
+        
+        outside = numbers.notna() & ((numbers < low) | (numbers > high))
+        if outside.any():
+            # 45 en lugar de 4,5: el valor dividido entre 10 sí está en la escala
+            scaled = numbers / 10
+            missing_comma = outside & (separators == 0) & (scaled >= low) & (scaled <= high)
+            if missing_comma.any():
+                validation.add('error', grado, 'decimal', f"Notas sin coma decimal en '{column}' "
+                                                          f"(p. ej. 45 en lugar de 4,5)", column,
+                               rows[missing_comma.to_numpy()])
+            outside &= ~missing_comma
+            if outside.any():
+                validation.add('error', grado, 'range', f"Notas fuera de la escala {low:g} a {high:g} en "
+                                                        f"'{column}'", column, rows[outside.to_numpy()])
+    return ids
+
+
+class RunReport:
+    """Resumen de un lote: tiempos por etapa (p50, p95, máximo) y pico de memoria"""
+    def __init__(self):
+        self.started = time.time()
+        self.samples = {stage: [] for stage in STAGES}
+        self.total_seconds = []
+        self.successes = 0
+        self.skipped = 0
+        self.failures = []
+        self.peak_memory = {}  # PID -> pico de memoria en bytes
+    
+    def add(self, result):
+        """Agrega el resultado de un boletín (diccionario de process_students)"""
+        if result.get('skipped'):
+            self.skipped += 1
+            return
+        if result['ok']:
+            self.successes += 1
+        else:
+            self.failures.append({'student_id': result['student_id'], 'grado': result['grado'],
+                                  'error': result['error']})
+        self.total_seconds.append(result['seconds'])
+        for stage, seconds in result.get('timings', {}).items():
+            self.samples.setdefault(stage, []).append(seconds)
+        if result.get('pid') is not None and result.get('peak_memory') is not None:
+            self.peak_memory[result['pid']] = max(self.peak_memory.get(result['pid'], 0), result['peak_memory'])
+    
+    @staticmethod
+    def _distribution(values):
+        if not values:
+            return {'count': 0, 'total': 0.0, 'p50': None, 'p95': None, 'max': None}
+        array = np.asarray(values, dtype=float)
+        return {
+            'count': int(array.size),
+            'total': float(array.sum()),
+            'p50': float(np.percentile(array, 50)),
+            'p95': float(np.percentile(array, 95)),
+            'max': float(array.max()),
+        }
+    
+    def summary(self):
+        own_peak = peak_memory_bytes()
+        if own_peak is not None:
+            self.peak_memory[os.getpid()] = max(self.peak_memory.get(os.getpid(), 0), own_peak)
+        return {
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'wall_seconds': time.time() - self.started,
+            'students': self.successes + self.skipped + len(self.failures),
+            'successes': self.successes,
+            'skipped': self.skipped,
+            'failures': self.failures,
+            'per_student': self._distribution(self.total_seconds),
+            'stages': {stage: self._distribution(values) for stage, values in self.samples.items()},
+            'peak_memory_bytes': {
+                'max': max(self.peak_memory.values()) if self.peak_memory else None,
+                'per_process': {str(pid): peak for pid, peak in self.peak_memory.items()},
+            },
+        }
+    
+    def write(self, path):
+        """Escribe el resumen como JSON (reemplazo atómico del archivo)"""
+        return str(write_json_atomic(path, self.summary()))
+
+
+class OutputManifest:
+    """
+    Manifiesto de la carpeta de salida: por estudiante guarda el hash de su fila, el de la
+    plantilla y el de la configuración con que se generó su boletín, y los archivos generados.
+    Permite volver a generar sólo los boletines cuyas entradas cambiaron o cuyos archivos faltan.
+    """
+    VERSION = 1
+    
+    def __init__(self, path):
+        self.path = Path(path)
+        self.students = {}
+        self.changed = False
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == self.VERSION:
+                self.students = data.get('students', {})
+        except (OSError, ValueError):
+            pass  # Sin manifiesto (o dañado): se regenera todo
+    
+    @staticmethod
+    def key(student_id, grado):
+        return f"{grado}/{student_id}"
+    
+    def is_current(self, key, inputs, formats, pdf_available=True):
+        """
+        Si el boletín ya existe y se generó con exactamente las mismas entradas.
+        Con pdf_available=False (no hay con qué convertir) la falta del PDF no obliga a
+        regenerarlo, porque el boletín volvería a quedar sin PDF.
+        """
+        entry = self.students.get(key)
+        if entry is None or entry.get('inputs') != inputs:
+            return False
+        needs_pdf = 'pdf' in formats and (pdf_available or entry.get('pdf'))
+        outputs = [entry.get('word')] + ([entry.get('pdf')] if needs_pdf else [])
+        return all(output and os.path.exists(output) for output in outputs)
+    
+    def outputs(self, key):
+        entry = self.students[key]
+        return {'word': entry.get('word'), 'pdf': entry.get('pdf')}
+    
+    def update(self, key, inputs, outputs):
+        self.students[key] = dict(inputs=inputs, word=outputs.get('word'), pdf=outputs.get('pdf'))
+        self.changed = True
+    
+    def discard(self, key):
+        if self.students.pop(key, None) is not None:
+            self.changed = True
+    
+    def save(self):
+        """Escribe el manifiesto si cambió (reemplazo atómico del archivo)"""
+        if not self.changed:
+            return
+        write_json_atomic(self.path, {'version': self.VERSION, 'students': self.students}, indent=None)
+        self.changed = False
+
+
+class BatchJournal:
+    """
+    Diario de un lote en la carpeta de salida: una línea JSON por cada cambio de estado de
+    un boletín (queued, rendered, converted o failed con el motivo), precedida por una línea
+    con la configuración del lote.
+
+    El diario se crea, y se compacta al reanudar, escribiendo un archivo temporal que luego
+    reemplaza al anterior; durante el lote sólo se agregan líneas al final. Una línea a medio
+    escribir por un cierre inesperado se ignora al leerlo, así que el diario siempre se puede
+    leer hasta el último estado completo.
+    """
+    VERSION = 1
+    FINISHED = ('rendered', 'converted')
+    SYNC_EVERY = 32  # Líneas agregadas entre sincronizaciones con el disco
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = None
+        self._unsynced = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(job):
+        return f"{job[1]}/{job[0]}"
+
+    @staticmethod
+    def _line(record):
+        return json.dumps(record, ensure_ascii=False) + '\n'
+
+    def _rewrite(self, records):
+        """Reemplaza el diario completo (archivo temporal y reemplazo atómico)"""
+        self.close()
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.writelines(self._line(record) for record in records)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def start(self, config, jobs):
+        """Crea un diario nuevo con la configuración del lote y todos sus trabajos en cola"""
+        header = {'version': self.VERSION, 'started': time.strftime('%Y-%m-%dT%H:%M:%S'), 'config': config}
+        now = round(time.time(), 3)
+        self._rewrite([header] + [{'key': self.key(job), 'job': list(job), 'state': 'queued', 't': now}
+                                  for job in jobs])
+
+    def read(self):
+        """
+        Lee el diario.
+
+        Returns:
+            tuple: (línea de configuración o None si no hay diario válido,
+                    {clave: último registro} en el orden en que se encolaron los trabajos)
+        """
+        header, last = None, {}
+        try:
+            f = open(self.path, encoding='utf-8')
+        except OSError:
+            return None, {}
+        with f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Línea incompleta por un cierre inesperado
+                if header is None:
+                    if not isinstance(record, dict) or record.get('version') != self.VERSION:
+                        return None, {}
+                    header = record
+                elif isinstance(record, dict) and 'key' in record and 'state' in record:
+                    last[record['key']] = record
+        return header, last
+
+    def unfinished(self):
+        """(configuración del lote o None, trabajos sin terminar en el orden original)"""
+        header, last = self.read()
+        if header is None:
+            return None, []
+        jobs = [tuple(record['job']) for record in last.values() if record['state'] not in self.FINISHED]
+        return header['config'], jobs
+
+    def compact(self):
+        """Reescribe el diario dejando sólo el último estado de cada trabajo"""
+        header, last = self.read()
+        if header is not None:
+            self._rewrite([header] + list(last.values()))
+
+    def record(self, job, state, **info):
+        """Agrega el nuevo estado de un trabajo al final del diario"""
+        line = self._line(dict(key=self.key(job), job=list(job), state=state, t=round(time.time(), 3), **info))
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(line)
+            self._file.flush()
+            self._unsynced += 1
+            if self._unsynced >= self.SYNC_EVERY:
+                os.fsync(self._file.fileno())
+                self._unsynced = 0
+
+    def record_result(self, job, result, attempt):
+        """Registra el resultado de un intento (diccionario de process_students)"""
+        if not result['ok']:
+            self.record(job, 'failed', error=result['error'], attempt=attempt)
+            return
+        outputs = result['result'] or {}
+        self.record(job, 'rendered', word=outputs.get('word'), attempt=attempt)
+        if outputs.get('pdf'):
+            self.record(job, 'converted', pdf=outputs['pdf'])
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+                self._unsynced = 0
+
+
+class ProgressEvent(namedtuple('ProgressEvent', ['stage', 'message', 'student', 'fraction', 'elapsed', 'level'])):
+    """
+    Evento de progreso que reciben los callbacks.
+    
+    stage: etapa ('load', 'lookup', 'stats', 'render', 'pdf', 'done', 'batch', 'error'...)
+    student: ID del estudiante o None; fraction: avance entre 0 y 1 (del estudiante, o del
+    lote si stage == 'batch') o None; elapsed: segundos transcurridos o None;
+    level: 'info', 'warning' o 'error'.
+    """
+    __slots__ = ()
+    
+    def __str__(self):
+        return self.message
+
+
+def report(callback, stage, message, student=None, fraction=None, elapsed=None, level='info'):
+    """Envía un ProgressEvent al callback, si hay uno"""
+    if callback:
+        callback(ProgressEvent(stage, message, student, fraction, elapsed, level))
+
+
+class StudentIndex:
+    """Índice de una hoja: ID del estudiante -> posición de la fila, grupo y periodo"""
+    def __init__(self, df, parser):
+        self.entries = {}
+        self.duplicates = {}  # ID -> posiciones de todas las filas con ese ID
+        
+        if 'estudiante' not in df.columns:
+            return
+        
+        grupos = df['GRUPO'] if 'GRUPO' in df.columns else None
+        periodos = df['PERIODO'] if 'PERIODO' in df.columns else None
+        
+        for position, student_field in enumerate(df['estudiante']):
+            student_field = str(student_field).strip()
+            if student_field.lower() == 'nan' or student_field == '':
+                continue
+            
+            student_id, nombre_completo, apellidos, nombres = parser(student_field)
+            if not student_id:
+                continue
+            
+            if student_id in self.entries:
+                # Se conserva la primera fila; las repetidas sólo se reportan
+                self.duplicates.setdefault(student_id, [self.entries[student_id].position]).append(position)
+                continue
+            
+            grupo = str(grupos.iat[position]).strip() if grupos is not None else ''
+            if grupo.lower() == 'nan' or grupo == '':
+                grupo = 'N/A'
+            periodo = str(periodos.iat[position]).strip() if periodos is not None else ''
+            if periodo.lower() == 'nan':
+                periodo = ''
+            
+            self.entries[student_id] = StudentEntry(
+                position, student_id, nombre_completo, apellidos, nombres, grupo, periodo
+            )
+    
+    def get(self, student_id):
+        """Busca un estudiante por su ID exacto; devuelve None si no existe"""
+        student_id = str(student_id).strip()
+        entry = self.entries.get(student_id)
+        if entry is None and student_id.isdigit():
+            # Los IDs leídos del Treeview pueden perder los ceros a la izquierda
+            entry = self.entries.get(student_id.zfill(9))
+        return entry
+    
+    def __iter__(self):
+        return iter(self.entries.values())
+    
+    def __len__(self):
+        return len(self.entries)
+
+
+def read_sheet_names(excel_path):
+    """
+    Lee los nombres de las hojas sin abrir el libro completo: en un .xlsx basta con
+    xl/workbook.xml. Para otros formatos se usa pandas.
+    """
+    from xml.etree import ElementTree
+    
+    try:
+        with zipfile.ZipFile(excel_path) as archive:
+            root = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+        return [sheet.get('name') for sheet in root.iter() if sheet.tag.rsplit('}', 1)[-1] == 'sheet']
+    except (zipfile.BadZipFile, KeyError, ElementTree.ParseError):
+        with pd.ExcelFile(excel_path) as xlsx:
+            return list(xlsx.sheet_names)
+
+
+def default_cache_dir():
+    """
+    Carpeta de la caché de hojas: NOTADOR_CACHE_DIR o la caché del usuario del sistema.
+    Devuelve None (sin caché en disco) si NOTADOR_CACHE_DIR está definida pero vacía.
+    """
+    if 'NOTADOR_CACHE_DIR' in os.environ:
+        return Path(os.environ['NOTADOR_CACHE_DIR']) if os.environ['NOTADOR_CACHE_DIR'] else None
+    base = os.environ.get('LOCALAPPDATA') or os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(base) / 'Notador' / 'hojas'
+
+
+class SheetDiskCache:
+    """
+    Caché en disco, entre sesiones, de las hojas ya normalizadas de cada libro de Excel.
+    
+    Cada libro (identificado por el hash de su contenido) tiene una carpeta con un archivo .npz
+    por hoja: por cada columna, todos sus valores en UTF-8 unidos por un separador, sin pickle.
+    Al superar max_bytes se borran los libros usados hace más tiempo.
+    """
+    VERSION = 2  # Cambia si cambia el formato, la normalización o la clasificación de las columnas
+    SEPARATOR = '\x1f'
+    
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._keys = {}  # (ruta, mtime, tamaño) -> clave del libro
+    
+    def workbook_key(self, excel_path):
+        """Clave del libro según el hash de su contenido, recalculado sólo si el archivo cambió"""
+        stat = os.stat(excel_path)
+        file_key = (str(Path(excel_path).resolve()), stat.st_mtime_ns, stat.st_size)
+        if file_key not in self._keys:
+            digest = file_hash(excel_path)
+            self._keys[file_key] = hashlib.sha1(f"{self.VERSION}:{digest}".encode('ascii')).hexdigest()
+        return self._keys[file_key]
+    
+    def _sheet_path(self, key, sheet):
+        name = hashlib.sha1(str(sheet).encode('utf-8')).hexdigest()[:16]
+        return self.directory / key / f"{name}.npz"
+    
+    def load(self, key, sheet):
+        """Devuelve (hoja, esquema) guardados o None si no están (o no se pueden leer)"""
+        path = self._sheet_path(key, sheet)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if str(data['sheet']) != str(sheet):
+                    return None
+                columns = json.loads(str(data['columns']))
+                schema = SheetSchema.from_list(json.loads(str(data['schema'])))
+                rows = int(data['rows'])
+                values = {
+                    i: data[f"c{i}"].tobytes().decode('utf-8').split(self.SEPARATOR) if rows else []
+                    for i in range(len(columns))
+                }
+        except (OSError, KeyError, ValueError):
+            return None
+        
+        df = pd.DataFrame(values, index=pd.RangeIndex(rows)).astype(str)
+        df.columns = columns
+        try:
+            os.utime(path.parent)  # Marca el libro como usado recientemente
+        except OSError:
+            pass
+        return df, schema
+    
+    def store(self, key, sheet, df, schema):
+        """Guarda la hoja y su esquema (escritura atómica) y aplica el límite de tamaño"""
+        try:
+            arrays = {
+                'sheet': np.array(str(sheet)),
+                'columns': np.array(json.dumps(list(df.columns), ensure_ascii=False)),
+                'schema': np.array(json.dumps(schema.to_list(), ensure_ascii=False)),
+                'rows': np.array(len(df)),
+            }
+        except TypeError:
+            return  # Encabezados que no se pueden guardar como JSON (p. ej. fechas)
+        for i in range(df.shape[1]):
+            values = df.iloc[:, i].tolist()
+            text = self.SEPARATOR.join(values)
+            if len(values) and text.count(self.SEPARATOR) != len(values) - 1:
+                return  # Algún valor contiene el separador: la hoja no se guarda
+            arrays[f"c{i}"] = np.frombuffer(text.encode('utf-8'), dtype=np.uint8)
+        
+        path = self._sheet_path(key, sheet)
+        tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.{threading.get_ident()}.tmp.npz")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.debug("No se pudo guardar la hoja %s en la caché: %s", sheet, e)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        self.evict()
+    
+    def evict(self):
+        """Borra los libros usados hace más tiempo hasta quedar por debajo de max_bytes"""
+        try:
+            entries = []
+            for folder in self.directory.iterdir():
+                if folder.is_dir():
+                    size = sum(f.stat().st_size for f in folder.iterdir() if f.is_file())
+                    entries.append((folder.stat().st_mtime, size, folder))
+        except OSError:
+            return
+        total = sum(size for _, size, _ in entries)
+        for _, size, folder in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(folder, ignore_errors=True)
+            total -= size
+    
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class StudentSearchIndex:
+    """Búsqueda de estudiantes por ID, nombre o grupo sin distinguir tildes ni mayúsculas"""
+    def __init__(self, entries):
+        entries = list(entries)
+        self.ids = [entry.student_id for entry in entries]
+        self._texts = [
+            normalize_name(f"{entry.student_id} {entry.nombre_completo} {entry.grupo}") for entry in entries
+        ]
+        self._last = ('', list(range(len(entries))))  # Último término y sus posiciones
+    
+    def search(self, term):
+        """IDs, en el orden de la hoja, cuyos datos contienen todas las palabras del término"""
+        tokens = normalize_name(term).split()
+        key = ' '.join(tokens)
+        last_key, last_positions = self._last
+        if key == last_key:
+            return [self.ids[position] for position in last_positions]
+        
+        # Si el término sólo se alargó basta con buscar entre los resultados anteriores
+        candidates = last_positions if key.startswith(last_key) else range(len(self.ids))
+        texts = self._texts
+        positions = [position for position in candidates if all(token in texts[position] for token in tokens)]
+        self._last = (key, positions)
+        return [self.ids[position] for position in positions]
+
+
+class WorkbookSnapshot:
+    """
+    Hojas de un archivo Excel para una versión concreta del archivo. Los nombres de las hojas
+    se leen al crearla; cada hoja se lee la primera vez que se necesita o al precargarlas.
+    """
+    def __init__(self, excel_path, key, parser, sheet_names=None, sheets=None, disk_cache=None, schemas=None):
+        self.excel_path = excel_path
+        self.key = key  # (ruta, mtime, tamaño) del archivo al momento de abrirlo
+        self._parser = parser
+        self._disk_cache = disk_cache
+        self._disk_key = None  # Hash del contenido, calculado al leer la primera hoja
+        self.strings = StringTable()  # Textos de todas las hojas del libro
+        self._schemas = dict(schemas or {})
+        self._sheets = {}
+        for grado, df in (sheets or {}).items():
+            if not isinstance(df, CompactSheet):
+                # Hojas recibidas como DataFrame de textos
+                if grado not in self._schemas:
+                    self._schemas[grado] = SheetSchema.infer(df)
+                df = CompactSheet(df, self._schemas[grado], self.strings)
+            self._sheets[grado] = df
+        self._loading = {}  # Hoja -> threading.Event mientras algún hilo la está leyendo
+        self._indexes = {}
+        self._stats = {}
+        self._row_hashes = {}
+        self._lock = threading.Lock()
+        
+        if sheet_names is None:
+            sheet_names = read_sheet_names(excel_path)
+        self.sheet_names = list(sheet_names)
+    
+    def loaded_sheets(self):
+        """Hojas ya leídas, para compartirlas con otros procesos sin volver a leer el archivo"""
+        with self._lock:
+            return dict(self._sheets)
+    
+    def loaded_schemas(self):
+        with self._lock:
+            return dict(self._schemas)
+    
+    def is_loaded(self, grado):
+        with self._lock:
+            return str(grado) in self._sheets
+    
+    def grade_names(self):
+        """Devuelve los nombres de las hojas de grado, excluyendo la pestaña consolidado"""
+        return [name for name in self.sheet_names if name.lower().strip() != 'consolidado']
+    
+    @staticmethod
+    def _prepare(df):
+        """
+        Normaliza los encabezados (nombres estándar de las columnas de identificación), convierte
+        todos los valores a texto sin espacios y clasifica las columnas. Devuelve (hoja, esquema).
+        """
         df.columns = [str(col).strip() for col in df.columns]
+        renamed = SheetSchema.standard_names(list(df.columns))
+        if renamed:
+            df = df.rename(columns=renamed)
+        for col in df.columns:
+            df[col] = df[col].astype(str).str.strip()
+        return df, SheetSchema.infer(df)
+    
+    def _disk_cache_key(self):
+        if self._disk_key is None:
+            try:
+                self._disk_key = self._disk_cache.workbook_key(self.excel_path)
+            except OSError:
+                return None
+        return self._disk_key
+    
+    def _read(self, grado, open_xlsx=None):
+        """Lee y normaliza la hoja: de la caché en disco si está, si no del archivo Excel"""
+        disk_key = self._disk_cache_key() if self._disk_cache is not None else None
+        if disk_key is not None:
+            cached = self._disk_cache.load(disk_key, grado)
+            if cached is not None:
+                return cached
+        
+        if open_xlsx is not None:
+            df = open_xlsx().parse(grado, header=0, na_filter=False)
+        else:
+            df = pd.read_excel(
+                self.excel_path,
+                sheet_name=grado,
+                header=0,
+                na_filter=False  # No convertir valores vacíos a NaN
+            )
+        df, schema = self._prepare(df)
+        if disk_key is not None:
+            self._disk_cache.store(disk_key, grado, df, schema)
+        return df, schema
+    
+    def _compact(self, grado, open_xlsx=None):
+        """Lee la hoja y la deja en forma compacta; el DataFrame de textos se descarta"""
+        df, schema = self._read(grado, open_xlsx)
+        return CompactSheet(df, schema, self.strings), schema
+    
+    @contextmanager
+    def _excel_file(self):
+        """Función que abre el archivo Excel una sola vez y sólo si alguna hoja no está en caché"""
+        opened = []
         
-        renamed_columns = {}
-        for standard_name, variations in self.column_mapping.items():
-            for variant in variations:
-                if variant in df.columns:
-                    renamed_columns[variant] = standard_name
+        def open_xlsx():
+            if not opened:
+                opened.append(pd.ExcelFile(self.excel_path))
+            return opened[0]
+        try:
+            yield open_xlsx
+        finally:
+            for xlsx in opened:
+                xlsx.close()
+    
+    def _load(self, grado, open_xlsx=None):
+        """Lee la hoja una sola vez; si otro hilo ya la está leyendo, espera su resultado"""
+        while True:
+            with self._lock:
+                if grado in self._sheets:
+                    return self._sheets[grado]
+                if grado not in self.sheet_names:
+                    raise ValueError(f"La hoja {grado} no existe en el archivo Excel")
+                loading = self._loading.get(grado)
+                if loading is None:
+                    loading = self._loading[grado] = threading.Event()
                     break
+            # Si el otro hilo falla, el ciclo vuelve a intentarlo en este
+            loading.wait()
         
-        if renamed_columns:
-            df = df.rename(columns=renamed_columns)
-        return df
+        try:
+            df, schema = self._compact(grado, open_xlsx)
+            with self._lock:
+                self._sheets[grado] = df
+                self._schemas[grado] = schema
+            return df
+        finally:
+            with self._lock:
+                del self._loading[grado]
+            loading.set()
+    
+    def get_sheet(self, grado):
+        """Devuelve la hoja del grado (CompactSheet), leyéndola del archivo sólo la primera vez"""
+        return self._load(str(grado))
+    
+    def load_all(self):
+        """Lee de una vez (abriendo el archivo una sola vez) las hojas de grado que falten"""
+        pending = [name for name in self.grade_names() if not self.is_loaded(name)]
+        if pending:
+            with self._excel_file() as open_xlsx:
+                for grado in pending:
+                    self._load(grado, open_xlsx)
+        return {name: self.get_sheet(name) for name in self.grade_names()}
+    
+    def prefetch(self, on_loaded=None, on_error=None):
+        """
+        Lee en un hilo de fondo las hojas de grado que aún no estén cargadas.
         
-    def set_excel_file(self, excel_path):
-        """Establece el archivo Excel a usar"""
-        if not Path(excel_path).exists():
-            raise FileNotFoundError(f"El archivo Excel {excel_path} no existe")
-        self.excel_path = excel_path
+        Args:
+            on_loaded (callable, optional): Se llama con el nombre de cada hoja al leerla
+            on_error (callable, optional): Se llama con (hoja, excepción) si una hoja falla
+        """
+        def run():
+            pending = [name for name in self.grade_names() if not self.is_loaded(name)]
+            with self._excel_file() as open_xlsx:
+                for grado in pending:
+                    try:
+                        self._load(grado, open_xlsx)
+                        if on_loaded:
+                            on_loaded(grado)
+                    except Exception as e:
+                        if on_error:
+                            on_error(grado, e)
         
-    def set_word_template(self, word_path):
-        """Establece la plantilla Word a usar"""
-        if not Path(word_path).exists():
-            raise FileNotFoundError(f"La plantilla Word {word_path} no existe")
-        self.word_template = word_path
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+    
+    def get_schema(self, grado):
+        """Devuelve la clasificación de las columnas de la hoja (calculada al leerla)"""
+        grado = str(grado)
+        df = self.get_sheet(grado)
+        with self._lock:
+            if grado not in self._schemas:
+                # Hojas recibidas ya leídas sin su esquema
+                self._schemas[grado] = SheetSchema.infer(df)
+            return self._schemas[grado]
+    
+    def get_index(self, grado):
+        """Devuelve el índice de estudiantes de la hoja y si se acaba de construir"""
+        grado = str(grado)
+        df = self.get_sheet(grado)
+        with self._lock:
+            if grado in self._indexes:
+                return self._indexes[grado], False
+            index = StudentIndex(df, self._parser)
+            self._indexes[grado] = index
+            return index, True
+    
+    def get_stats(self, grado):
+        """Devuelve las estadísticas académicas de toda la hoja, calculadas una sola vez"""
+        grado = str(grado)
+        df = self.get_sheet(grado)
+        index, _ = self.get_index(grado)
+        schema = self.get_schema(grado)
+        with self._lock:
+            if grado not in self._stats:
+                self._stats[grado] = SheetStats(df, index, schema)
+            return self._stats[grado]
+    
+    def get_row_hashes(self, grado):
+        """Hash del contenido de cada fila de la hoja (incluye los nombres de las columnas)"""
+        grado = str(grado)
+        df = self.get_sheet(grado)
+        with self._lock:
+            if grado not in self._row_hashes:
+                columns = hashlib.sha1('\x1f'.join(map(str, df.columns)).encode('utf-8')).hexdigest()[:16]
+                values = pd.util.hash_pandas_object(df.to_frame(), index=False).to_numpy()
+                self._row_hashes[grado] = [f"{columns}{value:016x}" for value in values.tolist()]
+            return self._row_hashes[grado]
+    
+    def memory_report(self, compare=True):
+        """
+        Memoria de las hojas ya leídas en forma compacta (la tabla de textos se cuenta una vez)
+        y, con compare, la que ocuparían como DataFrame de textos según pandas.
+        """
+        sheets = self.loaded_sheets()
+        report = {'sheets': {}, 'strings_bytes': self.strings.nbytes}
+        for grado, sheet in sheets.items():
+            report['sheets'][grado] = {'rows': len(sheet), 'columns': len(sheet.columns),
+                                       'compact_bytes': sheet.nbytes}
+            if compare:
+                text = sheet.to_frame().memory_usage(deep=True, index=False).sum()
+                report['sheets'][grado]['text_bytes'] = int(text)
+        report['compact_bytes'] = report['strings_bytes'] + sum(
+            sheet['compact_bytes'] for sheet in report['sheets'].values())
+        if compare:
+            report['text_bytes'] = sum(sheet['text_bytes'] for sheet in report['sheets'].values())
+            report['ratio'] = report['text_bytes'] / report['compact_bytes'] if report['compact_bytes'] else None
+        return report
+
+
+class WorkbookCache:
+    """Caché de instantáneas de libros Excel, indexada por ruta, fecha de modificación y tamaño"""
+    def __init__(self, parser, disk_cache=None):
+        self._parser = parser
+        self.disk_cache = disk_cache  # SheetDiskCache opcional, compartida entre sesiones
+        self._snapshots = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _key(excel_path):
+        path = str(Path(excel_path).resolve())
+        stat = os.stat(path)
+        return (path, stat.st_mtime_ns, stat.st_size)
+    
+    def get(self, excel_path):
+        """Devuelve la instantánea vigente del archivo, creándola si el archivo cambió"""
+        key = self._key(excel_path)
+        with self._lock:
+            snapshot = self._snapshots.get(key[0])
+            if snapshot is None or snapshot.key != key:
+                snapshot = WorkbookSnapshot(key[0], key, self._parser, disk_cache=self.disk_cache)
+                self._snapshots[key[0]] = snapshot
+            return snapshot
+    
+    def add(self, key, sheet_names, sheets, schemas=None):
+        """Registra una instantánea con hojas ya leídas (p. ej. recibidas del proceso principal)"""
+        snapshot = WorkbookSnapshot(key[0], key, self._parser, sheet_names, sheets, schemas=schemas)
+        with self._lock:
+            self._snapshots[key[0]] = snapshot
+        return snapshot
+    
+    def invalidate(self, excel_path=None):
+        """Descarta la instantánea de un archivo (o de todos) para forzar una nueva lectura"""
+        with self._lock:
+            if excel_path is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(str(Path(excel_path).resolve()), None)
+
+
+# Etiquetas cuyo valor se escribe en la celda de abajo (las demás usan la celda contigua)
+BELOW_LABELS = ('NOMBRE Y APELLIDOS COMPLETOS DEL ESTUDIANTE:', 'ID INSTITUCIONAL')
+
+
+def file_hash(path):
+    """Hash SHA-256 del contenido de un archivo"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+AreaMatch = namedtuple('AreaMatch', ['mapping', 'scores', 'unmapped_excel', 'unmapped_word'])
+
+
+class AreaMatcher:
+    """
+    Empareja las columnas de áreas del Excel con las filas de la tabla de ÁREAS de la plantilla.
+    
+    Los nombres se comparan palabra por palabra, sin tildes ni mayúsculas y sin conectores:
+    una abreviatura ('Edu', 'Educ') coincide con la palabra que empieza igual y las diferencias
+    pequeñas de ortografía cuentan con un puntaje menor. El mapeo configurado (areas_mapping)
+    sirve como pista: cada columna se compara también con el nombre que tiene allí.
+    """
+    STOPWORDS = frozenset({'a', 'al', 'de', 'del', 'e', 'el', 'en', 'la', 'las', 'los', 'o', 'u', 'y'})
+    TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+    MIN_SCORE = 0.6  # Puntaje mínimo para aceptar una pareja
+    
+    def __init__(self, hints=None):
+        self.hints = hints or {}  # Área del Excel -> nombre del área en la plantilla
+    
+    @staticmethod
+    def key(text):
+        """Clave exacta de un nombre de área: sin tildes, en minúsculas y con espacios simples"""
+        return ' '.join(normalize_name(text).split())
+    
+    @classmethod
+    def tokens(cls, text):
+        return [token for token in cls.TOKEN_PATTERN.findall(normalize_name(text)) if token not in cls.STOPWORDS]
+    
+    @staticmethod
+    def token_similarity(a, b):
+        if a == b:
+            return 1.0
+        short, long = (a, b) if len(a) <= len(b) else (b, a)
+        if len(short) >= 2 and long.startswith(short):
+            return 0.9
+        ratio = difflib.SequenceMatcher(None, a, b).ratio()
+        return ratio if ratio >= 0.8 else 0.0
+    
+    @classmethod
+    def score(cls, excel_tokens, word_tokens):
+        """Cobertura de las palabras del Excel (peso 0.8) y de las de la plantilla (peso 0.2)"""
+        if not excel_tokens or not word_tokens:
+            return 0.0
+        excel_cover = sum(max(cls.token_similarity(t, w) for w in word_tokens) for t in excel_tokens)
+        word_cover = sum(max(cls.token_similarity(w, t) for t in excel_tokens) for w in word_tokens)
+        return 0.8 * excel_cover / len(excel_tokens) + 0.2 * word_cover / len(word_tokens)
+    
+    def match(self, excel_areas, word_areas):
+        """
+        Asigna a cada área del Excel a lo sumo una fila de la plantilla (y viceversa), tomando
+        primero las parejas de mayor puntaje.
         
-    def set_output_folder(self, folder_path):
-        """Establece la carpeta de salida para los boletines"""
-        self.output_folder = Path(folder_path)
+        Returns:
+            AreaMatch: mapping (área del Excel -> nombre en la plantilla), scores, y las áreas
+            de cada lado que quedaron sin pareja
+        """
+        word_tokens = [self.tokens(word) for word in word_areas]
+        candidates = []
+        for excel in excel_areas:
+            names = [self.tokens(excel)]
+            if excel in self.hints:
+                names.append(self.tokens(self.hints[excel]))
+            for j, tokens in enumerate(word_tokens):
+                score = max(self.score(name, tokens) for name in names)
+                if score >= self.MIN_SCORE:
+                    candidates.append((score, excel, j))
+        
+        mapping, scores, used = {}, {}, set()
+        for score, excel, j in sorted(candidates, key=lambda c: -c[0]):
+            if excel not in mapping and j not in used:
+                mapping[excel] = word_areas[j]
+                scores[excel] = round(score, 3)
+                used.add(j)
+        
+        unmapped_excel = [excel for excel in excel_areas if excel not in mapping]
+        unmapped_word = [word for j, word in enumerate(word_areas) if j not in used]
+        return AreaMatch(mapping, scores, unmapped_excel, unmapped_word)
+
+
+class FillPlan:
+    """Plan de llenado de una plantilla: coordenadas (tabla, fila, columna) de cada campo y área"""
+    VERSION = 1
+    
+    def __init__(self, template_hash, config_hash, fields, areas):
+        self.template_hash = template_hash
+        self.config_hash = config_hash
+        self.fields = fields  # [(tabla, fila, columna, etiqueta)]
+        self.areas = areas  # [(tabla, fila, columna, área del Excel)]
+    
+    def to_dict(self):
+        return {
+            'template_hash': self.template_hash,
+            'config_hash': self.config_hash,
+            'fields': [list(slot) for slot in self.fields],
+            'areas': [list(slot) for slot in self.areas],
+        }
+    
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data['template_hash'],
+            data['config_hash'],
+            [tuple(slot) for slot in data['fields']],
+            [tuple(slot) for slot in data['areas']],
+        )
+
+
+class TemplateCompiler:
+    """Analiza una plantilla una sola vez y guarda su plan de llenado en memoria y en disco"""
+    def __init__(self):
+        self._plans = {}  # (hash de plantilla, hash de configuración) -> FillPlan
+        self._hashes = {}  # (ruta, mtime, tamaño) -> hash de plantilla
+        self._area_rows = {}  # hash de plantilla -> filas de la tabla de ÁREAS
     
-    def get_excel_areas(self):
-        """Obtiene las áreas del archivo Excel"""
-        df = pd.read_excel(self.excel_path, sheet_name=0)
-        areas = [col for col in df.columns if col not in ['GRADO', 'GRUPO', 'PERIODO', 'estudiante', 'Promedio', 'Mención de honor']]
-        return areas
+    @staticmethod
+    def config_hash(labels, areas_mapping):
+        """Hash de la configuración que determina el plan (etiquetas y mapeo de áreas)"""
+        config = json.dumps([sorted(labels), list(areas_mapping.items())], ensure_ascii=False)
+        return hashlib.sha1(config.encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def plan_path(template_path):
+        """Archivo donde se guardan los planes, junto a la plantilla"""
+        template_path = Path(template_path)
+        return template_path.with_name(template_path.name + '.plan.json')
+    
+    def template_hash(self, template_path):
+        """Hash del contenido de la plantilla, recalculado sólo si el archivo cambió"""
+        stat = os.stat(template_path)
+        key = (str(Path(template_path).resolve()), stat.st_mtime_ns, stat.st_size)
+        if key not in self._hashes:
+            self._hashes[key] = file_hash(template_path)
+        return self._hashes[key]
+    
+    def get_plan(self, template_path, labels, areas_mapping):
+        """Devuelve el plan de la plantilla, compilándolo sólo si no está en memoria ni en disco"""
+        template_hash = self.template_hash(template_path)
+        config_hash = self.config_hash(labels, areas_mapping)
+        key = (template_hash, config_hash)
+        if key in self._plans:
+            return self._plans[key]
+        
+        plan_file = self.plan_path(template_path)
+        stored = self._read_plans(plan_file, template_hash)
+        if config_hash in stored:
+            plan = FillPlan.from_dict(stored[config_hash])
+        else:
+            plan = self.compile(template_path, labels, areas_mapping)
+            plan.template_hash, plan.config_hash = template_hash, config_hash
+            stored[config_hash] = plan.to_dict()
+            self._write_plans(plan_file, template_hash, stored)
+        
+        self._plans[key] = plan
+        return plan
+    
+    @staticmethod
+    def _read_plans(plan_file, template_hash):
+        try:
+            with open(plan_file, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get('version') != FillPlan.VERSION or data.get('template_hash') != template_hash:
+            return {}
+        return data.get('plans', {})
+    
+    @staticmethod
+    def _write_plans(plan_file, template_hash, plans):
+        # El caché en disco es opcional: si la carpeta es de sólo lectura se ignora
+        try:
+            tmp_file = plan_file.with_name(plan_file.name + '.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({'version': FillPlan.VERSION, 'template_hash': template_hash, 'plans': plans},
+                          f, ensure_ascii=False)
+            os.replace(tmp_file, plan_file)
+        except OSError:
+            pass
+    
+    def get_area_rows(self, template_path):
+        """Filas de la tabla de ÁREAS de la plantilla (se leen una vez por plantilla)"""
+        template_hash = self.template_hash(template_path)
+        if template_hash not in self._area_rows:
+            self._area_rows[template_hash] = self.read_area_rows(Document(template_path))
+        return self._area_rows[template_hash]
+    
+    @staticmethod
+    def read_area_rows(doc):
+        """
+        Ubica la tabla de ÁREAS y devuelve sus filas como (tabla, fila, columna de la nota, área):
+        columna 1, nombre del área en el Word; columna 2, celda de la nota.
+        """
+        areas_table_idx = None
+        for table_idx, table in enumerate(doc.tables):
+            if any(cell.text.strip() == "ÁREAS" for row in table.rows for cell in row.cells):
+                areas_table_idx = table_idx
+                break
+        if areas_table_idx is None:
+            raise ValueError("No se encontró la tabla de ÁREAS en el documento")
+        
+        area_rows = []
+        for row_idx, row in enumerate(doc.tables[areas_table_idx].rows):
+            grid_cols = []
+            seen = set()
+            for col_idx, cell in enumerate(row.cells):
+                if id(cell._tc) not in seen:
+                    seen.add(id(cell._tc))
+                    grid_cols.append((col_idx, cell))
+            if len(grid_cols) < 2:
+                continue
+            area_text = grid_cols[0][1].text.strip()
+            if area_text and area_text != "ÁREAS":
+                area_rows.append((areas_table_idx, row_idx, grid_cols[1][0], area_text))
+        return area_rows
+    
+    @staticmethod
+    def _neighbour(rows, row_idx, col_idx, below):
+        """Coordenadas de la celda contigua (derecha) o inferior, saltando celdas combinadas"""
+        label_tc = rows[row_idx].cells[col_idx]._tc
+        if below:
+            for next_row in range(row_idx + 1, len(rows)):
+                cells = rows[next_row].cells
+                if col_idx < len(cells) and cells[col_idx]._tc is not label_tc:
+                    return next_row, col_idx
+        else:
+            cells = rows[row_idx].cells
+            for next_col in range(col_idx + 1, len(cells)):
+                if cells[next_col]._tc is not label_tc:
+                    return row_idx, next_col
+        return None
+    
+    def compile(self, template_path, labels, areas_mapping):
+        """Recorre la plantilla y ubica las celdas donde van los campos y las notas de las áreas"""
+        doc = Document(template_path)
+        labels = {label.strip() for label in labels}
+        below_labels = {label.strip() for label in BELOW_LABELS}
+        
+        fields = []
+        for table_idx, table in enumerate(doc.tables):
+            rows = table.rows
+            for row_idx, row in enumerate(rows):
+                seen = set()
+                for col_idx, cell in enumerate(row.cells):
+                    if id(cell._tc) in seen:
+                        continue
+                    seen.add(id(cell._tc))
+                    cell_text = cell.text.strip()
+                    if cell_text in labels:
+                        target = self._neighbour(rows, row_idx, col_idx, cell_text in below_labels)
+                        if target is not None:
+                            fields.append((table_idx, target[0], target[1], cell_text))
+        
+        # El mapeo ya resuelto trae el nombre de cada fila tal como aparece en la plantilla
+        by_key = {AreaMatcher.key(area_word): area_excel for area_excel, area_word in areas_mapping.items()}
+        areas = []
+        for table_idx, row_idx, col_idx, area_text in self.read_area_rows(doc):
+            area_excel = by_key.get(AreaMatcher.key(area_text))
+            if area_excel is not None:
+                areas.append((table_idx, row_idx, col_idx, area_excel))
+        
+        return FillPlan(None, None, fields, areas)
+
+
+class RenderBackend:
+    """Interfaz de los motores que llenan la plantilla de un boletín y generan su PDF"""
+    name = None
+    in_memory = False  # Si el motor genera el .docx en memoria, sin una copia previa de la plantilla
+    converter = None  # ConverterPool compartido para exportar a PDF
+    
+    def render(self, doc_path, pdf_path, replacements, student_row, areas_mapping, callback=None, plan=None,
+               template_path=None):
+        """
+        Llena el documento doc_path (copia de la plantilla) y lo guarda en el mismo lugar.
+        Si pdf_path no es None también exporta el PDF. Devuelve la ruta del PDF o None.
+        Los motores que lo soportan usan el plan de llenado precompilado de la plantilla.
+        """
+        raise NotImplementedError
+    
+    def render_bytes(self, replacements, student_row, areas_mapping, callback=None, plan=None,
+                     template_path=None):
+        """
+        Llena la plantilla y devuelve el contenido del .docx resultante.
+        Los motores que no trabajan en memoria llenan una copia en una carpeta temporal.
+        """
+        with tempfile.TemporaryDirectory(prefix='notador_') as tmp:
+            doc_path = str(Path(tmp) / 'boletin.docx')
+            with timed_stage('template_copy'):
+                shutil.copy2(template_path, doc_path)
+            self.render(doc_path, None, replacements, student_row, areas_mapping, callback, plan=plan,
+                        template_path=template_path)
+            return Path(doc_path).read_bytes()
+    
+    def pdf_bytes(self, docx_bytes, callback=None):
+        """Convierte a PDF un .docx en memoria (a través de una carpeta temporal local)"""
+        with tempfile.TemporaryDirectory(prefix='notador_') as tmp:
+            doc_path = Path(tmp) / 'boletin.docx'
+            doc_path.write_bytes(docx_bytes)
+            pdf_path = self.export_pdf(str(doc_path), str(doc_path.with_suffix('.pdf')), callback)
+            return Path(pdf_path).read_bytes() if pdf_path else None
+    
+    def export_pdf(self, doc_path, pdf_path, callback=None):
+        """Exporta el documento a PDF con el grupo de conversión (o con LibreOffice directamente)"""
+        report(callback, 'pdf', "💾 Guardando versión PDF...")
+        if self.converter is None or not self.converter.available:
+            with timed_stage('pdf'):
+                return convert_to_pdf(doc_path, pdf_path, callback,
+                                      self.converter.timeout if self.converter else PDF_TIMEOUT)
+        
+        warning = self.converter.fallback_warning()
+        if warning:
+            report(callback, 'pdf', f"⚠ {warning}", level='warning')
+        with timed_stage('pdf'):
+            result = self.converter.convert(doc_path, pdf_path)
+        if result.error is not None:
+            raise RuntimeError(f"Error al convertir a PDF: {result.error}")
+        report(callback, 'pdf', f"⏱ PDF generado en {result.seconds:.2f} s", elapsed=result.seconds)
+        return result.pdf_path
+    
+    @property
+    def pdf_available(self):
+        """Si el motor puede generar el PDF (con LibreOffice instalado)"""
+        return find_soffice() is not None
+
+
+# Caracteres fuera del rango Char de XML 1.0 (controles pegados desde Excel, sustitutos sueltos)
+XML_ILLEGAL_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]')
+
+
+def xml_safe_text(text):
+    """Quita de un texto los caracteres que Word no acepta en el XML del documento"""
+    text = str(text)
+    if not XML_ILLEGAL_CHARS.search(text):
+        return text
+    # El tabulador vertical y el salto de página separan palabras: se cambian por espacios
+    return XML_ILLEGAL_CHARS.sub('', text.replace('\x0b', ' ').replace('\x0c', ' '))
+
+
+class DocxRenderBackend(RenderBackend):
+    """Motor en Python puro basado en python-docx; no necesita Microsoft Word"""
+    name = 'docx'
+    in_memory = True
+    
+    @staticmethod
+    def _set_cell_text(cell, text):
+        """Reemplaza el texto de la celda conservando el formato del primer párrafo"""
+        text = xml_safe_text(text)
+        paragraphs = cell.paragraphs
+        first = paragraphs[0]
+        for paragraph in paragraphs[1:]:
+            paragraph._element.getparent().remove(paragraph._element)
+        runs = first.runs
+        if runs:
+            runs[0].text = text
+            for run in runs[1:]:
+                run._element.getparent().remove(run._element)
+        else:
+            first.add_run(text)
+    
+    def fill(self, doc, plan, replacements, student_row, callback=None):
+        """Escribe los valores del estudiante en las celdas ubicadas por el plan"""
+        tables = doc.tables
+        
+        report(callback, 'render', "Aplicando información básica...")
+        
+        # Sólo se escriben los valores en las celdas ya ubicadas por el plan
+        labels = {find_text.strip(): replace_text for find_text, replace_text in replacements.items()}
+        for table_idx, row_idx, col_idx, label in plan.fields:
+            if label in labels:
+                self._set_cell_text(tables[table_idx].rows[row_idx].cells[col_idx], labels[label])
+        
+        for table_idx, row_idx, col_idx, area_excel in plan.areas:
+            if area_excel in student_row:
+                nota = str(student_row[area_excel]).strip()
+                self._set_cell_text(tables[table_idx].rows[row_idx].cells[col_idx], nota)
+    
+    def render(self, doc_path, pdf_path, replacements, student_row, areas_mapping, callback=None, plan=None,
+               template_path=None):
+        if plan is None:
+            plan = TemplateCompiler().compile(doc_path, replacements.keys(), areas_mapping)
+        
+        doc = Document(doc_path)
+        self.fill(doc, plan, replacements, student_row, callback)
+        doc.save(doc_path)
+        
+        if not pdf_path:
+            return None
+        return self.export_pdf(doc_path, pdf_path, callback)
+    
+    def render_bytes(self, replacements, student_row, areas_mapping, callback=None, plan=None,
+                     template_path=None):
+        if plan is None:
+            plan = TemplateCompiler().compile(template_path, replacements.keys(), areas_mapping)
+        
+        doc = Document(template_path)
+        self.fill(doc, plan, replacements, student_row, callback)
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        return buffer.getvalue()
+
+
+class DocxStamper:
+    """
+    Plantilla preparada para estampar boletines directamente sobre el XML de Word.
+    
+    El word/document.xml de la plantilla se serializa una sola vez con un marcador en cada
+    celda del plan de llenado; por cada estudiante sólo se unen los fragmentos con los valores
+    y se escribe el .docx copiando byte a byte (sin recomprimir) el resto de las partes del zip.
+    """
+    PART_NAME = 'word/document.xml'
+    # Marcadores delimitados con caracteres Unicode de uso privado (no aparecen en plantillas)
+    SLOT_OPEN, SLOT_CLOSE = chr(0xE000), chr(0xE001)
+    SLOT_PATTERN = re.compile(SLOT_OPEN + r'(\d+)' + SLOT_CLOSE)
+    
+    def __init__(self, template_path, plan):
+        self.template_path = str(template_path)
+        self._prepare_xml(plan)
+        self._prepare_zip()
+    
+    def _prepare_xml(self, plan):
+        from docx.opc.oxml import serialize_part_xml
+        
+        doc = Document(self.template_path)
+        tables = doc.tables
+        self.slots = []  # [(tipo, clave, texto original de la celda)]
+        
+        for kind, slots in (('field', plan.fields), ('area', plan.areas)):
+            for table_idx, row_idx, col_idx, key in slots:
+                cell = tables[table_idx].rows[row_idx].cells[col_idx]
+                original = cell.text
+                marker = f'{self.SLOT_OPEN}{len(self.slots)}{self.SLOT_CLOSE}'
+                DocxRenderBackend._set_cell_text(cell, marker)
+                # Conservar espacios al inicio o al final de los valores
+                cell.paragraphs[0].runs[0]._r.t_lst[0].set(
+                    '{http://www.w3.org/XML/1998/namespace}space', 'preserve'
+                )
+                self.slots.append((kind, key, original))
+        
+        xml = serialize_part_xml(doc.element).decode('utf-8')
+        parts = self.SLOT_PATTERN.split(xml)
+        self.chunks = parts[0::2]  # Texto fijo entre marcadores
+        self.order = [int(i) for i in parts[1::2]]  # Marcador que va tras cada fragmento
+    
+    def _prepare_zip(self):
+        with open(self.template_path, 'rb') as f:
+            data = f.read()
+        
+        # Ubicar el directorio central a partir del registro final del zip
+        eocd = data.rfind(b'PK\x05\x06', max(0, len(data) - 65557))
+        if eocd < 0:
+            raise ValueError("La plantilla no es un archivo .docx válido")
+        cd_size, cd_offset = struct.unpack_from('<II', data, eocd + 12)
+        
+        before, after = bytearray(), bytearray()
+        self._cd_before, self._cd_after = [], []
+        self._part_time = None
+        
+        pos = cd_offset
+        while pos < cd_offset + cd_size:
+            (flags, _, mtime, mdate, _, csize, _, name_len, extra_len,
+             comment_len) = struct.unpack_from('<HHHHIIIHHH', data, pos + 8)
+            local_offset = struct.unpack_from('<I', data, pos + 42)[0]
+            if local_offset == 0xFFFFFFFF or csize == 0xFFFFFFFF:
+                raise ValueError("Las plantillas en formato ZIP64 no son compatibles con el estampado")
+            entry_len = 46 + name_len + extra_len + comment_len
+            central_entry = data[pos:pos + entry_len]
+            name = data[pos + 46:pos + 46 + name_len].decode('utf-8' if flags & 0x800 else 'cp437')
+            pos += entry_len
+            
+            if name == self.PART_NAME:
+                self._part_time = (mtime, mdate)
+                continue
+            
+            # Entrada local completa: encabezado, datos comprimidos y descriptor opcional
+            local_name_len, local_extra_len = struct.unpack_from('<HH', data, local_offset + 26)
+            end = local_offset + 30 + local_name_len + local_extra_len + csize
+            if flags & 0x08:
+                end += 16 if data[end:end + 4] == b'PK\x07\x08' else 12
+            
+            blob, entries = (after, self._cd_after) if self._part_time else (before, self._cd_before)
+            entries.append((len(blob), central_entry))
+            blob += data[local_offset:end]
+        
+        if self._part_time is None:
+            raise ValueError("La plantilla no contiene word/document.xml")
+        self._before, self._after = bytes(before), bytes(after)
+    
+    def render_xml(self, values):
+        """Une los fragmentos fijos con los valores (ya escapados) de cada marcador"""
+        out = [self.chunks[0]]
+        for slot, chunk in zip(self.order, self.chunks[1:]):
+            out.append(values[slot])
+            out.append(chunk)
+        return ''.join(out)
+    
+    def values_for(self, replacements, student_row):
+        """Calcula el texto XML de cada marcador para un estudiante"""
+        labels = {find_text.strip(): replace_text for find_text, replace_text in replacements.items()}
+        values = []
+        for kind, key, original in self.slots:
+            if kind == 'field':
+                value = labels.get(key, original)
+            else:
+                value = str(student_row[key]).strip() if key in student_row else original
+            values.append(xml_escape(xml_safe_text(value)))
+        return values
+    
+    def stamp_bytes(self, replacements, student_row):
+        """Devuelve el contenido del .docx del estudiante"""
+        xml = self.render_xml(self.values_for(replacements, student_row)).encode('utf-8')
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+        compressed = compressor.compress(xml) + compressor.flush()
+        crc = zlib.crc32(xml)
+        name = self.PART_NAME.encode('ascii')
+        mtime, mdate = self._part_time
+        
+        part_offset = len(self._before)
+        local = struct.pack('<IHHHHHIIIHH', 0x04034b50, 20, 0, 8, mtime, mdate,
+                            crc, len(compressed), len(xml), len(name), 0) + name
+        after_offset = part_offset + len(local) + len(compressed)
+        
+        central = bytearray()
+        for base, entries in ((0, self._cd_before), (after_offset, self._cd_after)):
+            for relative, entry in entries:
+                entry = bytearray(entry)
+                struct.pack_into('<I', entry, 42, base + relative)
+                central += entry
+            if base == 0:
+                central += struct.pack('<IHHHHHHIIIHHHHHII', 0x02014b50, 20, 20, 0, 8, mtime, mdate,
+                                       crc, len(compressed), len(xml), len(name), 0, 0, 0, 0, 0,
+                                       part_offset) + name
+        
+        cd_offset = after_offset + len(self._after)
+        count = len(self._cd_before) + len(self._cd_after) + 1
+        end_record = struct.pack('<IHHHHIIH', 0x06054b50, 0, 0, count, count,
+                                 len(central), cd_offset, 0)
+        
+        return b''.join((self._before, local, compressed, self._after, central, end_record))
+    
+    def stamp(self, dest_path, replacements, student_row):
+        """Escribe el .docx del estudiante en dest_path"""
+        with open(dest_path, 'wb') as f:
+            f.write(self.stamp_bytes(replacements, student_row))
+
+
+class StampRenderBackend(RenderBackend):
+    """Motor de estampado directo del XML: no construye el modelo del documento por estudiante"""
+    name = 'stamp'
+    in_memory = True
+    
+    def __init__(self):
+        self._stampers = {}  # (hash de plantilla, hash de configuración) -> DocxStamper
+    
+    def get_stamper(self, template_path, plan):
+        key = (plan.template_hash, plan.config_hash)
+        if key not in self._stampers:
+            self._stampers[key] = DocxStamper(template_path, plan)
+        return self._stampers[key]
+    
+    def render(self, doc_path, pdf_path, replacements, student_row, areas_mapping, callback=None, plan=None,
+               template_path=None):
+        if plan is None or template_path is None:
+            raise ValueError("El estampado necesita la plantilla y su plan de llenado")
+        
+        report(callback, 'render', "Aplicando información básica...")
+        self.get_stamper(template_path, plan).stamp(doc_path, replacements, student_row)
+        
+        if not pdf_path:
+            return None
+        return self.export_pdf(doc_path, pdf_path, callback)
+    
+    def render_bytes(self, replacements, student_row, areas_mapping, callback=None, plan=None,
+                     template_path=None):
+        if plan is None or template_path is None:
+            raise ValueError("El estampado necesita la plantilla y su plan de llenado")
+        
+        report(callback, 'render', "Aplicando información básica...")
+        return self.get_stamper(template_path, plan).stamp_bytes(replacements, student_row)
 
-    def get_word_areas(self):
-        """Obtiene las áreas de la plantilla Word"""
-        doc = Document(self.word_template)
-        areas = []
-        for paragraph in doc.paragraphs:
-            for area_excel, area_word in self.areas_mapping.items():
-                if area_word in paragraph.text.upper():
-                    areas.append(area_excel)
-        return areas
+
+class WordComRenderBackend(RenderBackend):
+    """Motor opcional que automatiza Microsoft Word por COM (sólo Windows)"""
+    name = 'word'
+    pdf_available = True  # Word exporta el PDF directamente
     
-    def find_and_replace_in_doc(self, doc, placeholder, value):
-        """Busca y reemplaza texto en todo el documento Word"""
-        for paragraph in doc.paragraphs:
-            if placeholder in paragraph.text:
-                for run in paragraph.runs:
-                    run.text = run.text.replace(placeholder, str(value))
-                    
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        if placeholder in paragraph.text:
-                            for run in paragraph.runs:
-                                run.text = run.text.replace(placeholder, str(value))
-                                
-    def process_word_document(self, doc_path, pdf_path, replacements, student_row, callback=None, areas_mapping=None):
-        """
-        Procesa un documento Word, realizando los reemplazos necesarios y llenando las notas.
-        Guarda el documento en formato Word y PDF.
+    def render(self, doc_path, pdf_path, replacements, student_row, areas_mapping, callback=None, plan=None,
+               template_path=None):
+        import win32com.client  # Sólo disponible en Windows con Microsoft Word instalado
         
-        Args:
-            doc_path (str): Ruta al documento Word
-            pdf_path (str): Ruta donde se guardará el PDF
-            replacements (dict): Diccionario con los textos a buscar y reemplazar
-            student_row (Series): Fila del DataFrame con los datos del estudiante
-            callback (callable, optional): Función para reportar progreso
-        """
         word = win32com.client.Dispatch("Word.Application")
         word.Visible = False
         
@@ -701,8 +2899,7 @@ class Notador:
             doc = word.Documents.Open(doc_path)
             
             # Reemplazar información básica
-            if callback:
-                callback("Aplicando información básica...")
+            report(callback, 'render', "Aplicando información básica...")
             
             # Constantes de Word
             wdFindContinue = 1
@@ -722,10 +2919,7 @@ class Notador:
                                 # Si encontramos el texto en la celda
                                 if find_text.strip() == cell_text.strip():
                                     # Para nombre_completo e id, escribir en la celda de abajo
-                                    if find_text in [
-                                        'NOMBRE Y APELLIDOS COMPLETOS DEL ESTUDIANTE:',
-                                        'ID INSTITUCIONAL'
-                                    ]:
+                                    if find_text in BELOW_LABELS:
                                         if row_idx < table.Rows.Count:  # Verificar que existe una fila siguiente
                                             next_cell = table.Cell(row_idx + 1, col_idx)
                                             next_cell.Range.Text = replace_text
@@ -760,9 +2954,7 @@ class Notador:
             
             # Procesar las áreas
             areas_procesadas = 0
-
-            # Use the provided mapping if given, otherwise fall back to the default
-            mapping_to_use = areas_mapping if areas_mapping is not None else self.areas_mapping
+            by_key = {AreaMatcher.key(area_word): area_excel for area_excel, area_word in areas_mapping.items()}
 
             # Iteramos por las filas de la tabla
             for row in current_table.Rows:
@@ -773,115 +2965,1077 @@ class Notador:
                     
                     area_text = area_cell.Range.Text.strip().rstrip('\r\x07')
                     
-                    # Buscar el área correspondiente en el mapeo
-                    for area_excel, area_word in mapping_to_use.items():
-                        try:
-                            if area_word.upper() in area_text.upper():
-                                # Si encontramos el área y está en los datos del estudiante
-                                if area_excel in student_row:
-                                    nota = str(student_row[area_excel]).strip()
-                                    nota_cell.Range.Text = nota
-                                    areas_procesadas += 1
-                                break
-                        except Exception:
-                            # Ignorar problemas con comparación de textos
-                            continue
+                    # Buscar el área correspondiente en el mapeo ya resuelto
+                    area_excel = by_key.get(AreaMatcher.key(area_text))
+                    if area_excel is not None and area_excel in student_row:
+                        nota = str(student_row[area_excel]).strip()
+                        nota_cell.Range.Text = nota
+                        areas_procesadas += 1
                 except Exception as e:
                     continue
             # Guardar como Word
             doc.Save()
             
             # Guardar como PDF
-            if callback:
-                callback("💾 Guardando versión PDF...")
+            if pdf_path:
+                report(callback, 'pdf', "💾 Guardando versión PDF...")
+                
+                # Constantes de Word para PDF
+                wdFormatPDF = 17  # Formato PDF
+                with timed_stage('pdf'):
+                    doc.SaveAs2(pdf_path, FileFormat=wdFormatPDF)
+            
+            # Cerrar el documento
+            doc.Close()
+        finally:
+            word.Quit()
+        
+        return pdf_path
+
+
+def convert_to_pdf(doc_path, pdf_path, callback=None, timeout=PDF_TIMEOUT):
+    """Convierte un .docx a PDF con LibreOffice sin interfaz; devuelve la ruta o None"""
+    soffice = find_soffice()
+    if not soffice:
+        report(callback, 'pdf', "⚠ No se encontró LibreOffice; se omite la versión PDF", level='warning')
+        return None
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        try:
+            subprocess.run(
+                [soffice, '--headless', '--convert-to', 'pdf', '--outdir', tmp_dir, str(doc_path)],
+                check=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=timeout
+            )
+        except subprocess.TimeoutExpired:
+            raise RuntimeError(f"La conversión a PDF superó el límite de {timeout} s")
+        shutil.move(str(Path(tmp_dir) / (Path(doc_path).stem + '.pdf')), str(pdf_path))
+    return str(pdf_path)
+
+
+ConversionResult = namedtuple('ConversionResult', ['doc_path', 'pdf_path', 'seconds', 'error'])
+
+
+def find_soffice():
+    """Ruta del ejecutable de LibreOffice, o None si no está instalado"""
+    return shutil.which('soffice') or shutil.which('libreoffice')
+
+
+# Puente UNO que corre en un Python con el módulo uno (el de LibreOffice) cuando el nuestro no
+# lo tiene: se conecta al LibreOffice ya abierto y atiende una conversión por línea JSON de su
+# entrada estándar ({"doc": ..., "pdf": ...}), respondiendo otra línea JSON por su salida
+UNO_HELPER = r'''
+import json
+import sys
+import time
+
+import uno
+from com.sun.star.beans import PropertyValue
+from com.sun.star.connection import NoConnectException
+
+
+def properties(**values):
+    result = []
+    for name, value in values.items():
+        prop = PropertyValue()
+        prop.Name, prop.Value = name, value
+        result.append(prop)
+    return tuple(result)
+
+
+def main(pipe_name, timeout):
+    local_context = uno.getComponentContext()
+    resolver = local_context.ServiceManager.createInstanceWithContext(
+        'com.sun.star.bridge.UnoUrlResolver', local_context)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            context = resolver.resolve('uno:pipe,name=%s;urp;StarOffice.ComponentContext' % pipe_name)
+            break
+        except NoConnectException:
+            if time.monotonic() > deadline:
+                return
+            time.sleep(0.25)
+    desktop = context.ServiceManager.createInstanceWithContext('com.sun.star.frame.Desktop', context)
+    print(json.dumps({'ready': True}), flush=True)
+
+    for line in sys.stdin:
+        request = json.loads(line)
+        if request.get('stop'):
+            try:
+                desktop.terminate()
+            except Exception:
+                pass
+            return
+        try:
+            doc = desktop.loadComponentFromURL(uno.systemPathToFileUrl(request['doc']), '_blank', 0,
+                                               properties(Hidden=True))
+            try:
+                doc.storeToURL(uno.systemPathToFileUrl(request['pdf']),
+                               properties(FilterName='writer_pdf_Export'))
+            finally:
+                doc.close(True)
+            reply = {'ok': True}
+        except Exception as e:
+            reply = {'ok': False, 'error': '%s: %s' % (type(e).__name__, e)}
+        print(json.dumps(reply), flush=True)
+
+
+main(sys.argv[1], float(sys.argv[2]))
+'''
+
+
+@functools.lru_cache(maxsize=None)
+def find_uno_python(soffice):
+    """
+    Intérprete con el módulo uno para hablar con LibreOffice desde otro proceso: el Python que
+    trae LibreOffice (Windows y macOS) o el python3 del sistema con uno (paquetes de Linux).
+    Devuelve None si no hay ninguno.
+    """
+    program = Path(os.path.realpath(soffice)).parent
+    candidates = [program / 'python.exe', program / 'python', program.parent / 'Resources' / 'python',
+                  shutil.which('python3')]
+    for candidate in candidates:
+        if candidate is None or not Path(candidate).is_file():
+            continue
+        try:
+            subprocess.run([str(candidate), '-c', 'import uno'], check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=30)
+        except (OSError, subprocess.SubprocessError):
+            continue
+        return str(candidate)
+    return None
+
+
+class SofficeWorker:
+    """
+    Proceso de LibreOffice sin interfaz con su propio perfil de usuario.
+    
+    El proceso queda abierto y atiende las conversiones por UNO: desde este mismo Python si
+    tiene el módulo uno ('uno') o, si no, a través de UNO_HELPER corriendo en el Python de
+    LibreOffice ('helper'). Sin ninguno de los dos ('convert-to'), cada conversión lanza
+    'soffice --convert-to' con el perfil del trabajador y arranca LibreOffice de cero.
+    """
+    UNO, HELPER, CONVERT_TO = 'uno', 'helper', 'convert-to'
+    
+    def __init__(self, soffice, index, transport=None):
+        self.soffice = soffice
+        self.index = index
+        self.transport = transport or self.transport_for(soffice)
+        self.conversions = 0
+        self.profile_dir = None
+        self._process = None
+        self._desktop = None
+        self._helper = None
+    
+    @classmethod
+    def transport_for(cls, soffice):
+        """Forma de hablar con LibreOffice disponible en este equipo (ver la clase)"""
+        try:
+            import uno  # noqa: F401 - sólo presente en el Python de LibreOffice
+            return cls.UNO
+        except ImportError:
+            return cls.HELPER if find_uno_python(soffice) else cls.CONVERT_TO
+    
+    def _profile_url(self):
+        return Path(self.profile_dir).resolve().as_uri()
+    
+    def start(self, timeout=60):
+        """Crea el perfil y, salvo con 'convert-to', lanza el proceso y espera a que acepte conexiones"""
+        self.profile_dir = tempfile.mkdtemp(prefix=f'notador-lo{self.index}-')
+        self.conversions = 0
+        if self.transport == self.CONVERT_TO:
+            return
+        
+        pipe_name = f'notador_{os.getpid()}_{self.index}_{int(time.time() * 1000)}'
+        self._process = subprocess.Popen(
+            [self.soffice, '--headless', '--invisible', '--nologo', '--norestore', '--nodefault',
+             f'-env:UserInstallation={self._profile_url()}',
+             f'--accept=pipe,name={pipe_name};urp;StarOffice.ComponentContext'],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        if self.transport == self.HELPER:
+            self._start_helper(pipe_name, timeout)
+        else:
+            self._connect(pipe_name, timeout)
+    
+    def _connect(self, pipe_name, timeout):
+        import uno
+        from com.sun.star.connection import NoConnectException
+        
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext(
+            'com.sun.star.bridge.UnoUrlResolver', local_context
+        )
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                context = resolver.resolve(f'uno:pipe,name={pipe_name};urp;StarOffice.ComponentContext')
+                break
+            except NoConnectException:
+                if self._process.poll() is not None or time.monotonic() > deadline:
+                    self.stop()
+                    raise RuntimeError("No se pudo iniciar LibreOffice para convertir a PDF")
+                time.sleep(0.25)
+        self._desktop = context.ServiceManager.createInstanceWithContext('com.sun.star.frame.Desktop', context)
+    
+    def _start_helper(self, pipe_name, timeout):
+        self._helper = subprocess.Popen(
+            [find_uno_python(self.soffice), '-c', UNO_HELPER, pipe_name, str(timeout)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding='utf-8',
+            bufsize=1
+        )
+        # El puente deja de esperar a LibreOffice después de timeout segundos y termina; si
+        # además se colgara, se matan los dos procesos
+        timer = threading.Timer(timeout + 10, self.kill)
+        timer.daemon = True
+        timer.start()
+        try:
+            line = self._helper.stdout.readline()
+        finally:
+            timer.cancel()
+        if not line or not json.loads(line).get('ready'):
+            self.stop()
+            raise RuntimeError("No se pudo iniciar LibreOffice para convertir a PDF")
+    
+    @staticmethod
+    def _properties(**values):
+        from com.sun.star.beans import PropertyValue
+        
+        properties = []
+        for name, value in values.items():
+            prop = PropertyValue()
+            prop.Name, prop.Value = name, value
+            properties.append(prop)
+        return tuple(properties)
+    
+    def _convert_uno(self, doc_path, pdf_path):
+        import uno
+        
+        doc = self._desktop.loadComponentFromURL(
+            uno.systemPathToFileUrl(str(Path(doc_path).resolve())), '_blank', 0,
+            self._properties(Hidden=True)
+        )
+        try:
+            doc.storeToURL(
+                uno.systemPathToFileUrl(str(Path(pdf_path).resolve())),
+                self._properties(FilterName='writer_pdf_Export')
+            )
+        finally:
+            doc.close(True)
+    
+    def _convert_helper(self, doc_path, pdf_path):
+        request = {'doc': str(Path(doc_path).resolve()), 'pdf': str(Path(pdf_path).resolve())}
+        try:
+            self._helper.stdin.write(json.dumps(request) + '\n')
+            self._helper.stdin.flush()
+            line = self._helper.stdout.readline()
+        except (OSError, ValueError):
+            line = ''
+        if not line:
+            raise RuntimeError("LibreOffice se cerró durante la conversión a PDF")
+        reply = json.loads(line)
+        if not reply.get('ok'):
+            raise RuntimeError(reply.get('error') or "LibreOffice no pudo convertir el documento")
+    
+    def convert(self, doc_path, pdf_path, timeout=None):
+        """
+        Convierte un documento a PDF con este trabajador.
+        Si pasan más de timeout segundos se mata LibreOffice y se lanza RuntimeError
+        (el trabajador debe reiniciarse antes de la siguiente conversión).
+        """
+        if self.transport != self.CONVERT_TO:
+            # Una llamada UNO colgada sólo se interrumpe matando el proceso de LibreOffice
+            timer = threading.Timer(timeout, self.kill) if timeout else None
+            if timer is not None:
+                timer.daemon = True
+                timer.start()
+            try:
+                if self.transport == self.HELPER:
+                    self._convert_helper(doc_path, pdf_path)
+                else:
+                    self._convert_uno(doc_path, pdf_path)
+            except Exception:
+                if timer is not None and timer.finished.is_set():
+                    raise RuntimeError(f"La conversión a PDF superó el límite de {timeout} s")
+                raise
+            finally:
+                if timer is not None:
+                    timer.cancel()
+        else:
+            out_dir = tempfile.mkdtemp(dir=self.profile_dir)
+            try:
+                subprocess.run(
+                    [self.soffice, '--headless', f'-env:UserInstallation={self._profile_url()}',
+                     '--convert-to', 'pdf', '--outdir', out_dir, str(doc_path)],
+                    check=True,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    timeout=timeout
+                )
+                shutil.move(str(Path(out_dir) / (Path(doc_path).stem + '.pdf')), str(pdf_path))
+            except subprocess.TimeoutExpired:
+                raise RuntimeError(f"La conversión a PDF superó el límite de {timeout} s")
+            finally:
+                shutil.rmtree(out_dir, ignore_errors=True)
+        self.conversions += 1
+    
+    def kill(self):
+        """Termina de inmediato LibreOffice y el puente (p. ej. si una conversión se colgó)"""
+        for process in (self._process, self._helper):
+            if process is not None and process.poll() is None:
+                process.kill()
+    
+    def stop(self):
+        """Cierra LibreOffice y elimina el perfil del trabajador"""
+        if self._desktop is not None:
+            try:
+                self._desktop.terminate()
+            except Exception:
+                pass  # El proceso puede haber terminado por un fallo
+            self._desktop = None
+        if self._helper is not None:
+            try:
+                self._helper.stdin.write(json.dumps({'stop': True}) + '\n')
+                self._helper.stdin.close()
+            except (OSError, ValueError):
+                pass  # El puente ya terminó
+            try:
+                self._helper.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self._helper.kill()
+                self._helper.wait()
+            self._helper.stdout.close()
+            self._helper = None
+        if self._process is not None:
+            try:
+                self._process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+                self._process.wait()
+            self._process = None
+        if self.profile_dir:
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
+            self.profile_dir = None
+
+
+class ConverterPool:
+    """
+    Grupo de trabajadores de LibreOffice que se mantienen abiertos entre conversiones.
+    
+    Los documentos se encolan y cada trabajador atiende la cola en su propio hilo.
+    Un trabajador se reinicia cuando falla, cuando una conversión supera timeout segundos
+    o cuando llega a max_conversions; el documento fallido se reintenta hasta retries veces.
+    """
+    FALLBACK_WARNING = ("No hay módulo uno ni un Python de LibreOffice que lo tenga: LibreOffice no "
+                        "queda abierto y cada PDF lo arranca de cero con 'soffice --convert-to' "
+                        "(varios segundos más por boletín)")
+    
+    def __init__(self, size=2, max_conversions=200, timeout=PDF_TIMEOUT, retries=1):
+        self.soffice = find_soffice()
+        self.size = max(1, int(size))
+        self.max_conversions = max_conversions
+        self.timeout = timeout
+        self.retries = max(0, int(retries))
+        self.timings = []  # Segundos de cada conversión terminada
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._transport = None
+        self._warned = False
+    
+    @property
+    def available(self):
+        return self.soffice is not None
+    
+    @property
+    def transport(self):
+        """Forma de hablar con LibreOffice (ver SofficeWorker); se averigua la primera vez"""
+        if self._transport is None and self.soffice is not None:
+            self._transport = SofficeWorker.transport_for(self.soffice)
+        return self._transport
+    
+    def fallback_warning(self):
+        """El aviso de FALLBACK_WARNING, sólo la primera vez y si de verdad se usa 'convert-to'"""
+        if self.transport != SofficeWorker.CONVERT_TO:
+            return None
+        with self._lock:
+            if self._warned:
+                return None
+            self._warned = True
+        return self.FALLBACK_WARNING
+    
+    def _ensure_started(self):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("El grupo de conversión ya fue cerrado")
+            if self._threads:
+                return
+            if self.transport == SofficeWorker.CONVERT_TO:
+                logger.warning(self.FALLBACK_WARNING)
+            for index in range(self.size):
+                thread = threading.Thread(target=self._work, args=(index,), daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            atexit.register(self.close)
+    
+    def _work(self, index):
+        worker = SofficeWorker(self.soffice, index, self.transport)
+        started = False
+        try:
+            while True:
+                job = self._queue.get()
+                if job is None:
+                    break
+                doc_path, pdf_path, future = job
+                if not future.set_running_or_notify_cancel():
+                    continue
+                
+                start = time.perf_counter()
+                error = None
+                for attempt in range(1 + self.retries):
+                    try:
+                        if not started:
+                            worker.start()
+                            started = True
+                        worker.convert(doc_path, pdf_path, self.timeout)
+                        error = None
+                        break
+                    except Exception as e:
+                        # Reiniciar el trabajador caído (o colgado) y reintentar
+                        error = e
+                        worker.stop()
+                        started = False
+                
+                seconds = time.perf_counter() - start
+                if error is None:
+                    self.timings.append(seconds)
+                future.set_result(ConversionResult(
+                    str(doc_path), str(pdf_path) if error is None else None, seconds, error
+                ))
+                
+                if started and worker.conversions >= self.max_conversions:
+                    worker.stop()
+                    started = False
+        finally:
+            worker.stop()
+    
+    def submit(self, doc_path, pdf_path):
+        """Encola una conversión; devuelve un Future con el ConversionResult"""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((doc_path, pdf_path, future))
+        return future
+    
+    def convert(self, doc_path, pdf_path):
+        """Convierte un documento y espera el resultado"""
+        return self.submit(doc_path, pdf_path).result()
+    
+    def close(self):
+        """Detiene los trabajadores y cierra LibreOffice"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(None)
+        for thread in threads:
+            thread.join()
+
+
+def combine_document_xml(xmls, bookmarks):
+    """
+    Une el cuerpo de varios word/document.xml generados con la misma plantilla en uno solo.
+    
+    Cada documento queda en su propia sección (empieza en página nueva y conserva los
+    encabezados y márgenes de la plantilla) y precedido por un marcador con su nombre.
+    """
+    prefix = suffix = final_sect_pr = None
+    parts = []
+    for i, (xml, bookmark) in enumerate(zip(xmls, bookmarks)):
+        start = xml.index('<w:body>') + len('<w:body>')
+        end = xml.rindex('</w:body>')
+        content = xml[start:end]
+        
+        # El sectPr final del cuerpo define la sección; se separa del contenido
+        sect_at = content.rfind('<w:sectPr')
+        sect_pr = ''
+        if sect_at >= 0 and '</w:p>' not in content[sect_at:] and '</w:tbl>' not in content[sect_at:]:
+            content, sect_pr = content[:sect_at], content[sect_at:]
+        if i == 0:
+            prefix, suffix, final_sect_pr = xml[:start], xml[end:], sect_pr
+        
+        if i > 0:
+            # Salto de sección tras el documento anterior (o salto de página si no hay sectPr)
+            parts.append(f'<w:p><w:pPr>{previous_sect_pr}</w:pPr></w:p>' if previous_sect_pr
+                         else '<w:p><w:r><w:br w:type="page"/></w:r></w:p>')
+        bookmark_id = 900000 + i  # Lejos de los identificadores de marcadores de la plantilla
+        parts.append(f'<w:bookmarkStart w:id="{bookmark_id}" w:name="{xml_escape(xml_safe_text(bookmark))}"/>'
+                     f'<w:bookmarkEnd w:id="{bookmark_id}"/>')
+        parts.append(content)
+        previous_sect_pr = sect_pr
+    
+    return prefix + ''.join(parts) + final_sect_pr + suffix
+
+
+def write_docx_part(source_path, dest_path, part_name, data):
+    """Copia un .docx (ruta o archivo en memoria) reemplazando el contenido de una de sus partes"""
+    tmp_path = Path(dest_path).with_name(Path(dest_path).name + '.tmp')
+    with zipfile.ZipFile(source_path) as source, \
+            zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as dest:
+        for info in source.infolist():
+            dest.writestr(info, data if info.filename == part_name else source.read(info.filename),
+                          compress_type=zipfile.ZIP_DEFLATED)
+    os.replace(tmp_path, dest_path)
+
+
+def pdf_student_pages(reader, student_ids):
+    """
+    Páginas (inicio, fin) de cada estudiante en un PDF con sus boletines seguidos.
+    
+    Cada boletín muestra el ID del estudiante en su primera página, así que se busca el ID
+    de cada estudiante, en orden, en el texto de las páginas. Si algún ID no aparece y todos
+    los boletines tienen el mismo número de páginas, se reparten por igual; si no, None.
+    """
+    total = len(reader.pages)
+    starts = []
+    page = 0
+    for student_id in student_ids:
+        while page < total and student_id not in (reader.pages[page].extract_text() or ''):
+            page += 1
+        if page == total:
+            starts = None
+            break
+        starts.append(page)
+        page += 1
+    
+    if starts is None:
+        if not student_ids or total % len(student_ids):
+            return None
+        per_student = total // len(student_ids)
+        starts = list(range(0, total, per_student))
+    return list(zip(starts, starts[1:] + [total]))
+
+
+def finish_group_pdf(pdf_path, students, split_folder=None):
+    """
+    Agrega al PDF de un grupo un marcador por estudiante y, si se indica split_folder,
+    lo separa en un PDF por estudiante. Necesita pypdf.
+    
+    Args:
+        students (list): Tuplas (student_id, título del marcador, nombre del PDF separado)
+        
+    Returns:
+        list: Rutas de los PDF separados (vacía si no se separó)
+    """
+    from pypdf import PdfReader, PdfWriter
+    
+    reader = PdfReader(pdf_path)
+    pages = pdf_student_pages(reader, [student_id for student_id, _, _ in students])
+    if pages is None:
+        raise ValueError("No se pudieron ubicar las páginas de cada estudiante en el PDF")
+    
+    writer = PdfWriter(clone_from=reader)
+    for (_, title, _), (start, _) in zip(students, pages):
+        writer.add_outline_item(title, start)
+    writer.page_mode = '/UseOutlines'
+    tmp_path = Path(pdf_path).with_name(Path(pdf_path).name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        writer.write(f)
+    os.replace(tmp_path, pdf_path)
+    
+    split = []
+    if split_folder is not None:
+        for (_, _, filename), (start, end) in zip(students, pages):
+            part = PdfWriter()
+            for page in reader.pages[start:end]:
+                part.add_page(page)
+            path = Path(split_folder) / filename
+            with open(path, 'wb') as f:
+                part.write(f)
+            split.append(str(path))
+    return split
+
+
+RENDER_BACKENDS = {
+    StampRenderBackend.name: StampRenderBackend,
+    DocxRenderBackend.name: DocxRenderBackend,
+    WordComRenderBackend.name: WordComRenderBackend,
+}
+
+
+def write_bytes_atomic(path, data):
+    """Escribe data en path a través de un archivo temporal, para no dejar archivos a medias"""
+    path = Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+    return path
+
+
+def write_json_atomic(path, data, indent=2):
+    """Escribe data como JSON (UTF-8, sin escapar tildes) con el mismo reemplazo atómico de write_bytes_atomic"""
+    return write_bytes_atomic(path, json.dumps(data, ensure_ascii=False, indent=indent).encode('utf-8'))
+
+
+class RenderedBulletin(namedtuple('RenderedBulletin', ['student_id', 'grado', 'filename', 'docx', 'pdf'])):
+    """Boletín generado en memoria: bytes del .docx y del PDF (o None) y nombre base del archivo"""
+    __slots__ = ()
+    
+    def save(self, folder):
+        """Escribe el boletín en la carpeta y devuelve las rutas como process_student"""
+        folder = Path(folder)
+        folder.mkdir(parents=True, exist_ok=True)
+        with timed_stage('write'):
+            word_path = write_bytes_atomic((folder / f"{self.filename}.docx").resolve(), self.docx)
+            pdf_path = None
+            if self.pdf is not None:
+                pdf_path = write_bytes_atomic((folder / f"{self.filename}.pdf").resolve(), self.pdf)
+        return {'word': str(word_path), 'pdf': str(pdf_path) if pdf_path else None}
+
+
+BulletinData = namedtuple(
+    'BulletinData', ['entry', 'student_row', 'filename', 'replacements', 'areas_mapping']
+)
+
+
+class Notador:
+    def __init__(self):
+        self.excel_path = None
+        self.word_template = None
+        self.output_folder = None
+        self.debug = False  # Deshabilitar mensajes de debug
+        
+        # Planes de llenado precompilados por plantilla
+        self.template_compiler = TemplateCompiler()
+        self._area_matches = {}  # (áreas del Excel, hash de plantilla, hash del mapeo) -> AreaMatch
+        
+        # Motor de renderizado: 'stamp' (XML directo), 'docx' (python-docx) o 'word' (Word por COM)
+        self.render_backend = 'stamp'
+        self._render_backend = None
+        
+        # Procesos para generar boletines en paralelo (1 = uno tras otro)
+        self.workers = 1
+        
+        # Formatos de salida: el .docx siempre se genera; el PDF es opcional
+        self.output_formats = {'docx', 'pdf'}
+        
+        # Regeneración incremental: el manifiesto de la carpeta de salida indica qué boletines
+        # ya están al día (misma fila del Excel, misma plantilla y misma configuración)
+        self.incremental = True
+        self.manifest_name = 'manifiesto_boletines.json'
+        
+        # Documentos por grupo: separar también el PDF combinado en un PDF por estudiante
+        self.split_group_pdf = False
+        
+        # Reporte JSON de cada lote (tiempos por etapa y pico de memoria) en la carpeta de salida
+        self.run_report_name = 'reporte_ejecucion.json'
+        self.last_report = None
+        
+        # Validación previa de los datos y de la plantilla (escala de notas aceptada)
+        self.grade_range = GRADE_RANGE
+        self.last_validation = None
+        self._validations = {}  # (libro, hojas, plantilla, configuración) -> ValidationReport
+        
+        # Conversión a PDF: trabajadores de LibreOffice abiertos y conversiones antes de reiniciarlos
+        self.pdf_workers = 2
+        self.pdf_max_conversions = 200
+        self.pdf_timeout = PDF_TIMEOUT  # Segundos por conversión antes de matar a LibreOffice
+        self._converter_pool = None
+        
+        # Diario del lote en la carpeta de salida (permite reanudar un lote interrumpido),
+        # intentos por boletín y límite por boletín en los procesos trabajadores. Con un solo
+        # proceso el boletín corre en este mismo proceso y no se puede interrumpir: ahí sólo
+        # rige el límite de la conversión a PDF (pdf_timeout)
+        self.journal_name = 'diario_lote.jsonl'
+        self.max_attempts = 2
+        self.document_timeout = DOCUMENT_TIMEOUT
+        
+        # Caché compartida de hojas de Excel (una lectura por hoja y por versión del archivo),
+        # respaldada por una caché en disco para no volver a leer el .xlsx entre sesiones
+        # (ver set_disk_cache para desactivarla)
+        self.workbook_cache = WorkbookCache(self.parse_student_info)
+        self.set_disk_cache(True)
+        
+        # Mapeo de áreas entre Excel y Word
+        # Sirve de pista para emparejar las áreas (ver AreaMatcher); no tiene que coincidir exactamente
+        self.areas_mapping = {
+            'Investigación': 'Introducción a la investigación Formativa',  # Nombre del área en el Word
+            'Ciencias Naturales': 'Ciencias Naturales y Educación Ambiental',
+            'Ciencias Sociales': 'Ciencias Sociales, Historia, Geografía, Constitución Política y Democracia',
+            'Educ, Artística': 'Educación Artística y Cultural',
+            'Edu, Ética': 'Educación Ética y en Valores Humanos',
+            'Edu, física': 'Educación Física, Recreación y Deportes',
+            'Edu, Religiosa': 'Educación Religiosa',
+            'Lengua Castellana': 'Humanidades, Lengua Castellana',
+            'Matemáticas': 'Matemáticas',
+            'Tecnología e informatica': 'Tecnología e Informática',
+            'Inglés': 'Humanidades, idioma extranjero (inglés)'
+        }
+        
+        # Mapeo de campos de Word - usando los textos exactos del documento
+        self.word_fields_mapping = {
+            'periodo': ['PERÍODO'],  # Solo la versión exacta que está en el documento
+            'grado': ['GRADO'],
+            'grupo': ['GRUPO'],
+            'nombre_completo': ['NOMBRE Y APELLIDOS COMPLETOS DEL ESTUDIANTE:'],  # Con los dos puntos
+            'id': ['ID INSTITUCIONAL'],
+            'materias_perdidas': ['Número de áreas o asignaturas con nota no aprobatoria'],
+            'promedio': ['Promedio Académico']
+        }
+        
+        # Mapeo para las notas de las áreas
+        self.word_area_grade_format = '[NOTA DEL PERIODO]'  # Se usará como sufijo para cada área
+        
+    def set_excel_file(self, excel_path):
+        """Establece el archivo Excel a usar"""
+        if not Path(excel_path).exists():
+            raise FileNotFoundError(f"El archivo Excel {excel_path} no existe")
+        self.excel_path = excel_path
+        
+    def set_word_template(self, word_path):
+        """Establece la plantilla Word a usar"""
+        if not Path(word_path).exists():
+            raise FileNotFoundError(f"La plantilla Word {word_path} no existe")
+        self.word_template = word_path
+        
+    def set_output_folder(self, folder_path):
+        """Establece la carpeta de salida para los boletines"""
+        self.output_folder = Path(folder_path)
+    
+    def get_workbook(self):
+        """Devuelve la instantánea en caché del archivo Excel actual"""
+        if not self.excel_path:
+            raise ValueError("No se ha seleccionado un archivo Excel")
+        return self.workbook_cache.get(self.excel_path)
+    
+    def get_sheet(self, grado):
+        """Devuelve los datos ya normalizados de la hoja de un grado"""
+        return self.get_workbook().get_sheet(grado)
+    
+    def get_student_index(self, grado, callback=None):
+        """Devuelve el índice ID -> fila de la hoja, reportando IDs duplicados al construirlo"""
+        index, built = self.get_workbook().get_index(grado)
+        if built and index.duplicates and callback:
+            for student_id, positions in index.duplicates.items():
+                # Las posiciones se reportan como filas de Excel (encabezado en la fila 1)
+                rows = ', '.join(str(position + 2) for position in positions)
+                report(callback, 'index',
+                       f"⚠ ID duplicado {student_id} en la hoja {grado} (filas {rows}); se usará la primera",
+                       student=student_id, level='warning')
+        return index
+    
+    def prefetch_sheets(self, callback=None):
+        """Lee en segundo plano las hojas que falten y construye sus índices (reporta duplicados)"""
+        def on_loaded(grado):
+            index = self.get_student_index(grado, callback)
+            size = self.get_sheet(grado).nbytes / 1024
+            report(callback, 'load', f"📄 Hoja {grado} cargada ({len(index)} estudiantes, {size:.0f} KB)")
+        
+        def on_error(grado, error):
+            where = f"la hoja {grado}" if grado else "el archivo Excel"
+            report(callback, 'load', f"⚠ No se pudo leer {where}: {error}", level='warning')
+        
+        return self.get_workbook().prefetch(on_loaded, on_error)
+    
+    def get_sheet_stats(self, grado):
+        """Devuelve el promedio y las materias perdidas de todos los estudiantes de la hoja"""
+        return self.get_workbook().get_stats(grado)
+    
+    def memory_report(self, compare=True):
+        """Memoria de las hojas cargadas del Excel actual (ver WorkbookSnapshot.memory_report)"""
+        return self.get_workbook().memory_report(compare)
+    
+    def set_disk_cache(self, enabled):
+        """
+        Activa o desactiva la caché en disco de las hojas, que guarda los nombres y las notas
+        de los estudiantes en la carpeta del usuario. Con NOTADOR_CACHE_DIR vacía queda
+        desactivada aunque enabled sea True.
+        """
+        directory = default_cache_dir() if enabled else None
+        self.workbook_cache.disk_cache = SheetDiskCache(directory) if directory else None
+        self.workbook_cache.invalidate()  # Las instantáneas ya abiertas usan la caché anterior
+    
+    def invalidate_workbook(self):
+        """Descarta los datos en caché del Excel actual (p. ej. si el archivo cambió en disco)"""
+        if self.excel_path:
+            self.workbook_cache.invalidate(self.excel_path)
+    
+    def get_excel_areas(self, grado=None):
+        """Obtiene las áreas de la hoja de un grado (por defecto, de la primera hoja)"""
+        workbook = self.get_workbook()
+        return workbook.get_schema(workbook.sheet_names[0] if grado is None else grado).subjects
+    
+    def get_schema(self, grado):
+        """Devuelve la clasificación de las columnas de la hoja de un grado"""
+        return self.get_workbook().get_schema(grado)
+
+    def get_word_areas(self):
+        """Obtiene las áreas de la tabla de ÁREAS de la plantilla Word"""
+        if not self.word_template:
+            raise ValueError("No se ha seleccionado una plantilla Word")
+        return [area for _, _, _, area in self.template_compiler.get_area_rows(self.word_template)]
+    
+    def find_and_replace_in_doc(self, doc, placeholder, value):
+        """Busca y reemplaza texto en todo el documento Word"""
+        for paragraph in doc.paragraphs:
+            if placeholder in paragraph.text:
+                for run in paragraph.runs:
+                    run.text = run.text.replace(placeholder, str(value))
+                    
+        for table in doc.tables:
+            for row in table.rows:
+                for cell in row.cells:
+                    for paragraph in cell.paragraphs:
+                        if placeholder in paragraph.text:
+                            for run in paragraph.runs:
+                                run.text = run.text.replace(placeholder, str(value))
+                                
+    def get_render_backend(self):
+        """Devuelve el motor de renderizado configurado, creándolo la primera vez"""
+        if self._render_backend is None or self._render_backend.name != self.render_backend:
+            if self.render_backend not in RENDER_BACKENDS:
+                raise ValueError(f"Motor de renderizado desconocido: {self.render_backend}")
+            self._render_backend = RENDER_BACKENDS[self.render_backend]()
+            self._render_backend.converter = self.get_converter_pool()
+        return self._render_backend
+    
+    def get_converter_pool(self):
+        """Devuelve el grupo de conversores a PDF (los procesos se lanzan con la primera conversión)"""
+        if self._converter_pool is None:
+            self._converter_pool = ConverterPool(self.pdf_workers, self.pdf_max_conversions, self.pdf_timeout)
+        return self._converter_pool
+    
+    def close(self):
+        """Libera los procesos de conversión a PDF"""
+        if self._converter_pool is not None:
+            self._converter_pool.close()
+            self._converter_pool = None
+            self._render_backend = None
+    
+    def set_render_backend(self, name):
+        """Selecciona el motor de renderizado ('stamp', 'docx' o 'word')"""
+        if name not in RENDER_BACKENDS:
+            raise ValueError(f"Motor de renderizado desconocido: {name}")
+        self.render_backend = name
+    
+    def get_fill_plan(self, areas_mapping=None):
+        """Devuelve el plan de llenado de la plantilla actual (se compila una vez por plantilla)"""
+        if areas_mapping is None:
+            areas_mapping = self.get_areas_mapping()
+        labels = [variant for variants in self.word_fields_mapping.values() for variant in variants]
+        return self.template_compiler.get_plan(self.word_template, labels, areas_mapping)
+    
+    def process_word_document(self, doc_path, pdf_path, replacements, student_row, callback=None, areas_mapping=None):
+        """
+        Procesa un documento Word, realizando los reemplazos necesarios y llenando las notas.
+        Guarda el documento en formato Word y PDF usando el motor de renderizado configurado.
+        
+        Args:
+            doc_path (str): Ruta al documento Word
+            pdf_path (str): Ruta donde se guardará el PDF
+            replacements (dict): Diccionario con los textos a buscar y reemplazar
+            student_row (Series): Fila del DataFrame con los datos del estudiante
+            callback (callable, optional): Función para reportar progreso
             
-            # Constantes de Word para PDF
-            wdFormatPDF = 17  # Formato PDF
-            doc.SaveAs2(pdf_path, FileFormat=wdFormatPDF)
+        Returns:
+            str: Ruta del PDF generado, o None si no se pudo generar
+        """
+        # Use the provided mapping if given, otherwise resolve the configured one against the template
+        mapping_to_use = areas_mapping
+        if mapping_to_use is None:
+            mapping_to_use = self.get_areas_mapping() if self.word_template else self.areas_mapping
+        
+        plan = self.get_fill_plan(mapping_to_use) if self.word_template else None
+        return self.get_render_backend().render(
+            doc_path, pdf_path, replacements, student_row, mapping_to_use, callback, plan=plan,
+            template_path=self.word_template
+        )
+        
+    def map_areas(self, grado=None):
+        """Crea un mapeo entre las áreas de Excel (de la hoja del grado o de la primera) y Word"""
+        if grado is None:
+            grado = self.get_workbook().sheet_names[0]
+        return self.resolve_areas(grado)
+    
+    def resolve_areas(self, grado=None):
+        """
+        Empareja las áreas de la hoja del grado con las filas de la tabla de ÁREAS de la plantilla.
+        Sin grado se emparejan las áreas de areas_mapping. El resultado se guarda por combinación
+        de columnas del Excel, plantilla y mapeo configurado.
+        
+        Returns:
+            AreaMatch: mapping (área del Excel -> fila de la plantilla), scores y áreas sin pareja
+        """
+        excel_areas = tuple(self.get_excel_areas(grado) if grado is not None else self.areas_mapping)
+        template_hash = self.template_compiler.template_hash(self.word_template)
+        key = (excel_areas, template_hash, TemplateCompiler.config_hash([], self.areas_mapping))
+        if key not in self._area_matches:
+            self._area_matches[key] = AreaMatcher(self.areas_mapping).match(
+                list(excel_areas), self.get_word_areas()
+            )
+        return self._area_matches[key]
+    
+    def get_areas_mapping(self, grado=None):
+        """Mapeo área del Excel -> fila de la plantilla que se usa para los boletines del grado"""
+        mapping = self.resolve_areas(grado).mapping
+        try:
+            grado_int = int(str(grado).strip())
+        except Exception:
+            grado_int = None
+        
+        # If the grade is 8, exclude the 'Investigación' area from mapping
+        if grado_int == 8:
+            mapping = {k: v for k, v in mapping.items() if k != 'Investigación'}
+        return mapping
+    
+    def validate(self, grados=None, callback=None):
+        """
+        Revisa los datos y la plantilla antes de generar: IDs mal escritos o repetidos,
+        notas no numéricas, fuera de la escala o con problemas de coma decimal, estudiantes
+        sin grupo, y áreas sin pareja entre el Excel y la plantilla. Cada hoja se revisa con
+        operaciones por columna; el resultado se guarda mientras no cambien el libro, la
+        plantilla ni la configuración.
+        
+        Args:
+            grados (list, optional): Hojas a revisar; por defecto todas las de grado
+            callback (callable, optional): Recibe cada problema como evento de progreso
             
-            # Cerrar el documento
-            doc.Close()
-        finally:
-            word.Quit()
+        Returns:
+            ValidationReport: Problemas encontrados (también queda en self.last_validation)
+        """
+        workbook = self.get_workbook()
+        if grados is None:
+            grados = workbook.grade_names()
+        grados = list(dict.fromkeys(str(grado) for grado in grados))
+        template = self.word_template if self.word_template and Path(self.word_template).exists() else None
+        key = (workbook.key, tuple(grados), self.template_compiler.template_hash(template) if template else None,
+               self.config_hash(), tuple(self.grade_range))
         
-    def map_areas(self):
-        """Crea un mapeo entre las áreas de Excel y Word"""
-        excel_areas = self.get_excel_areas()
-        word_areas = self.get_word_areas()
+        validation = self._validations.get(key)
+        if validation is None:
+            validation = self._validate(workbook, grados, template)
+            self._validations[key] = validation
+        self.last_validation = validation
         
-        # Aquí se implementará la lógica para mapear áreas similares
-        # Por ejemplo: "Ed. Fisica" -> "Educacion Fisica Recreacion y Deportes"
-        # Se podría usar fuzzy matching o reglas predefinidas
+        for issue in validation.issues:
+            report(callback, 'validate', f"{'❌' if issue.level == 'error' else '⚠'} {validation.describe(issue)}",
+                   level=issue.level)
+        report(callback, 'batch', f"🔎 Validación: {len(validation.errors)} errores y "
+                                  f"{len(validation.warnings)} advertencias ({validation.seconds:.2f} s)")
+        return validation
+    
+    def _validate(self, workbook, grados, template):
+        validation = ValidationReport()
+        started = time.perf_counter()
         
-    def calculate_academic_stats(self, student_row):
-        """Calcula estadísticas académicas: promedio y número de materias perdidas"""
-        # Set para debug - guardar qué columnas se usaron
-        used_columns = []
+        word_areas = None
+        if template is not None:
+            try:
+                word_areas = self.get_word_areas()
+            except Exception as e:
+                validation.add('error', None, 'template', f"Plantilla: {e}")
+        else:
+            validation.add('warning', None, 'template', "No se ha seleccionado la plantilla Word")
         
-        # Columnas administrativas a excluir (incluyendo variantes comunes)
-        admin_columns = {
-            'estudiante', 'ESTUDIANTE', 
-            'GRUPO', 'grupo',
-            'PERIODO', 'periodo', 'PERÍODO',
-            'Promedio', 'PROMEDIO', 'promedio',
-            'Mención de honor', 'MENCION DE HONOR',
-            'OBSERVACIONES', 'observaciones',
-            'GRADO', 'grado',
-            'Areas deficitadas', 'AREAS DEFICITADAS', 'Áreas deficitadas',
-            'areas deficitadas', 'Areas perdidas', 'AREAS PERDIDAS'
-        }
+        sheet_ids = {}
+        for grado in grados:
+            try:
+                df = workbook.get_sheet(grado)
+                schema = workbook.get_schema(grado)
+            except Exception as e:
+                validation.add('error', grado, 'sheet', f"No se pudo leer la hoja: {e}")
+                continue
+            validation.sheets.append(grado)
+            sheet_ids[grado] = validate_sheet(validation, grado, df, schema, self.grade_range)
+            
+            if word_areas is not None:
+                match = self.resolve_areas(grado)
+                for area in match.unmapped_excel:
+                    validation.add('warning', grado, 'areas', f"El área '{area}' del Excel no tiene fila en la "
+                                                              f"plantilla; su nota no aparecerá", area)
+                if match.unmapped_word:
+                    validation.add('warning', grado, 'areas', f"Filas de la plantilla sin área en el Excel: "
+                                                              f"{', '.join(match.unmapped_word)}")
+        
+        # Un mismo estudiante en varias hojas
+        if len(sheet_ids) > 1:
+            all_ids = pd.concat(
+                [pd.DataFrame({'id': ids.to_numpy(), 'grado': grado}) for grado, ids in sheet_ids.items()]
+            ).drop_duplicates()
+            shared = all_ids[all_ids['id'].duplicated(keep=False)]
+            for student_id, sheets in shared.groupby('id', sort=False)['grado']:
+                validation.add('warning', None, 'duplicate',
+                               f"El ID {student_id} aparece en las hojas {', '.join(sheets)}")
+        
+        # Etiquetas de los campos que no están en la plantilla
+        if word_areas is not None:
+            try:
+                plan = self.get_fill_plan(self.get_areas_mapping(grados[0]) if sheet_ids else None)
+                found = {slot[3] for slot in plan.fields}
+                for field, variants in self.word_fields_mapping.items():
+                    if not any(variant.strip() in found for variant in variants):
+                        validation.add('warning', None, 'template',
+                                       f"La plantilla no tiene la etiqueta de '{field}' ({variants[0]})")
+            except Exception as e:
+                validation.add('error', None, 'template', f"Plantilla: {e}")
         
-        # Función para normalizar nombres
-        import unicodedata
-        def normalize_name(s):
-            if s is None:
-                return ''
-            s = str(s).strip().lower()
-            s = unicodedata.normalize('NFKD', s)
-            s = ''.join(ch for ch in s if not unicodedata.combining(ch))
-            return s
+        validation.seconds = time.perf_counter() - started
+        return validation
+    
+    def calculate_academic_stats(self, student_row, schema=None):
+        """
+        Calcula estadísticas académicas: promedio y número de materias perdidas.
+        Sólo se leen las columnas de áreas del esquema de la hoja (si no se da, se infiere de la fila).
+        """
+        if schema is None:
+            schema = SheetSchema.infer(student_row.to_frame().T)
+        subjects = set(schema.subjects)
         
-        normalized_admin = {normalize_name(c) for c in admin_columns}
+        # Columnas usadas, para el registro de depuración
+        used_columns = []
         
         notas = []
         materias_perdidas = 0
         
-        # Debug - imprimir todas las columnas
-        print("\nColumnas en student_row:")
-        for column, value in student_row.items():
-            print(f"Columna original: '{column}' -> Valor: '{value}'")
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            for column, value in student_row.items():
+                logger.debug("Columna original: '%s' -> Valor: '%s'", column, value)
         
-        print("\nProcesando notas:")
         # Iterar y recolectar notas
         for column, value in student_row.items():
-            col_norm = normalize_name(column)
-            if not col_norm or col_norm in normalized_admin:
-                print(f"Ignorando columna admin: '{column}' (normalizada: '{col_norm}')")
+            if column not in subjects:
+                if debug:
+                    logger.debug("Ignorando columna '%s' (%s)", column, schema.roles.get(column))
                 continue
                 
             try:
                 nota_str = str(value).strip().replace(',', '.')
                 if nota_str and nota_str.lower() != 'nan':
                     nota = float(nota_str)
-                    print(f"Añadiendo nota {nota} de columna '{column}'")
                     notas.append(nota)
                     used_columns.append(column)
-                    if nota < 3.5:
+                    if nota < PASSING_GRADE:
                         materias_perdidas += 1
             except (ValueError, TypeError):
-                print(f"Error convirtiendo valor '{value}' de columna '{column}'")
+                if debug:
+                    logger.debug("Error convirtiendo valor '%s' de columna '%s'", value, column)
                 continue
         
-        # Debug - mostrar resumen
-        print(f"\nResumen del cálculo:")
-        print(f"Columnas usadas ({len(used_columns)}): {', '.join(used_columns)}")
-        print(f"Total notas válidas: {len(notas)}")
-        print(f"Notas: {notas}")
-        if notas:
-            print(f"Suma: {sum(notas)}")
-            print(f"Promedio: {sum(notas) / len(notas)}")
+        if debug:
+            logger.debug("Columnas usadas (%d): %s", len(used_columns), ', '.join(map(str, used_columns)))
+            logger.debug("Notas: %s", notas)
         
-       
         promedio = round(sum(notas) / len(notas), 2) if notas else 0
         
         return promedio, materias_perdidas
@@ -892,8 +4046,7 @@ class Notador:
             return None, None, None, None
             
         # Patrón específico para ID de 9 dígitos seguido de nombre
-        pattern = r"(\d{9})\s*-\s*(.+)"
-        match = re.match(pattern, student_field)
+        match = re.match(STUDENT_PATTERN, student_field)
         if match:
             id_number = match.group(1)
             full_name = match.group(2).strip()
@@ -909,175 +4062,990 @@ class Notador:
             return id_number, full_name, apellidos, nombres
         return None, None, None, None
         
-    def process_student(self, student_id, grado, grupo, periodo=None, callback=None):
-        """Procesa la información de un estudiante y genera su documento"""
-        try:
-            # 20% - Cargar datos del Excel
-            if callback:
-                callback("⌛ Cargando datos del estudiante (20%)")
-            df = pd.read_excel(
-                self.excel_path,
-                sheet_name=str(grado),
-                header=0,
-                na_filter=False
-            )
-            df = self.normalize_column_names(df)
-            
-            # Asegurarse de que todos los datos sean strings
-            for col in df.columns:
-                df[col] = df[col].astype(str).str.strip()
-            
-            # 40% - Buscar estudiante
-            if callback:
-                callback("🔍 Localizando información del estudiante (40%)")
-            student_rows = df[df['estudiante'].apply(lambda x: str(student_id) in str(x))]
+    def prepare_student(self, student_id, grado, grupo, periodo=None, callback=None, step=None):
+        """
+        Reúne lo necesario para llenar el boletín de un estudiante: su fila del Excel, el nombre
+        base del archivo, los textos de los campos y el mapeo de áreas de su grado.
+        
+        Returns:
+            BulletinData: Datos del boletín (entry es el StudentEntry del estudiante)
+        """
+        if step is None:
+            def step(stage, message, fraction):
+                report(callback, stage, message, student=student_id, fraction=fraction)
+        
+        # 20% - Cargar datos del Excel
+        step('load', "⌛ Cargando datos del estudiante", 0.2)
+        with timed_stage('excel_load'):
+            df = self.get_sheet(grado)
+        
+        # 40% - Buscar estudiante
+        step('lookup', "🔍 Localizando información del estudiante", 0.4)
+        with timed_stage('lookup'):
+            entry = self.get_student_index(grado, callback).get(student_id)
+        
+        if entry is None:
+            raise ValueError(f"No se encontró el estudiante con ID {student_id}")
             
-            if student_rows.empty:
-                raise ValueError(f"No se encontró el estudiante con ID {student_id}")
-                
-            student_row = student_rows.iloc[0]
-                
-            # 60% - Preparar información
-            if callback:
-                callback("📋 Preparando la información (60%)")
-            _, nombre_completo, apellidos, nombres = self.parse_student_info(student_row['estudiante'])
+        student_row = df.row(entry.position)
+        student_id = entry.student_id
             
-            # Verificar que existan los recursos necesarios
-            if not self.word_template or not Path(self.word_template).exists():
-                raise ValueError("No se encontró la plantilla Word o no se ha establecido")
+        # 60% - Preparar información
+        step('prepare', "📋 Preparando la información", 0.6)
+        nombre_completo = entry.nombre_completo
+        
+        # Verificar que exista la plantilla
+        if not self.word_template or not Path(self.word_template).exists():
+            raise ValueError("No se encontró la plantilla Word o no se ha establecido")
+        
+        # Crear nombre de archivo seguro
+        safe_name = nombre_completo.replace("/", "-").replace("\\", "-")
+        base_filename = f"{student_id} - {safe_name}"
+        
+        # 75% - Calcular estadísticas académicas
+        step('stats', "📊 Calculando estadísticas académicas", 0.75)
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Datos del estudiante %s: %s", student_id, student_row.to_dict())
+        
+        with timed_stage('stats'):
+            promedio, materias_perdidas = self.get_sheet_stats(grado).at(entry.position)
+        
+        # 80% - Preparar datos
+        step('data', "✍ Preparando datos del estudiante", 0.8)
+        replacements = {}
+        for field, value in {
+            'nombre_completo': nombre_completo,
+            'id': student_id,
+            'grado': str(grado),
+            'grupo': str(grupo) if grupo else 'N/A',
+            'periodo': str(periodo) if periodo else 'N/A',
+            'materias_perdidas': str(materias_perdidas),
+            'promedio': f"{promedio:.2f}"
+        }.items():
+            for variant in self.word_fields_mapping[field]:
+                replacements[variant] = value
+        
+        return BulletinData(entry, student_row, base_filename, replacements, self.get_areas_mapping(grado))
+    
+    def render_document(self, data, callback=None):
+        """Llena la plantilla con los datos de prepare_student y devuelve los bytes del .docx"""
+        plan = self.get_fill_plan(data.areas_mapping)
+        with timed_stage('render'):
+            return self.get_render_backend().render_bytes(
+                data.replacements, data.student_row, data.areas_mapping, callback, plan=plan,
+                template_path=self.word_template
+            )
+    
+    def render_student(self, student_id, grado, grupo, periodo=None, callback=None, output_formats=('docx',)):
+        """
+        Genera el boletín de un estudiante en memoria, sin escribir en la carpeta de salida.
+        El PDF (si 'pdf' está en output_formats) se convierte a través de una carpeta temporal.
+        
+        Returns:
+            RenderedBulletin: Bytes del .docx y del PDF; save(carpeta) los escribe en disco
+        """
+        data = self.prepare_student(student_id, grado, grupo, periodo, callback)
+        docx = self.render_document(data, callback)
+        pdf = None
+        if 'pdf' in output_formats:
+            pdf = self.get_render_backend().pdf_bytes(docx, callback)
+        return RenderedBulletin(data.entry.student_id, str(grado), data.filename, docx, pdf)
+    
+    def iter_grade(self, grado, grupos=None, periodo=None, callback=None, output_formats=('docx',)):
+        """
+        Genera uno a uno, en memoria, los boletines de un grado (opcionalmente sólo de algunos grupos).
+        
+        Yields:
+            RenderedBulletin: Un boletín por estudiante, en el orden de la hoja
+        """
+        for job in self.collect_jobs([grado], grupos, periodo):
+            yield self.render_student(*job, callback=callback, output_formats=output_formats)
+    
+    def process_student(self, student_id, grado, grupo, periodo=None, callback=None, output_folder=None,
+                        output_formats=None):
+        """
+        Procesa la información de un estudiante y genera su documento.
+        output_folder y output_formats reemplazan, sólo para este boletín, la carpeta y los
+        formatos configurados (p. ej. para los documentos por grupo).
+        
+        Los motores en memoria escriben el .docx una sola vez en la carpeta de salida; el motor
+        de Word llena una copia de la plantilla ya ubicada allí.
+        """
+        output_folder = Path(output_folder) if output_folder else self.output_folder
+        output_formats = self.output_formats if output_formats is None else output_formats
+        started = time.perf_counter()
+        
+        def step(stage, message, fraction):
+            report(callback, stage, message, student=student_id, fraction=fraction,
+                   elapsed=time.perf_counter() - started)
+        
+        try:
+            data = self.prepare_student(student_id, grado, grupo, periodo, callback, step)
+            student_id = data.entry.student_id
             
-            if not self.output_folder:
+            if not output_folder:
                 raise ValueError("No se ha seleccionado una carpeta de salida para los boletines")
                 
             # Asegurarse que la carpeta existe
-            self.output_folder.mkdir(exist_ok=True)
-            
-            # 70% - Preparar archivo
-            if callback:
-                callback("📝 Preparando archivo del boletín (70%)")
-            # Crear nombre de archivo seguro
-            safe_name = nombre_completo.replace("/", "-").replace("\\", "-")
-            base_filename = f"{student_id} - {safe_name}"
-            
-            # Crear paths para Word y PDF
-            output_path_word = self.output_folder / f"{base_filename}.docx"
-            output_path_pdf = self.output_folder / f"{base_filename}.pdf"
-            
-            # Asegurar que las rutas sean absolutas
-            output_path_word = output_path_word.resolve()
-            output_path_pdf = output_path_pdf.resolve()
-            
-            # Crear una copia de la plantilla
-            import shutil
-            shutil.copy2(self.word_template, output_path_word)
-            
-            # 75% - Calcular estadísticas académicas
-            if callback:
-                callback("📊 Calculando estadísticas académicas (75%)")
-            
-            # Debug - guardar datos en archivo
-            with open('debug_notas.txt', 'w') as f:
-                f.write(f"Datos del estudiante {student_id}:\n")
-                for col, val in student_row.items():
-                    f.write(f"{col}: {val}\n")
-            
-            promedio, materias_perdidas = self.calculate_academic_stats(student_row)
+            output_folder.mkdir(exist_ok=True)
             
-            # 80% - Preparar datos
-            if callback:
-                callback("✍ Preparando datos del estudiante (80%)")
-            replacements = {}
-            for field, value in {
-                'nombre_completo': nombre_completo,
-                'id': student_id,
-                'grado': str(grado),
-                'grupo': str(grupo) if grupo else 'N/A',
-                'periodo': str(periodo) if periodo else 'N/A',
-                'materias_perdidas': str(materias_perdidas),
-                'promedio': f"{promedio:.2f}"
-            }.items():
-                for variant in self.word_fields_mapping[field]:
-                    replacements[variant] = value
+            # Crear paths absolutos para Word y PDF
+            output_path_word = (output_folder / f"{data.filename}.docx").resolve()
+            output_path_pdf = (output_folder / f"{data.filename}.pdf").resolve()
+            pdf_target = str(output_path_pdf) if 'pdf' in output_formats else None
             
             # 90% - Procesar documento
-            if callback:
-                callback("📄 Generando boletín (90%)")
-            # If the grade is 8, exclude the 'Investigación' area from mapping
-            try:
-                grado_int = int(str(grado).strip())
-            except Exception:
-                grado_int = None
-
-            areas_mapping_to_use = self.areas_mapping
-            if grado_int == 8:
-                # Create a shallow copy and remove 'Investigación' if present
-                areas_mapping_to_use = {k: v for k, v in self.areas_mapping.items() if k != 'Investigación'}
-
-            self.process_word_document(
-                str(output_path_word),
-                str(output_path_pdf),
-                replacements,
-                student_row,
-                callback,
-                areas_mapping=areas_mapping_to_use
-            )
+            step('render', "📄 Generando boletín", 0.9)
+            backend = self.get_render_backend()
+            if backend.in_memory:
+                content = self.render_document(data, callback)
+                with timed_stage('write'):
+                    write_bytes_atomic(output_path_word, content)
+                pdf_path = backend.export_pdf(str(output_path_word), pdf_target, callback) if pdf_target else None
+            else:
+                with timed_stage('template_copy'):
+                    shutil.copy2(self.word_template, output_path_word)
+                with timed_stage('render'):
+                    pdf_path = self.process_word_document(
+                        str(output_path_word), pdf_target, data.replacements, data.student_row, callback,
+                        areas_mapping=data.areas_mapping
+                    )
             
             # 100% - Finalizar
-            if callback:
-                callback("✅ Boletín completado (100%)")
+            step('done', "✅ Boletín completado", 1.0)
             
             return {
                 'word': str(output_path_word),
-                'pdf': str(output_path_pdf)
+                'pdf': pdf_path
             }
             
         except Exception as e:
-            if callback:
-                callback(f"❌ Error: {str(e)}")
+            report(callback, 'error', f"❌ Error: {str(e)}", student=student_id, level='error',
+                   elapsed=time.perf_counter() - started)
             raise
 
-    def process_all_students(self, periodo, callback=None):
-        """Procesa todos los estudiantes para un periodo dado"""
+    def process_group(self, jobs, title, callback=None, cancel_event=None, split=None):
+        """
+        Genera un solo documento con los boletines de varios estudiantes (p. ej. un grupo):
+        una sección por estudiante, que empieza en página nueva y lleva un marcador con su
+        nombre. El PDF se convierte una sola vez y, con split, se separa por estudiante.
+        
+        Args:
+            jobs (list): Tuplas (student_id, grado, grupo, periodo)
+            title (str): Nombre del documento (sin extensión)
+            split (bool, optional): Separar el PDF por estudiante; por defecto self.split_group_pdf
+            
+        Returns:
+            dict: 'word', 'pdf' (o None), 'students' (IDs incluidos) y 'split' (PDF separados)
+        """
+        if not jobs:
+            raise ValueError("No hay estudiantes para el documento del grupo")
+        if not self.output_folder:
+            raise ValueError("No se ha seleccionado una carpeta de salida para los boletines")
+        split = self.split_group_pdf if split is None else split
+        self.output_folder.mkdir(exist_ok=True)
+        started = time.perf_counter()
+        
+        safe_title = title.replace("/", "-").replace("\\", "-")
+        word_path = (self.output_folder / f"{safe_title}.docx").resolve()
+        pdf_path = (self.output_folder / f"{safe_title}.pdf").resolve()
+        
+        # Cada boletín se genera sólo en .docx, en memoria, y luego se unen
+        students = []
+        xmls = []
+        first = None
+        for i, job in enumerate(jobs):
+            if cancel_event is not None and cancel_event.is_set():
+                raise RuntimeError("Procesamiento cancelado")
+            bulletin = self.render_student(*job)
+            if first is None:
+                first = bulletin.docx
+            with zipfile.ZipFile(io.BytesIO(bulletin.docx)) as archive:
+                xmls.append(archive.read(DocxStamper.PART_NAME).decode('utf-8'))
+            entry = self.get_student_index(job[1]).get(job[0])
+            students.append((entry.student_id, entry.nombre_completo, f"{bulletin.filename}.pdf"))
+            report(callback, 'render', f"📄 {entry.nombre_completo}", student=entry.student_id,
+                   fraction=(i + 1) / len(jobs), elapsed=time.perf_counter() - started)
+        
+        with timed_stage('render'):
+            combined = combine_document_xml(xmls, [f"alumno_{student_id}" for student_id, _, _ in students])
+            write_docx_part(io.BytesIO(first), word_path, DocxStamper.PART_NAME, combined.encode('utf-8'))
+        report(callback, 'render', f"📚 Documento de {len(students)} estudiantes: {word_path}")
+        
+        result = {'word': str(word_path), 'pdf': None, 'students': [student[0] for student in students],
+                  'split': []}
+        if 'pdf' not in self.output_formats:
+            return result
+        
+        # Una sola conversión a PDF para todo el grupo
+        result['pdf'] = self.get_render_backend().export_pdf(str(word_path), str(pdf_path), callback)
+        if result['pdf']:
+            try:
+                result['split'] = finish_group_pdf(
+                    result['pdf'], [(student_id, f"{nombre} ({student_id})", filename)
+                                    for student_id, nombre, filename in students],
+                    self.output_folder if split else None
+                )
+            except ImportError:
+                report(callback, 'pdf', "⚠ Instale pypdf para agregar los marcadores y separar el PDF",
+                       level='warning')
+            except ValueError as e:
+                report(callback, 'pdf', f"⚠ {e}", level='warning')
+        return result
+    
+    def process_groups(self, jobs, callback=None, cancel_event=None, split=None):
+        """
+        Genera un documento por cada grado y grupo presentes en jobs (ver process_group).
+        
+        Returns:
+            list: Un diccionario por grupo con 'grado', 'grupo', 'ok', 'result' o 'error'
+        """
+        groups = {}
+        for job in jobs:
+            groups.setdefault((str(job[1]), job[2]), []).append(job)
+        self.validate([grado for grado, _ in groups], callback)
+        
+        results = []
+        started = time.perf_counter()
+        for done, ((grado, grupo), group_jobs) in enumerate(groups.items(), start=1):
+            if cancel_event is not None and cancel_event.is_set():
+                report(callback, 'batch', "⏹ Procesamiento cancelado", level='warning')
+                break
+            title = f"Grado {grado} - Grupo {grupo}"
+            report(callback, 'batch', f"📚 {title}: {len(group_jobs)} estudiantes")
+            try:
+                result = self.process_group(group_jobs, title, callback, cancel_event, split)
+                results.append({'grado': grado, 'grupo': grupo, 'ok': True, 'result': result, 'error': None})
+                report(callback, 'batch', f"✅ {title} listo", fraction=done / len(groups),
+                       elapsed=time.perf_counter() - started)
+            except Exception as e:
+                results.append({'grado': grado, 'grupo': grupo, 'ok': False, 'result': None, 'error': str(e)})
+                report(callback, 'batch', f"❌ Error con {title}: {e}", fraction=done / len(groups),
+                       elapsed=time.perf_counter() - started, level='error')
+        return results
+    
+    def worker_config(self, grados):
+        """Configuración que recibe cada proceso trabajador, con las hojas ya leídas"""
+        workbook = self.get_workbook()
+        sheets = {str(grado): workbook.get_sheet(grado) for grado in grados}
+        schemas = {grado: workbook.get_schema(grado) for grado in sheets}
+        # Las áreas se emparejan una vez aquí y no en cada proceso
+        for grado in sheets:
+            self.resolve_areas(grado)
+        return {
+            'excel_path': self.excel_path,
+            'workbook_key': workbook.key,
+            'sheet_names': workbook.sheet_names,
+            'sheets': sheets,
+            'schemas': schemas,
+            'word_template': self.word_template,
+            'output_folder': str(self.output_folder) if self.output_folder else None,
+            'render_backend': self.render_backend,
+            'output_formats': sorted(self.output_formats),
+            'areas_mapping': self.areas_mapping,
+            'area_matches': dict(self._area_matches),
+            'word_fields_mapping': self.word_fields_mapping,
+            'pdf_max_conversions': self.pdf_max_conversions,
+            'pdf_timeout': self.pdf_timeout,
+        }
+    
+    def config_hash(self):
+        """Hash de la configuración que afecta el contenido de los boletines"""
+        config = json.dumps(
+            [self.word_fields_mapping, list(self.areas_mapping.items()), self.render_backend],
+            ensure_ascii=False, sort_keys=True
+        )
+        return hashlib.sha1(config.encode('utf-8')).hexdigest()
+    
+    def job_inputs(self, jobs):
+        """Entradas de las que depende el boletín de cada trabajo, para compararlas con el manifiesto"""
+        workbook = self.get_workbook()
+        template_hash = self.template_compiler.template_hash(self.word_template)
+        config_hash = self.config_hash()
+        inputs = []
+        for student_id, grado, grupo, periodo in jobs:
+            entry = self.get_student_index(grado).get(student_id)
+            row_hash = workbook.get_row_hashes(grado)[entry.position] if entry else None
+            inputs.append({
+                'row': row_hash,
+                'grupo': str(grupo) if grupo else 'N/A',
+                'periodo': str(periodo) if periodo else 'N/A',
+                'template': template_hash,
+                'config': config_hash,
+            })
+        return inputs
+    
+    def _plan_incremental(self, jobs, force, callback):
+        """
+        Separa los trabajos cuyos boletines ya están al día según el manifiesto.
+        
+        Returns:
+            tuple: (manifiesto o None, trabajos pendientes, resultados de los omitidos,
+                    entradas por clave del manifiesto)
+        """
+        if not (self.incremental and self.manifest_name and self.output_folder and self.word_template):
+            return None, list(jobs), [], {}
+        
+        self.output_folder.mkdir(exist_ok=True)
+        manifest = OutputManifest(self.output_folder / self.manifest_name)
+        pdf_available = 'pdf' not in self.output_formats or self.get_render_backend().pdf_available
+        pending, skipped, inputs_by_key = [], [], {}
+        for job, inputs in zip(jobs, self.job_inputs(jobs)):
+            key = manifest.key(job[0], job[1])
+            inputs_by_key[key] = inputs
+            if not force and inputs['row'] is not None and manifest.is_current(key, inputs, self.output_formats,
+                                                                                pdf_available):
+                skipped.append({'student_id': job[0], 'grado': job[1], 'ok': True, 'skipped': True,
+                                'result': manifest.outputs(key), 'error': None, 'seconds': 0.0, 'timings': {}})
+            else:
+                pending.append(job)
+        if skipped:
+            report(callback, 'batch',
+                   f"⏭ {len(skipped)} boletines sin cambios; se generarán {len(pending)}")
+        return manifest, pending, skipped, inputs_by_key
+    
+    @staticmethod
+    def _record_results(manifest, inputs_by_key, results):
+        """Actualiza el manifiesto con los boletines generados (los fallidos se quitan)"""
+        for result in results:
+            key = manifest.key(result['student_id'], result['grado'])
+            if result['ok']:
+                manifest.update(key, inputs_by_key[key], result['result'])
+            else:
+                manifest.discard(key)
+        manifest.save()
+    
+    def process_students(self, jobs, workers=None, callback=None, cancel_event=None, pause_event=None, force=False,
+                         journal=None):
+        """
+        Genera los boletines de una lista de estudiantes, en paralelo si workers > 1.
+        Omite los estudiantes cuyos boletines ya están al día según el manifiesto de la
+        carpeta de salida, salvo con force=True.
+        El estado de cada boletín queda en el diario del lote (ver BatchJournal), de modo que
+        un lote interrumpido se puede continuar con resume(). Un boletín que falla no detiene
+        el lote: se reintenta hasta self.max_attempts veces si el error puede ser pasajero.
+        Al terminar escribe el reporte de la ejecución (tiempos por etapa y memoria) en
+        la carpeta de salida y lo deja en self.last_report.
+        
+        Args:
+            jobs (list): Tuplas (student_id, grado, grupo, periodo)
+            workers (int, optional): Número de procesos; por defecto self.workers
+            callback (callable, optional): Función para reportar progreso
+            cancel_event (threading.Event, optional): Al activarse no se inician más boletines
+            pause_event (threading.Event, optional): Mientras esté activo no se inician más boletines
+            force (bool, optional): Regenerar todos aunque no hayan cambiado
+            journal (BatchJournal, optional): Diario de un lote que se reanuda; por defecto se
+                                              crea uno nuevo en la carpeta de salida
+            
+        Returns:
+            list: Un diccionario por estudiante con 'ok', 'result' o 'error' (y 'skipped' si se
+                  omitió); primero los omitidos y luego los generados en el orden de jobs
+        """
+        run_report = RunReport()
+        self.validate([job[1] for job in jobs], callback)
+        manifest, pending, skipped, inputs_by_key = self._plan_incremental(jobs, force, callback)
+        if journal is None:
+            journal = self.open_journal(pending)
+        elif skipped:
+            # Al reanudar, los boletines que ya estaban al día también quedan terminados
+            skipped_keys = {OutputManifest.key(result['student_id'], result['grado']) for result in skipped}
+            for job in jobs:
+                if journal.key(job) in skipped_keys:
+                    journal.record(job, 'rendered', skipped=True)
+        try:
+            results = self._run_jobs(pending, workers, callback, cancel_event, pause_event, journal)
+        finally:
+            if journal is not None:
+                journal.close()
+        if manifest is not None:
+            self._record_results(manifest, inputs_by_key, results)
+        results = skipped + results
+        for result in results:
+            run_report.add(result)
+        
+        self.last_report = run_report.summary()
+        if self.output_folder and self.run_report_name:
+            try:
+                self.output_folder.mkdir(exist_ok=True)
+                path = run_report.write(self.output_folder / self.run_report_name)
+                report(callback, 'batch', f"📈 Reporte de ejecución: {path}")
+            except OSError as e:
+                report(callback, 'batch', f"⚠ No se pudo escribir el reporte de ejecución: {e}", level='warning')
+        return results
+    
+    def journal_config(self):
+        """Configuración del lote que guarda el diario para poder reanudarlo"""
+        return {
+            'excel_path': str(Path(self.excel_path).resolve()) if self.excel_path else None,
+            'word_template': str(Path(self.word_template).resolve()) if self.word_template else None,
+            'render_backend': self.render_backend,
+            'output_formats': sorted(self.output_formats),
+        }
+    
+    def open_journal(self, jobs):
+        """Crea el diario de un lote nuevo en la carpeta de salida; None si no hay dónde escribirlo"""
+        if not (self.journal_name and self.output_folder):
+            return None
+        self.output_folder.mkdir(exist_ok=True)
+        journal = BatchJournal(self.output_folder / self.journal_name)
+        journal.start(self.journal_config(), jobs)
+        return journal
+    
+    def resume(self, workers=None, callback=None, cancel_event=None, pause_event=None):
+        """
+        Continúa el lote interrumpido cuyo diario está en la carpeta de salida: genera sólo los
+        boletines que no terminaron (en cola, a medio generar o fallidos), con la misma
+        configuración de archivos, motor y formatos del lote original.
+        
+        Returns:
+            list: Los resultados de process_students ([] si no quedaba nada pendiente)
+        """
+        if not (self.output_folder and self.journal_name):
+            raise ValueError("No se ha seleccionado una carpeta de salida para los boletines")
+        journal = BatchJournal(self.output_folder / self.journal_name)
+        config, jobs = journal.unfinished()
+        if config is None:
+            raise ValueError(f"No hay un lote para reanudar en {self.output_folder}")
+        
+        self.set_excel_file(config['excel_path'])
+        self.set_word_template(config['word_template'])
+        self.set_render_backend(config['render_backend'])
+        self.output_formats = set(config['output_formats'])
+        if not jobs:
+            report(callback, 'batch', "✅ El lote ya estaba completo; no hay boletines pendientes")
+            return []
+        
+        report(callback, 'batch', f"🔁 Reanudando el lote: {len(jobs)} boletines pendientes")
+        journal.compact()
+        return self.process_students(jobs, workers, callback=callback, cancel_event=cancel_event,
+                                     pause_event=pause_event, journal=journal)
+    
+    def _run_jobs(self, jobs, workers, callback, cancel_event, pause_event, journal=None):
+        workers = max(1, int(workers or self.workers))
+        total = len(jobs)
+        results = [None] * total
+        attempts = [0] * total
+        waiting = deque(range(total))  # Índices de los trabajos por iniciar (incluye reintentos)
+        started = time.perf_counter()
+        done_count = 0
+        
+        def cancelled():
+            return cancel_event is not None and cancel_event.is_set()
+        
+        def paused():
+            return pause_event is not None and pause_event.is_set() and not cancelled()
+        
+        def finish(i, result):
+            """Registra un intento; si falló por algo pasajero y quedan intentos, vuelve a la cola"""
+            nonlocal done_count
+            attempts[i] += 1
+            if journal is not None:
+                journal.record_result(jobs[i], result, attempts[i])
+            if not result['ok'] and result.get('retryable') and attempts[i] < self.max_attempts and not cancelled():
+                report(callback, 'batch', f"🔁 Reintentando {result['student_id']} "
+                                          f"({attempts[i]}/{self.max_attempts}): {result['error']}",
+                       student=result['student_id'], level='warning')
+                waiting.append(i)
+                return
+            results[i] = result
+            done_count += 1
+            self._report_result(result, done_count, total, callback, started)
+        
+        if workers == 1:
+            while waiting:
+                while paused():
+                    time.sleep(0.1)
+                if cancelled():
+                    break
+                i = waiting.popleft()
+                finish(i, _run_student_job(self, jobs[i]))
+            if cancelled():
+                report(callback, 'batch', "⏹ Procesamiento cancelado", level='warning',
+                       elapsed=time.perf_counter() - started)
+            return [result for result in results if result is not None]
+        
+        report(callback, 'batch', f"⚙ Iniciando {workers} procesos de generación", fraction=0.0)
+        config = self.worker_config(sorted({str(job[1]) for job in jobs}))
+        
+        def new_executor():
+            # Cada proceso avisa por started_queue su PID al iniciar y cuándo empieza de verdad un
+            # boletín; una cola nueva por grupo, porque terminar un proceso mientras escribe en
+            # ella la puede dañar
+            started_queue = multiprocessing.Queue()
+            return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                       initargs=(config, started_queue)), started_queue
+        
+        def close_queue(started_queue):
+            started_queue.close()
+            started_queue.join_thread()
+        
+        executor, started_queue = new_executor()
+        submissions = itertools.count()
+        try:
+            # Se envían pocos trabajos por adelantado para poder pausar y cancelar sin esperar la cola
+            futures = {}  # Future -> (índice del trabajo, número de envío)
+            running_since = {}  # Número de envío -> momento en que un proceso lo empezó
+            worker_pids = set()  # Procesos del grupo actual que ya avisaron su PID
+            while waiting or futures:
+                while not paused() and not cancelled() and waiting and len(futures) < workers * 2:
+                    i = waiting.popleft()
+                    token = next(submissions)
+                    futures[executor.submit(_process_student_job, jobs[i], token)] = (i, token)
+                if cancelled() and not futures:
+                    break
+                if not futures:
+                    time.sleep(0.1)  # En pausa, sin boletines en curso
+                    continue
+                done, _ = wait(futures, timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i, token = futures.pop(future)
+                    running_since.pop(token, None)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        # Falla del proceso trabajador: se registra y el lote continúa
+                        result = self._failed_result(jobs[i], str(e))
+                    finish(i, result)
+                
+                hung = self._hung_futures(futures, running_since, worker_pids, started_queue)
+                if hung:
+                    # Un proceso del grupo no se puede detener por separado: se terminan todos, el
+                    # boletín colgado cuenta como intento fallido y los demás vuelven a la cola
+                    _terminate_executor(executor, worker_pids)
+                    close_queue(started_queue)
+                    for future in hung:
+                        i, _ = futures.pop(future)
+                        finish(i, self._failed_result(
+                            jobs[i], f"El boletín superó el límite de {self.document_timeout} s"))
+                    waiting.extendleft(sorted((i for i, _ in futures.values()), reverse=True))
+                    futures.clear()
+                    running_since.clear()
+                    worker_pids.clear()
+                    executor, started_queue = new_executor()
+            if cancelled():
+                report(callback, 'batch', "⏹ Procesamiento cancelado", level='warning',
+                       elapsed=time.perf_counter() - started)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            close_queue(started_queue)
+        
+        return [result for result in results if result is not None]
+    
+    def _hung_futures(self, futures, running_since, worker_pids, started_queue):
+        """
+        Trabajos que un proceso empezó hace más de self.document_timeout segundos.
+        
+        El reloj de cada trabajo arranca cuando el proceso trabajador avisa por started_queue
+        que lo empezó, no con Future.running(): el ejecutor marca como en ejecución los
+        trabajos apenas pasan a su cola interna, antes de que un proceso los tome. Los avisos
+        traen también el PID del proceso, que se agrega a worker_pids.
+        """
+        now = time.monotonic()
+        try:
+            while True:
+                token, pid = started_queue.get_nowait()
+                worker_pids.add(pid)
+                if token is not None:
+                    running_since.setdefault(token, now)
+        except queue.Empty:
+            pass
+        if not self.document_timeout:
+            return []
+        return [future for future, (_, token) in futures.items()
+                if token in running_since and now - running_since[token] > self.document_timeout
+                and not future.done()]
+    
+    @staticmethod
+    def _failed_result(job, error):
+        """Resultado de un boletín que no terminó por una falla ajena a sus datos (se puede reintentar)"""
+        return {'student_id': job[0], 'grado': job[1], 'ok': False, 'retryable': True,
+                'result': None, 'error': error, 'seconds': 0.0, 'timings': {}}
+    
+    @staticmethod
+    def _report_result(result, done, total, callback, started):
+        fraction = done / total if total else 1.0
+        elapsed = time.perf_counter() - started
+        if result['ok']:
+            report(callback, 'batch', f"✅ {result['student_id']} listo en {result['seconds']:.2f} s",
+                   student=result['student_id'], fraction=fraction, elapsed=elapsed)
+        else:
+            report(callback, 'batch', f"❌ Error con {result['student_id']}: {result['error']}",
+                   student=result['student_id'], fraction=fraction, elapsed=elapsed, level='error')
+    
+    def collect_jobs(self, grados=None, grupos=None, periodo=None):
+        """
+        Arma la lista de trabajos (student_id, grado, grupo, periodo) del Excel actual.
+        
+        Args:
+            grados (list, optional): Hojas a incluir; por defecto todas las de grado
+            grupos (list, optional): Grupos a incluir; por defecto todos
+            periodo (str, optional): Periodo para todos; por defecto el de cada estudiante
+        """
+        workbook = self.get_workbook()
+        available = workbook.grade_names()
+        if grados:
+            grados = [str(grado).strip() for grado in grados]
+            missing = [grado for grado in grados if grado not in available]
+            if missing:
+                raise ValueError(f"Las hojas {', '.join(missing)} no existen en el archivo Excel")
+        else:
+            grados = available
+        grupos = {str(grupo).strip() for grupo in grupos} if grupos else None
+        
+        jobs = []
+        for grado in grados:
+            for entry in self.get_student_index(grado):
+                if grupos is None or entry.grupo in grupos:
+                    jobs.append((entry.student_id, grado, entry.grupo,
+                                 entry.periodo if periodo is None else periodo))
+        return jobs
+    
+    def process_all_students(self, periodo, callback=None, workers=None, cancel_event=None, force=False):
+        """
+        Procesa todos los estudiantes para un periodo dado (sólo los que cambiaron, salvo con force).
+        Devuelve los resultados de process_students; si el lote se interrumpe, resume() lo continúa.
+        """
         if not self.excel_path:
             raise ValueError("No se ha seleccionado un archivo Excel")
+        
+        workers = max(1, int(workers or self.workers))
             
         # Iterar sobre todas las hojas (grados)
         try:
-            xlsx = pd.ExcelFile(self.excel_path)
-            total_sheets = len(xlsx.sheet_names)
+            workbook = self.get_workbook()
             
-            for i, grado in enumerate(xlsx.sheet_names):
-                if grado.lower().strip() == 'consolidado':
-                    continue
-                    
-                if callback:
-                    callback(f"📚 Procesando grado: {grado}")
-                
-                df = pd.read_excel(self.excel_path, sheet_name=grado)
-                df = self.normalize_column_names(df)
-                total_students = len(df)
-                
-                for j, row in df.iterrows():
-                    student_field = str(row['estudiante']).strip()
-                    if student_field.lower() == 'nan' or student_field == '':
-                        continue
-                        
-                    student_id, student_name, _, _ = self.parse_student_info(student_field)
-                    if student_id:
-                        if callback:
-                            callback(f"📝 Procesando estudiante: {student_name}")
-                        
-                        grupo = str(row.get('GRUPO', '')).strip()
-                        if pd.isna(grupo) or grupo.lower() == 'nan' or grupo == '':
-                            grupo = 'N/A'
-                            
-                        self.process_student(student_id, grado, grupo, periodo, callback=callback)
+            workbook.load_all()
+            
+            # Cada boletín se registra en el diario del lote y un error no detiene a los demás
+            jobs = [
+                (entry.student_id, grado, entry.grupo, periodo)
+                for grado in workbook.grade_names()
+                for entry in self.get_student_index(grado, callback)
+            ]
+            return self.process_students(jobs, workers, callback=callback, cancel_event=cancel_event,
+                                         force=force)
         except Exception as e:
-            if callback:
-                callback(f"❌ Error: {str(e)}")
+            report(callback, 'error', f"❌ Error: {str(e)}", level='error')
             raise
 
-if __name__ == "__main__":
+
+# Notador propio de cada proceso trabajador (se crea una vez en _init_worker) y cola en la que
+# avisa cuándo empieza cada boletín
+_worker_notador = None
+_worker_started = None
+
+
+def _init_worker(config, started_queue=None):
+    """Prepara el proceso trabajador: hojas del Excel, plantilla y motor de renderizado"""
+    global _worker_notador, _worker_started
+    _worker_started = started_queue
+    if started_queue is not None:
+        started_queue.put((None, os.getpid()))
+    notador = Notador()
+    notador.excel_path = config['excel_path']
+    notador.word_template = config['word_template']
+    if config['output_folder']:
+        notador.set_output_folder(config['output_folder'])
+    notador.render_backend = config['render_backend']
+    notador.output_formats = set(config['output_formats'])
+    notador.areas_mapping = config['areas_mapping']
+    notador.word_fields_mapping = config['word_fields_mapping']
+    notador.pdf_workers = 1  # Un LibreOffice por proceso trabajador
+    notador.pdf_max_conversions = config['pdf_max_conversions']
+    notador.pdf_timeout = config['pdf_timeout']
+    notador.workbook_cache.add(config['workbook_key'], config['sheet_names'], config['sheets'], config['schemas'])
+    notador._area_matches.update(config['area_matches'])
+    
+    # Compilar la plantilla una sola vez por proceso
+    for grado in config['sheets']:
+        notador.get_fill_plan(notador.get_areas_mapping(grado))
+    notador.get_render_backend()
+    _worker_notador = notador
+
+
+def _run_student_job(notador, job):
+    """Genera un boletín y devuelve su resultado sin propagar la excepción"""
+    student_id, grado, grupo, periodo = job
+    start = time.perf_counter()
+    with stage_timings() as timings:
+        try:
+            result = notador.process_student(student_id, grado, grupo, periodo)
+            outcome = {'ok': True, 'result': result, 'error': None}
+        except Exception as e:
+            # Los errores de los datos se repetirían en cada intento; los demás (conversión,
+            # archivos bloqueados, Word) pueden ser pasajeros
+            outcome = {'ok': False, 'result': None, 'error': str(e),
+                       'retryable': not isinstance(e, (ValueError, LookupError))}
+    return dict(outcome, student_id=student_id, grado=grado, seconds=time.perf_counter() - start,
+                timings=timings, pid=os.getpid(), peak_memory=peak_memory_bytes())
+
+
+def _process_student_job(job, token=None):
+    if _worker_started is not None and token is not None:
+        _worker_started.put((token, os.getpid()))
+    return _run_student_job(_worker_notador, job)
+
+
+def _terminate_executor(executor, pids):
+    """
+    Termina de inmediato los procesos de un ProcessPoolExecutor (p. ej. con un boletín colgado).
+    
+    El ejecutor no expone sus procesos, así que se terminan por el PID que cada trabajador avisó
+    al iniciar; al ver morir uno, el ejecutor termina también los que aún no habían avisado.
+    """
+    for pid in pids:
+        try:
+            os.kill(pid, signal.SIGTERM)  # En Windows equivale a TerminateProcess
+        except OSError:
+            pass  # El proceso ya había terminado
+    executor.shutdown(wait=True, cancel_futures=True)
+
+
+def build_arg_parser():
+    """Argumentos de la línea de comandos: sin subcomando se abre la interfaz gráfica"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog='notador', description="Generador de boletines escolares")
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.add_parser('gui', help="Abrir la interfaz gráfica (por defecto)")
+    
+    batch = subparsers.add_parser('batch', help="Generar boletines sin interfaz gráfica")
+    batch.add_argument('excel', help="Archivo Excel con las notas")
+    batch.add_argument('template', help="Plantilla Word del boletín")
+    batch.add_argument('output', help="Carpeta de salida de los boletines")
+    batch.add_argument('--grado', action='append', dest='grados', metavar='GRADO',
+                       help="Hoja a procesar (se puede repetir); por defecto todas")
+    batch.add_argument('--grupo', action='append', dest='grupos', metavar='GRUPO',
+                       help="Grupo a procesar (se puede repetir); por defecto todos")
+    batch.add_argument('--periodo', help="Periodo para todos los boletines; por defecto el del Excel")
+    batch.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                       help="Procesos de generación (por defecto uno por CPU)")
+    batch.add_argument('--formats', nargs='+', choices=['docx', 'pdf'], default=['docx', 'pdf'],
+                       help="Formatos de salida (el .docx se genera siempre)")
+    batch.add_argument('--backend', choices=sorted(RENDER_BACKENDS), default='stamp',
+                       help="Motor de renderizado")
+    batch.add_argument('--force', action='store_true',
+                       help="Regenerar todos los boletines aunque no hayan cambiado")
+    batch.add_argument('--per-group', action='store_true',
+                       help="Un solo documento por grado y grupo, con una sola conversión a PDF")
+    batch.add_argument('--split-pdf', action='store_true',
+                       help="Con --per-group, separar también el PDF en un archivo por estudiante")
+    batch.add_argument('--pdf-workers', type=int, default=2, help="Procesos de LibreOffice para los PDF")
+    batch.add_argument('--summary', help="Archivo JSON del resumen ('-' para la salida estándar); "
+                                         "por defecto resumen_lote.json en la carpeta de salida")
+    batch.add_argument('--strict', action='store_true',
+                       help="No generar nada si la validación previa encuentra errores y terminar "
+                            "con código 1 si falta algún PDF pedido")
+    batch.add_argument('--no-cache', action='store_true',
+                       help="No guardar ni leer las hojas en la caché en disco")
+    batch.add_argument('--quiet', action='store_true', help="Mostrar sólo advertencias y errores")
+    batch.add_argument('--verbose', action='store_true', help="Mostrar todas las etapas de cada boletín")
+    
+    resume = subparsers.add_parser('resume', help="Continuar un lote interrumpido a partir de su diario")
+    resume.add_argument('output', help="Carpeta de salida del lote (donde está diario_lote.jsonl)")
+    resume.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Procesos de generación (por defecto uno por CPU)")
+    resume.add_argument('--pdf-workers', type=int, default=2, help="Procesos de LibreOffice para los PDF")
+    resume.add_argument('--summary', help="Archivo JSON del resumen ('-' para la salida estándar); "
+                                          "por defecto resumen_lote.json en la carpeta de salida")
+    resume.add_argument('--no-cache', action='store_true',
+                        help="No guardar ni leer las hojas en la caché en disco")
+    resume.add_argument('--quiet', action='store_true', help="Mostrar sólo advertencias y errores")
+    resume.add_argument('--verbose', action='store_true', help="Mostrar todas las etapas de cada boletín")
+    
+    validate = subparsers.add_parser('validate', help="Revisar el Excel (y la plantilla) sin generar boletines")
+    validate.add_argument('excel', help="Archivo Excel con las notas")
+    validate.add_argument('template', nargs='?', help="Plantilla Word del boletín (opcional)")
+    validate.add_argument('--grado', action='append', dest='grados', metavar='GRADO',
+                          help="Hoja a revisar (se puede repetir); por defecto todas")
+    validate.add_argument('--summary', help="Archivo JSON del reporte ('-' para la salida estándar)")
+    validate.add_argument('--no-cache', action='store_true',
+                          help="No guardar ni leer las hojas en la caché en disco")
+    return parser
+
+
+def _console_callback(quiet=False, verbose=False):
+    """Callback de progreso que escribe en stderr (stdout queda libre para el resumen)"""
+    stream = sys.stderr
+    if stream is None:  # Ejecutable sin consola
+        return None
+    if hasattr(stream, 'reconfigure'):
+        stream.reconfigure(errors='replace')
+    
+    def callback(event):
+        if event.level == 'info' and (quiet or (event.stage != 'batch' and not verbose)):
+            return
+        print(str(event), file=stream, flush=True)
+    return callback
+
+
+def _run_students_summary(notador, jobs, callback, workers, force):
+    """Genera un boletín por estudiante y arma el resumen del subcomando batch"""
+    report(callback, 'batch', f"🎯 {len(jobs)} boletines por generar")
+    results = notador.process_students(jobs, workers, callback=callback, force=force)
+    return _students_summary(notador, results)
+
+
+def _students_summary(notador, results):
+    """Resumen JSON de un lote de boletines por estudiante"""
+    wants_pdf = 'pdf' in notador.output_formats
+    rows = [
+        {
+            'student_id': result['student_id'],
+            'grado': result['grado'],
+            'ok': result['ok'],
+            'skipped': bool(result.get('skipped')),
+            'word': result['result']['word'] if result['ok'] else None,
+            'pdf': result['result']['pdf'] if result['ok'] else None,
+            'error': result['error'],
+            'seconds': result['seconds'],
+        }
+        for result in results
+    ]
+    # Boletines generados sin el PDF que se pidió (p. ej. sin LibreOffice)
+    missing_pdf = [{'student_id': row['student_id'], 'grado': row['grado']}
+                   for row in rows if wants_pdf and row['ok'] and not row['pdf']]
+    return dict(notador.last_report, validation=notador.last_validation.summary(), missing_pdf=missing_pdf,
+                results=rows)
+
+
+def _run_groups_summary(notador, jobs, callback, split):
+    """Genera un documento por grupo y arma el resumen del subcomando batch"""
+    report(callback, 'batch', f"🎯 {len(jobs)} estudiantes por generar en documentos por grupo")
+    started = time.time()
+    results = notador.process_groups(jobs, callback=callback, split=split)
+    return {
+        'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(started)),
+        'wall_seconds': time.time() - started,
+        'groups': len(results),
+        'successes': sum(1 for result in results if result['ok']),
+        'skipped': 0,
+        'failures': [{'grado': result['grado'], 'grupo': result['grupo'], 'error': result['error']}
+                     for result in results if not result['ok']],
+        'missing_pdf': [{'grado': result['grado'], 'grupo': result['grupo']} for result in results
+                        if 'pdf' in notador.output_formats and result['ok'] and not result['result']['pdf']],
+        'validation': notador.last_validation.summary(),
+        'results': results,
+    }
+
+
+def run_batch(args):
+    """Subcomando batch: genera los boletines con Notador y escribe un resumen JSON"""
+    notador = Notador()
+    callback = _console_callback(args.quiet, args.verbose)
+    if args.no_cache:
+        notador.set_disk_cache(False)
+    try:
+        notador.set_excel_file(args.excel)
+        notador.set_word_template(args.template)
+        notador.set_output_folder(args.output)
+        notador.set_render_backend(args.backend)
+        notador.output_formats = set(args.formats) | {'docx'}
+        notador.pdf_workers = max(1, args.pdf_workers)
+        jobs = notador.collect_jobs(args.grados, args.grupos, args.periodo)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    
+    if args.strict:
+        validation = notador.validate([job[1] for job in jobs], callback)
+        if validation.errors:
+            print(f"Error: la validación encontró {len(validation.errors)} errores; no se generó ningún "
+                  f"boletín", file=sys.stderr)
+            return 1
+    
+    try:
+        if args.per_group:
+            summary = _run_groups_summary(notador, jobs, callback, args.split_pdf)
+        else:
+            summary = _run_students_summary(notador, jobs, callback, args.workers, args.force)
+    finally:
+        notador.close()
+    return _finish_summary(notador, summary, args.summary, callback, args.strict)
+
+
+def run_resume(args):
+    """Subcomando resume: continúa el lote cuyo diario está en la carpeta de salida"""
+    notador = Notador()
+    callback = _console_callback(args.quiet, args.verbose)
+    notador.pdf_workers = max(1, args.pdf_workers)
+    if args.no_cache:
+        notador.set_disk_cache(False)
+    try:
+        notador.set_output_folder(args.output)
+        results = notador.resume(args.workers, callback)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        notador.close()
+    if notador.last_report is None:  # No quedaba nada pendiente
+        return 0
+    return _finish_summary(notador, _students_summary(notador, results), args.summary, callback)
+
+
+def _finish_summary(notador, summary, summary_path, callback, strict=False):
+    """
+    Escribe el resumen de un lote y devuelve el código de salida: 1 si hubo errores o, con
+    strict, si faltan PDF que se pidieron.
+    """
+    if summary_path == '-':
+        json.dump(summary, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write('\n')
+    else:
+        path = Path(summary_path) if summary_path else notador.output_folder / 'resumen_lote.json'
+        write_json_atomic(path, summary)
+        report(callback, 'batch', f"📄 Resumen: {path}")
+    
+    report(callback, 'batch', f"✅ {summary['successes']} generados, ⏭ {summary['skipped']} sin cambios, "
+                              f"❌ {len(summary['failures'])} con error en {summary['wall_seconds']:.1f} s")
+    missing_pdf = summary.get('missing_pdf', [])
+    if missing_pdf:
+        report(callback, 'batch', f"⚠ {len(missing_pdf)} sin el PDF pedido", level='warning')
+    return 1 if summary['failures'] or (strict and missing_pdf) else 0
+
+
+def run_validate(args):
+    """Subcomando validate: revisa los datos sin generar boletines; 1 si hay errores"""
+    notador = Notador()
+    callback = _console_callback()
+    if args.no_cache:
+        notador.set_disk_cache(False)
+    try:
+        notador.set_excel_file(args.excel)
+        if args.template:
+            notador.set_word_template(args.template)
+        validation = notador.validate(args.grados, callback)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    
+    if args.summary == '-':
+        json.dump(validation.summary(), sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write('\n')
+    elif args.summary:
+        report(callback, 'batch', f"📄 Reporte: {validation.write(args.summary)}")
+    return 1 if validation.errors else 0
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    if args.command == 'batch':
+        return run_batch(args)
+    if args.command == 'resume':
+        return run_resume(args)
+    if args.command == 'validate':
+        return run_validate(args)
+    
     # Iniciar la interfaz gráfica
     gui = NotadorGUI()
     gui.run()
+    return 0
+
+
+if __name__ == "__main__":
+    # Necesario para los procesos trabajadores en el ejecutable de PyInstaller
+    multiprocessing.freeze_support()
+    
+    sys.exit(main())
@@ -0,0 +1,79 @@
+import pandas as pd
+import pytest
+
+from benchmark import area_names, generate_template
+from notador import Notador, WorkbookSnapshot
+
+
+def sheet_frame():
+    """Hoja ya normalizada (textos sin espacios) con notas escritas de varias formas"""
+    return pd.DataFrame({
+        'estudiante': [
+            '100000001 - GOMEZ PEREZ JUAN CAMILO',
+            '100000002 - DIAZ RIOS ANA',
+            '100000003 - TORRES MUÑOZ SOFÍA',
+            '100000002 - DIAZ RIOS ANA MARÍA',
+            '000000123 - CASTRO ORTIZ LUIS',
+            'sin identificación',
+        ],
+        'GRUPO': ['601', '601', '602', '601', '602', 'nan'],
+        'PERIODO': ['1', '1', '1', '1', '1', '1'],
+        'Matemáticas': ['4,5', '3', '2,8', '4,50', 'nan', ''],
+        'Ciencias Naturales': ['3,2', '4.1', 'A', '5', '3,49', '1'],
+        'Educ, Artística': ['4', '2,0', '', '3,5', '4,5,0', '45'],
+        'Observaciones': ['Bien', 'Bien', 'Mejorar', 'Bien', '', ''],
+    })
+
+
+@pytest.fixture
+def frame():
+    return sheet_frame()
+
+
+@pytest.fixture
+def notador():
+    notador = Notador()
+    notador.set_disk_cache(False)
+    yield notador
+    notador.close()
+
+
+@pytest.fixture
+def snapshot(notador):
+    """Libro con una sola hoja '6', sin archivo en disco"""
+    return WorkbookSnapshot('notas.xlsx', ('notas.xlsx', 0, 0), notador.parse_student_info,
+                            sheet_names=['6'], sheets={'6': sheet_frame()})
+
+
+@pytest.fixture
+def template(tmp_path):
+    """Plantilla Word con las etiquetas de word_fields_mapping y la tabla de ÁREAS"""
+    defaults = Notador()
+    path = tmp_path / 'plantilla.docx'
+    generate_template(path, defaults.word_fields_mapping, defaults.areas_mapping,
+                      area_names(4, defaults.areas_mapping))
+    return path
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    """Excel con la hoja '6' de sheet_frame"""
+    path = tmp_path / 'notas.xlsx'
+    with pd.ExcelWriter(path) as writer:
+        sheet_frame().to_excel(writer, sheet_name='6', index=False)
+    return path
+
+
+@pytest.fixture
+def batch(tmp_path, workbook, template, monkeypatch):
+    """Notador listo para generar sólo .docx en tmp_path/boletines"""
+    monkeypatch.setenv('NOTADOR_CACHE_DIR', '')
+
+    def make():
+        notador = Notador()
+        notador.set_excel_file(str(workbook))
+        notador.set_word_template(str(template))
+        notador.set_output_folder(str(tmp_path / 'boletines'))
+        notador.output_formats = {'docx'}
+        return notador
+    return make
@@ -0,0 +1,33 @@
+from notador import AreaMatcher
+
+
+WORD_AREAS = [
+    'Matemáticas',
+    'Ciencias Naturales y Educación Ambiental',
+    'Educación Física, Recreación y Deportes',
+    'Educación Artística y Cultural',
+    'Lengua Castellana',
+]
+
+
+def test_abbreviations_match_by_prefix():
+    match = AreaMatcher().match(['Edu, física', 'Educ, Artística', 'MATEMATICAS'], WORD_AREAS)
+    assert match.mapping == {
+        'Edu, física': 'Educación Física, Recreación y Deportes',
+        'Educ, Artística': 'Educación Artística y Cultural',
+        'MATEMATICAS': 'Matemáticas',
+    }
+    assert match.unmapped_word == ['Ciencias Naturales y Educación Ambiental', 'Lengua Castellana']
+
+
+def test_each_template_row_is_used_once():
+    match = AreaMatcher().match(['Matemáticas', 'Matematicas'], WORD_AREAS)
+    assert list(match.mapping.values()) == ['Matemáticas']
+    assert len(match.unmapped_excel) == 1
+
+
+def test_hints_and_unrelated_areas():
+    matcher = AreaMatcher({'Naturales': 'Ciencias Naturales y Educación Ambiental'})
+    match = matcher.match(['Naturales', 'Filosofía'], WORD_AREAS)
+    assert match.mapping == {'Naturales': 'Ciencias Naturales y Educación Ambiental'}
+    assert match.unmapped_excel == ['Filosofía']
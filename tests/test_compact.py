@@ -0,0 +1,90 @@
+import hashlib
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from notador import (CategoryColumn, CompactSheet, GradeColumn, InternedColumn, SheetSchema, SheetStats,
+                     StringTable, StudentIndex)
+
+
+@pytest.fixture
+def compact(frame):
+    return CompactSheet(frame, SheetSchema.infer(frame), StringTable())
+
+
+def test_column_kinds(compact):
+    kinds = dict(zip(compact.columns, map(type, compact._columns)))
+    assert kinds['estudiante'] is InternedColumn
+    assert kinds['GRUPO'] is CategoryColumn
+    assert kinds['Matemáticas'] is GradeColumn
+
+
+def test_to_frame_round_trip(frame, compact):
+    pd.testing.assert_frame_equal(compact.to_frame(), frame.astype(object), check_dtype=False)
+
+
+def test_rows_round_trip(frame, compact):
+    for position in range(len(frame)):
+        assert compact.row(position).tolist() == frame.iloc[position].tolist()
+
+
+def test_columns_round_trip(frame, compact):
+    for column in frame.columns:
+        assert compact[column].tolist() == frame[column].tolist()
+    with pytest.raises(KeyError):
+        compact['No existe']
+
+
+def test_unusual_grades_keep_their_text():
+    strings = StringTable()
+    values = ['4,5', '3,0', '4,50', '4.5', 'A', '', 'nan', '4,5,0', '1e3', '-0']
+    column = GradeColumn(values, strings)
+    assert column.text().tolist() == values
+    assert [column.at(i) for i in range(len(values))] == values
+
+
+def test_string_table_shares_texts_between_sheets(frame):
+    strings = StringTable()
+    first = CompactSheet(frame, SheetSchema.infer(frame), strings)
+    size = len(strings)
+    second = CompactSheet(frame.copy(), SheetSchema.infer(frame), strings)
+    assert len(strings) == size
+    assert second.to_frame().equals(first.to_frame())
+
+
+def test_row_hashes_match_text_frame(frame, snapshot):
+    columns = hashlib.sha1('\x1f'.join(frame.columns).encode('utf-8')).hexdigest()[:16]
+    values = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+    assert snapshot.get_row_hashes('6') == [f"{columns}{value:016x}" for value in values.tolist()]
+
+
+def test_sheet_stats_on_compact_sheet(frame, notador, compact):
+    schema = SheetSchema.infer(frame)
+    index = StudentIndex(frame, notador.parse_student_info)
+    expected = SheetStats(frame, index, schema)
+    stats = SheetStats(compact, index, schema)
+    assert (stats.promedios, stats.materias_perdidas) == (expected.promedios, expected.materias_perdidas)
+
+
+def test_grade_values(frame, compact):
+    grades = compact.grade_values('Ciencias Naturales')
+    np.testing.assert_array_equal(grades, [3.2, 4.1, np.nan, 5.0, 3.49, 1.0])
+
+
+def test_grade_codes_use_one_byte(compact):
+    column = compact._columns[compact.columns.index('Matemáticas')]
+    assert column.codes.dtype == np.uint8
+    values = [f"{i / 10:.1f}".replace('.', ',') for i in range(300)]
+    assert GradeColumn(values, StringTable()).codes.dtype == np.uint16
+
+
+def test_string_table_after_pickle(frame):
+    strings = StringTable()
+    first = CompactSheet(frame, SheetSchema.infer(frame), strings)
+    strings = pickle.loads(pickle.dumps(strings))
+    size = len(strings)
+    strings.intern(frame['estudiante'])
+    assert len(strings) == size
+    assert strings.lookup(first._columns[0].codes).tolist() == frame['estudiante'].tolist()
@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+from notador import BatchJournal, Notador
+
+JOBS = [('100000001', '6', '601', '1'), ('100000002', '6', '601', '1'), ('100000003', '6', '602', '1')]
+
+
+def generated(results):
+    """IDs de los boletines que se generaron (no los omitidos), ordenados"""
+    return sorted(result['student_id'] for result in results if result['ok'] and not result.get('skipped'))
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = BatchJournal(tmp_path / 'diario_lote.jsonl')
+    journal.start({'excel_path': 'notas.xlsx'}, JOBS)
+    yield journal
+    journal.close()
+
+
+def test_journal_tracks_unfinished_jobs(journal):
+    journal.record_result(JOBS[0], {'ok': True, 'result': {'word': 'a.docx', 'pdf': None}}, 1)
+    journal.record_result(JOBS[1], {'ok': False, 'result': None, 'error': 'Word no responde'}, 1)
+    journal.close()
+    config, jobs = journal.unfinished()
+    assert config == {'excel_path': 'notas.xlsx'}
+    assert jobs == JOBS[1:]
+
+
+def test_journal_ignores_torn_last_line(journal):
+    journal.record(JOBS[0], 'rendered', word='a.docx')
+    journal.close()
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'key': BatchJournal.key(JOBS[1]), 'job': list(JOBS[1]), 'state': 'rendered'})[:30])
+    header, last = journal.read()
+    assert header['config'] == {'excel_path': 'notas.xlsx'}
+    assert last[BatchJournal.key(JOBS[0])]['state'] == 'rendered'
+    assert last[BatchJournal.key(JOBS[1])]['state'] == 'queued'
+    assert journal.unfinished()[1] == JOBS[1:]
+
+
+def test_journal_with_torn_header_is_ignored(tmp_path):
+    path = tmp_path / 'diario_lote.jsonl'
+    path.write_text('{"version": 1, "conf', encoding='utf-8')
+    assert BatchJournal(path).unfinished() == (None, [])
+    assert BatchJournal(tmp_path / 'no_existe.jsonl').unfinished() == (None, [])
+
+
+def test_journal_compact_keeps_last_state(journal):
+    for job in JOBS:
+        journal.record(job, 'failed', error='x', attempt=1)
+    journal.record_result(JOBS[2], {'ok': True, 'result': {'word': 'c.docx', 'pdf': 'c.pdf'}}, 2)
+    journal.compact()
+    lines = journal.path.read_text(encoding='utf-8').splitlines()
+    assert len(lines) == 1 + len(JOBS)
+    assert [json.loads(line)['state'] for line in lines[1:]] == ['failed', 'failed', 'converted']
+
+
+def test_resume_generates_only_unfinished(batch):
+    first = batch()
+    results = first.process_students(first.collect_jobs(['6']), workers=1)
+    jobs = [(result['student_id'], result['grado']) for result in results]
+    journal = BatchJournal(first.output_folder / first.journal_name)
+
+    # Simular un cierre a mitad del lote: el diario sólo llega al primer boletín, con una
+    # línea a medio escribir, y los demás archivos no existen
+    lines = journal.path.read_text(encoding='utf-8').splitlines(keepends=True)
+    kept = [line for line in lines if json.loads(line).get('state') != 'rendered']
+    kept += [line for line in lines if f'"{jobs[0][1]}/{jobs[0][0]}"' in line and '"rendered"' in line]
+    journal.path.write_text(''.join(kept) + '{"key": "6/1000', encoding='utf-8')
+    (first.output_folder / first.manifest_name).unlink()
+
+    second = Notador()
+    second.set_disk_cache(False)
+    second.set_output_folder(str(first.output_folder))
+    resumed = second.resume(workers=1)
+    assert generated(resumed) == sorted(student_id for student_id, _ in jobs[1:])
+    assert second.resume(workers=1) == []
@@ -0,0 +1,85 @@
+import os
+
+import openpyxl
+from docx import Document
+
+import notador as notador_module
+from notador import OutputManifest
+
+
+def generated(results):
+    """IDs de los boletines que se generaron (no los omitidos), ordenados"""
+    return sorted(result['student_id'] for result in results if result['ok'] and not result.get('skipped'))
+
+
+def test_unchanged_bulletins_are_skipped(batch, workbook):
+    notador = batch()
+    jobs = notador.collect_jobs(['6'])
+    assert len(generated(notador.process_students(jobs, workers=1))) == len(jobs)
+    assert generated(batch().process_students(jobs, workers=1)) == []
+
+    # Corregir una nota regenera sólo ese boletín
+    book = openpyxl.load_workbook(workbook)
+    book['6']['D4'] = '3,9'  # Matemáticas de 100000003
+    book.save(workbook)
+    assert generated(batch().process_students(jobs, workers=1)) == ['100000003']
+
+
+def test_missing_output_and_force_regenerate(batch):
+    notador = batch()
+    jobs = notador.collect_jobs(['6'])
+    results = notador.process_students(jobs, workers=1)
+    os.remove(results[0]['result']['word'])
+    assert generated(batch().process_students(jobs, workers=1)) == [results[0]['student_id']]
+    assert len(generated(batch().process_students(jobs, workers=1, force=True))) == len(jobs)
+
+
+def test_template_change_regenerates_all(batch, template):
+    notador = batch()
+    jobs = notador.collect_jobs(['6'])
+    notador.process_students(jobs, workers=1)
+    doc = Document(str(template))
+    doc.add_paragraph('Nota al pie')
+    doc.save(str(template))
+    assert len(generated(batch().process_students(jobs, workers=1))) == len(jobs)
+
+
+def test_missing_pdf_without_converter_is_not_stale(batch, monkeypatch):
+    monkeypatch.setattr(notador_module, 'find_soffice', lambda: None)
+    notador = batch()
+    notador.output_formats = {'docx', 'pdf'}
+    jobs = notador.collect_jobs(['6'])
+    results = notador.process_students(jobs, workers=1)
+    assert all(result['ok'] and result['result']['pdf'] is None for result in results)
+
+    again = batch()
+    again.output_formats = {'docx', 'pdf'}
+    assert generated(again.process_students(jobs, workers=1)) == []
+
+
+def test_manifest_decisions(tmp_path):
+    word = tmp_path / 'a.docx'
+    word.write_bytes(b'docx')
+    manifest = OutputManifest(tmp_path / 'manifiesto.json')
+    inputs = {'row': 'abc', 'template': 't', 'config': 'c'}
+    manifest.update('6/1', inputs, {'word': str(word), 'pdf': None})
+    manifest.save()
+
+    manifest = OutputManifest(tmp_path / 'manifiesto.json')
+    assert manifest.is_current('6/1', inputs, {'docx'})
+    assert not manifest.is_current('6/1', dict(inputs, row='abd'), {'docx'})
+    assert not manifest.is_current('6/2', inputs, {'docx'})
+    assert not manifest.is_current('6/1', inputs, {'docx', 'pdf'})
+    assert manifest.is_current('6/1', inputs, {'docx', 'pdf'}, pdf_available=False)
+
+    # Un PDF que sí se generó y luego se borró se vuelve a generar
+    manifest.update('6/1', inputs, {'word': str(word), 'pdf': str(tmp_path / 'a.pdf')})
+    assert not manifest.is_current('6/1', inputs, {'docx', 'pdf'}, pdf_available=False)
+    word.unlink()
+    assert not manifest.is_current('6/1', inputs, {'docx'})
+
+
+def test_damaged_manifest_regenerates_everything(tmp_path):
+    path = tmp_path / 'manifiesto.json'
+    path.write_text('{"version": 1, "stud', encoding='utf-8')
+    assert OutputManifest(path).students == {}
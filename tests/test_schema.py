@@ -0,0 +1,31 @@
+import pandas as pd
+
+from notador import SheetSchema, SheetStats, StudentIndex
+
+
+def sheet_with_extra_columns():
+    """Hoja con una columna sin encabezado y un GRUPO repetido, ambos con valores numéricos"""
+    return pd.DataFrame({
+        'estudiante': ['100000001 - GOMEZ PEREZ JUAN', '100000002 - DIAZ RIOS ANA'],
+        'GRUPO': ['601', '601'],
+        'Matemáticas': ['4,5', '3'],
+        'Inglés': ['4', '2,5'],
+        'Unnamed: 4': ['1', '5'],
+        'GRUPO.1': ['601', '601'],
+    })
+
+
+def test_roles():
+    schema = SheetSchema.infer(sheet_with_extra_columns())
+    assert schema.subjects == ['Matemáticas', 'Inglés']
+    assert schema.roles['Unnamed: 4'] == schema.roles['GRUPO.1'] == SheetSchema.IGNORED
+
+
+def test_extra_columns_do_not_count(notador):
+    # Antes del esquema 'Unnamed: 4' y 'GRUPO.1' contaban como notas: (152,62, 1) y (152,88, 2)
+    df = sheet_with_extra_columns()
+    stats = SheetStats(df, StudentIndex(df, notador.parse_student_info))
+    assert stats.get('100000001') == (4.25, 0)
+    assert stats.get('100000002') == (2.75, 2)
+    for position in range(len(df)):
+        assert stats.at(position) == notador.calculate_academic_stats(df.iloc[position])
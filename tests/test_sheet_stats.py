@@ -0,0 +1,25 @@
+import pandas as pd
+
+from notador import PASSING_GRADE, SheetSchema, SheetStats, StudentIndex
+
+
+def test_matches_per_row_stats(frame, notador):
+    schema = SheetSchema.infer(frame)
+    stats = SheetStats(frame, StudentIndex(frame, notador.parse_student_info), schema)
+    for position in range(len(frame)):
+        assert stats.at(position) == notador.calculate_academic_stats(frame.iloc[position], schema)
+
+
+def test_expected_numbers(frame, notador):
+    stats = SheetStats(frame, StudentIndex(frame, notador.parse_student_info))
+    assert stats.get('100000001') == (round((4.5 + 3.2 + 4) / 3, 2), 1)
+    # 'nan' y '4,5,0' no son notas: sólo cuenta 3,49
+    assert stats.get('000000123') == (3.49, 1)
+    assert stats.get('999999999') is None
+
+
+def test_passing_grade_is_not_lost(notador):
+    df = pd.DataFrame({'estudiante': ['100000001 - GOMEZ PEREZ JUAN'],
+                       'Matemáticas': [str(PASSING_GRADE).replace('.', ',')], 'Inglés': ['3,49']})
+    stats = SheetStats(df, StudentIndex(df, notador.parse_student_info))
+    assert stats.at(0) == notador.calculate_academic_stats(df.iloc[0]) == (3.5, 1)
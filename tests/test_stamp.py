@@ -0,0 +1,72 @@
+import io
+import zipfile
+
+import pytest
+from docx import Document
+
+from notador import DocxRenderBackend, DocxStamper
+
+
+@pytest.fixture
+def plan(notador, template):
+    notador.set_word_template(str(template))
+    return notador.get_fill_plan(notador.areas_mapping)
+
+
+@pytest.fixture
+def stamper(template, plan):
+    return DocxStamper(str(template), plan)
+
+
+def cell_texts(data):
+    doc = Document(io.BytesIO(data))
+    return {(t, r, c): cell.text for t, table in enumerate(doc.tables)
+            for r, row in enumerate(table.rows) for c, cell in enumerate(row.cells)}
+
+
+def values(plan):
+    replacements = {label: f"Valor {i} & <{label[:5]}>" for i, (_, _, _, label) in enumerate(plan.fields)}
+    student_row = {area: f"{i},5" for i, (_, _, _, area) in enumerate(plan.areas)}
+    return replacements, student_row
+
+
+def test_output_is_a_valid_docx(template, stamper):
+    data = stamper.stamp_bytes({}, {})
+    with zipfile.ZipFile(io.BytesIO(data)) as archive, zipfile.ZipFile(template) as source:
+        assert archive.testzip() is None
+        assert archive.namelist() == source.namelist()
+        for name in source.namelist():
+            if name != DocxStamper.PART_NAME:
+                assert archive.read(name) == source.read(name)
+    assert cell_texts(data) == cell_texts(template.read_bytes())
+
+
+def test_values_land_in_planned_cells(plan, stamper):
+    assert plan.fields and plan.areas
+    replacements, student_row = values(plan)
+    texts = cell_texts(stamper.stamp_bytes(replacements, student_row))
+    for table, row, col, label in plan.fields:
+        assert texts[table, row, col] == replacements[label]
+    for table, row, col, area in plan.areas:
+        assert texts[table, row, col] == student_row[area]
+
+
+def test_matches_python_docx_backend(template, plan, stamper):
+    replacements, student_row = values(plan)
+    expected = DocxRenderBackend().render_bytes(replacements, student_row, None, plan=plan,
+                                                template_path=str(template))
+    assert cell_texts(stamper.stamp_bytes(replacements, student_row)) == cell_texts(expected)
+
+
+def test_illegal_xml_characters_are_removed(plan, stamper):
+    label = plan.fields[0][3]
+    data = stamper.stamp_bytes({label: 'ANA\x0bMARÍA\x01\x1f  '}, {})
+    table, row, col, _ = plan.fields[0]
+    assert cell_texts(data)[table, row, col] == 'ANA MARÍA  '
+
+
+def test_stamp_writes_file(tmp_path, plan, stamper):
+    replacements, student_row = values(plan)
+    path = tmp_path / 'boletin.docx'
+    stamper.stamp(path, replacements, student_row)
+    assert path.read_bytes() == stamper.stamp_bytes(replacements, student_row)
@@ -0,0 +1,39 @@
+import pytest
+
+from notador import StudentIndex
+
+
+@pytest.fixture
+def index(frame, notador):
+    return StudentIndex(frame, notador.parse_student_info)
+
+
+def test_index_skips_rows_without_id(index):
+    assert [entry.student_id for entry in index] == ['100000001', '100000002', '100000003', '000000123']
+
+
+def test_duplicate_ids_keep_first_row(index):
+    entry = index.get('100000002')
+    assert entry.position == 1
+    assert entry.nombre_completo == 'DIAZ RIOS ANA'
+    assert index.duplicates == {'100000002': [1, 3]}
+
+
+def test_lookup_is_exact(index):
+    assert index.get('10000000') is None
+    assert index.get('1000000011') is None
+    assert index.get(' 100000003 ').nombres == 'SOFÍA'
+
+
+def test_lookup_restores_leading_zeros(index):
+    assert index.get('123').student_id == '000000123'
+    assert index.get(123).student_id == '000000123'
+
+
+def test_group_and_period(index):
+    entry = index.get('100000003')
+    assert (entry.grupo, entry.periodo) == ('602', '1')
+
+
+def test_sheet_without_student_column(frame, notador):
+    assert len(StudentIndex(frame.drop(columns='estudiante'), notador.parse_student_info)) == 0